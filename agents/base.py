@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterator, Optional, List
 import uuid
 from tools.load_tools import load_tools
 from utils.logger import log_info
+from utils.tracing import current_context, traced_run
 
 
 class BaseAgent(ABC):
@@ -11,10 +12,28 @@ class BaseAgent(ABC):
 
     Each agent has:
       - name: readable agent name
-      - task_id: unique identifier for a run
+      - task_id: the run being served: the task_id of the enclosing
+        utils.tracing context (WorkflowExecutor sets it per step), else the
+        one given at construction. Pooled agents serve many runs, so this
+        is read per call rather than fixed on the instance.
       - tools: optional dict of loaded tools (via load_tools)
+
+    Streaming protocol (optional):
+      - stream_key: output key holding the agent's list of items
+        ("papers", "pdfs", "summaries")
+      - run_stream(input): yields those items one at a time; input values
+        may be lazy iterators from an upstream run_stream, which gives a
+        pipeline with backpressure
     """
 
+    stream_key: Optional[str] = None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # every run() is timed as an "agent" span (see utils.tracing)
+        if "run" in cls.__dict__:
+            cls.run = traced_run("agent")(cls.__dict__["run"])
+
     def __init__(
         self,
         name: Optional[str] = None,
@@ -22,11 +41,19 @@ class BaseAgent(ABC):
         tool_names: Optional[List[str]] = None,
     ):
         self.name = name or self.__class__.__name__
-        self.task_id = task_id or str(uuid.uuid4())
+        self._task_id = task_id or str(uuid.uuid4())
         self.tools: Dict[str, Any] = load_tools(use=tool_names or [])
 
         log_info(f"[BaseAgent] Initialized agent '{self.name}' (task_id={self.task_id})")
 
+    @property
+    def task_id(self) -> str:
+        return current_context().get("task_id") or self._task_id
+
+    @task_id.setter
+    def task_id(self, value: str) -> None:
+        self._task_id = value
+
     def get_tool(self, tool_name: str) -> Any:
         """
         Return a tool instance by name or raise ValueError.
@@ -47,6 +74,12 @@ class BaseAgent(ABC):
         """
         log_info(f"[{self.name}] {message}")
 
+    def close(self) -> None:
+        """
+        Release resources kept warm between runs (worker pools, handles).
+        Shared tools are not closed here; see tools.load_tools.close_tools.
+        """
+
     @abstractmethod
     def run(self, input: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -54,3 +87,17 @@ class BaseAgent(ABC):
         Must be implemented by subclasses.
         """
         raise NotImplementedError
+
+    def run_stream(self, input: Dict[str, Any]) -> Iterator[Any]:
+        """
+        Yield output items one at a time.
+        Default: materialise lazy inputs, call run() and yield output[stream_key].
+        Agents that can do better override this.
+        """
+        materialised = {
+            key: list(value) if isinstance(value, Iterator) else value
+            for key, value in input.items()
+        }
+        output = self.run(materialised)
+        if self.stream_key:
+            yield from output.get(self.stream_key) or []
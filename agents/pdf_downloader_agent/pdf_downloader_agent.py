@@ -1,46 +1,96 @@
 import os
+from collections import deque
+from typing import Any, Deque, Dict, Iterator
 from agents.base import BaseAgent
-from agents.pdf_downloader_agent.tools import download_pdf
+from agents.pdf_downloader_agent.tools import iter_download_pdfs
+from utils.artifact_store import get_store
 from utils.logger import log_info, log_warn, log_error
 
 class PDFDownloaderAgent(BaseAgent):
+    stream_key = "pdfs"
+
     def __init__(
-        self, task_id: str | None = None):
+        self,
+        task_id: str | None = None,
+        max_workers: int = 4,
+        max_per_host: int = 4,
+        min_interval: float = 0.25,
+    ):
         super().__init__(name="PDFDownloaderAgent", task_id=task_id , tool_names=[])
         self.output_dir = "data/papers"
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.min_interval = min_interval
+        self.store = get_store()
         os.makedirs(self.output_dir, exist_ok=True)
         log_info("PDFDownloaderAgent initialized.")
 
     def run(self, input_dict: dict) -> dict:
+        downloaded_pdfs = list(self.run_stream(input_dict))
+        log_info(f"✅ Downloaded {sum(bool(p['file_path']) for p in downloaded_pdfs)} PDFs.")
+        return {"pdfs": downloaded_pdfs}
+
+    def run_stream(self, input_dict: dict) -> Iterator[Dict[str, Any]]:
+        """
+        Yield one {"title", "url", "file_path"} dict per downloaded paper, in
+        input order, with the search result's abstract as "summary" when it
+        has one. A paper whose download fails still comes through, with
+        `file_path` None, if it has an abstract (the summariser can work from
+        that). `papers` may be a lazy iterator; it is pulled at most
+        `max_workers` items ahead of the consumer.
+        """
         arxiv_results = input_dict.get("papers") or input_dict.get("results") or []
-        if not arxiv_results:
-            log_warn("No results found in input_dict.")
-            return {"pdfs": []}
+        max_workers = int(input_dict.get("max_workers", self.max_workers))
+        log_info(f"Downloading PDFs (max_workers={max_workers})...")
 
-        log_info(f"Downloading {len(arxiv_results)} PDFs...")
-        downloaded_pdfs = []
+        # iter_download_pdfs consumes URLs and yields outcomes in the same
+        # order, so the metadata queue lines up with each outcome
+        jobs: Deque[tuple] = deque()
 
-        for idx, result in enumerate(arxiv_results, start=1):
-            url = result.get("pdf_url") or result.get("url")
-            title = result.get("title", "Unknown Title")
+        def _urls() -> Iterator[str]:
+            for idx, result in enumerate(arxiv_results, start=1):
+                url = result.get("url") or result.get("pdf_url")
+                title = result.get("title", "Unknown Title")
 
-            if not url:
-                log_warn(f"Missing URL for result #{idx}: {title}")
-                continue
+                if not url:
+                    log_warn(f"Missing URL for result #{idx}: {title}")
+                    continue
+                jobs.append((result, url, title))
+                yield url
+
+        outcomes = iter_download_pdfs(
+            _urls(),
+            self.output_dir,
+            max_workers=max_workers,
+            max_per_host=self.max_per_host,
+            min_interval=self.min_interval,
+            store=self.store,
+        )
 
-            try:
-                pdf_path = download_pdf(url, self.output_dir)
-                if not pdf_path:
+        count = 0
+        for outcome in outcomes:
+            result, url, title = jobs.popleft()
+            pdf = {
+                "title": title,
+                "url": result.get("url") or url,
+                "file_path": outcome["file_path"],
+            }
+            if result.get("summary"):
+                pdf["summary"] = result["summary"]
+
+            if outcome["error"] or not outcome["file_path"]:
+                if outcome["error"]:
+                    log_error(f"❌ Failed to download {title} — {outcome['error']}")
+                else:
                     log_warn(f"Download returned no path for: {title}")
-                    continue
-                downloaded_pdfs.append({
-                    "title": title,
-                    "url": result.get("url") or url,
-                    "file_path": pdf_path
-                })
-                log_info(f"✅ Downloaded: {title}")
-            except Exception as e:
-                log_error(f"❌ Failed to download {title} — {e}")
-
-        log_info(f"✅ Downloaded {len(downloaded_pdfs)} PDFs.")
-        return {"pdfs": downloaded_pdfs}
+                if "summary" in pdf:
+                    log_info("↪️ Passing on the abstract for: %s", title)
+                    pdf["file_path"] = None
+                    yield pdf
+                continue
+            log_info("✅ Downloaded: %s", title)
+            count += 1
+            yield pdf
+
+        if not count:
+            log_warn("No PDFs downloaded from input_dict.")
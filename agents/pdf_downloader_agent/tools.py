@@ -1,49 +1,297 @@
 import os
 import re
+import threading
+import time
 import requests
-from typing import Optional
-from tenacity import retry, stop_after_attempt, wait_fixed
-from utils.logger import log_info, log_error
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional
+from utils.artifact_store import ArtifactStore
+from utils import tracing
+from utils.arxiv import base_arxiv_id
+from utils.http import HostLimiter, get_host_limiter, get_session
+from utils.logger import log_debug, log_warn, log_error
+from utils.streaming import ordered_map
+from utils.upstream import CircuitOpenError, backoff_delay, get_upstream
+
+ARXIV_PDF_URL = "https://arxiv.org/pdf/{arxiv_id}.pdf"
+ARXIV_ABS_RE = re.compile(r'arxiv\.org\/abs\/([^\s\/]+)')
+PDF_MAGIC = b"%PDF"
+CHUNK_SIZE = 64 * 1024
+
+# one download per arXiv ID at a time: attempts share the ID's `.part` file.
+# Entries are refcounted and dropped when the last holder leaves, so a
+# long-running worker doesn't keep a lock for every paper it has seen.
+_id_locks: Dict[str, List[Any]] = {}  # arXiv ID -> [lock, holders and waiters]
+_id_locks_lock = threading.Lock()
+
+
+@contextmanager
+def _id_lock(arxiv_id: str) -> Iterator[None]:
+    with _id_locks_lock:
+        entry = _id_locks.setdefault(arxiv_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _id_locks_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _id_locks[arxiv_id]
 
 
 def sanitize_filename(name: str) -> str:
     return re.sub(r'[^\w\-_. ]', '_', name)
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
-def download_pdf(arxiv_url: str, output_dir: str = "data/papers") -> Optional[str]:
+class InvalidPDFError(Exception):
+    """Raised when a finished download is truncated or is not a PDF."""
+
+
+def is_valid_pdf(file_path: str, expected_size: Optional[int] = None) -> bool:
+    """
+    Cheap integrity check: `%PDF` magic bytes and, when known, the exact size.
+    """
+    try:
+        size = os.path.getsize(file_path)
+        if size == 0 or (expected_size is not None and size != expected_size):
+            return False
+        with open(file_path, "rb") as f:
+            return f.read(len(PDF_MAGIC)) == PDF_MAGIC
+    except OSError:
+        return False
+
+
+def _total_size(response: requests.Response) -> Optional[int]:
+    """Full file size from Content-Range (206) or Content-Length (200)."""
+    content_range = response.headers.get("Content-Range", "")
+    if "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else None
+
+
+def _stream_to_part(
+    session: requests.Session, pdf_url: str, part_path: str
+) -> Optional[int]:
+    """
+    Stream `pdf_url` into `part_path`, resuming with a Range request when a
+    partial file is already there. Returns the expected total size if known.
+    """
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    with session.get(pdf_url, headers=headers, timeout=10, stream=True) as response:
+        if offset and response.status_code == 416:
+            # nothing left to fetch; the part file is either complete or junk
+            return None
+        response.raise_for_status()
+
+        if offset and response.status_code == 206:
+            log_debug("[Resume] Continuing %s from byte %d", pdf_url, offset)
+            mode = "ab"
+        else:
+            mode = "wb"  # server ignored Range: start over
+
+        expected_size = _total_size(response)
+        with open(part_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+                    tracing.add(bytes=len(chunk))
+    return expected_size
+
+
+def _keep(src_path: str, arxiv_id: str, store: Optional[ArtifactStore]) -> str:
+    """Hand a verified PDF to the artifact store (if any) and return its final path."""
+    if store is None:
+        return src_path
+    meta = store.put_file(
+        "pdf", arxiv_id, src_path, producer="PDFDownloaderAgent", arxiv_id=arxiv_id, move=True
+    )
+    return meta["path"]
+
+
+def download_pdf(
+    arxiv_url: str,
+    output_dir: str = "data/papers",
+    session: Optional[requests.Session] = None,
+    limiter: Optional[HostLimiter] = None,
+    store: Optional[ArtifactStore] = None,
+) -> Optional[str]:
     """
     Downloads the PDF of an arXiv paper given its abstract URL.
     Returns the local file path of the downloaded PDF, or None if failed.
+
+    The body is streamed to `<file>.part` and renamed into place only once it
+    passes `is_valid_pdf`, so a crash never leaves a broken cache hit; a later
+    attempt resumes the `.part` file with an HTTP Range request.
+
+    With a `store`, finished PDFs move into the artifact store (keyed by
+    arXiv ID with version) and later calls return the stored copy.
+
+    Concurrent calls for the same arXiv ID are serialised, so the later
+    ones find the earlier one's file instead of sharing its `.part` file.
+
+    `session` defaults to the shared keep-alive session; `limiter` (optional)
+    bounds concurrent requests per host. Attempts go through the host's
+    Upstream (rate limit, backoff with jitter, circuit breaker); the limiter
+    slot is only held for the request itself, so a retry wait never blocks
+    other downloads.
     """
-    match = re.search(r'arxiv\.org\/abs\/([^\s\/]+)', arxiv_url)
+    match = ARXIV_ABS_RE.search(arxiv_url)
     if not match:
         log_error(f"[Invalid URL] Cannot extract arXiv ID from: {arxiv_url}")
         return None
 
     arxiv_id = match.group(1)
-    pdf_url = f"https://arxiv.org/pdf/{arxiv_id}.pdf"
+    with _id_lock(arxiv_id):
+        return _download_locked(arxiv_id, output_dir, session, limiter, store)
+
+
+def _download_locked(
+    arxiv_id: str,
+    output_dir: str,
+    session: Optional[requests.Session],
+    limiter: Optional[HostLimiter],
+    store: Optional[ArtifactStore],
+) -> str:
+    pdf_url = ARXIV_PDF_URL.format(arxiv_id=arxiv_id)
     safe_filename = sanitize_filename(f"{arxiv_id}.pdf")
     file_path = os.path.join(output_dir, safe_filename)
+    part_path = file_path + ".part"
+
+    if store is not None:
+        cached = store.get("pdf", arxiv_id)
+        if cached and is_valid_pdf(cached["path"]):
+            log_debug("[Skip] PDF already in artifact store: %s", arxiv_id)
+            return cached["path"]
 
-    # Skip if already downloaded
+    # Skip if already downloaded (and not a truncated leftover)
     if os.path.exists(file_path):
-        log_info(f"[Skip] PDF already exists: {file_path}")
-        return file_path
+        if is_valid_pdf(file_path):
+            log_debug("[Skip] PDF already exists: %s", file_path)
+            return _keep(file_path, arxiv_id, store)
+        log_warn(f"[Invalid] Discarding corrupt cached PDF: {file_path}")
+        os.remove(file_path)
 
     os.makedirs(output_dir, exist_ok=True)
-    log_info(f"[Download] Fetching PDF from {pdf_url}")
+    log_debug("[Download] Fetching PDF from %s", pdf_url)
+    session = session or get_session()
 
-    try:
-        response = requests.get(pdf_url, timeout=10)
-        response.raise_for_status()
+    def _attempt() -> None:
+        if limiter:
+            with limiter.slot(pdf_url):
+                expected_size = _stream_to_part(session, pdf_url, part_path)
+        else:
+            expected_size = _stream_to_part(session, pdf_url, part_path)
+
+        if not is_valid_pdf(part_path, expected_size):
+            os.remove(part_path)
+            raise InvalidPDFError(f"Incomplete or non-PDF response from {pdf_url}")
 
-        with open(file_path, "wb") as f:
-            f.write(response.content)
+    try:
+        # a failed attempt keeps its .part file, so the retry resumes it
+        with tracing.context(item=arxiv_id):
+            _call_with_pdf_retries(get_upstream(pdf_url), _attempt, pdf_url)
 
-        log_info(f"[Saved] PDF saved to: {file_path}")
+        if store is None:
+            os.replace(part_path, file_path)
+        else:
+            file_path = _keep(part_path, arxiv_id, store)
+        log_debug("[Saved] PDF saved to: %s", file_path)
         return file_path
 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, InvalidPDFError, CircuitOpenError) as e:
         log_error(f"[Error] Failed to download PDF from {pdf_url} — {e}")
-        raise  # tenacity will retry
+        raise
+
+
+def _call_with_pdf_retries(upstream: Any, attempt: Any, pdf_url: str) -> None:
+    """
+    A bad body (truncated, not a PDF) is this paper's problem, not an
+    outage: it is retried here rather than by the Upstream, whose circuit
+    breaker only counts transport errors and 429/5xx responses.
+    """
+    for n in range(1, upstream.max_attempts + 1):
+        try:
+            upstream.call(attempt)
+            return
+        except InvalidPDFError as e:
+            if n == upstream.max_attempts:
+                raise
+            delay = backoff_delay(n, upstream.backoff_base)
+            log_warn(f"[Download] 🔁 {e}; retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def iter_download_pdfs(
+    arxiv_urls: Iterable[str],
+    output_dir: str = "data/papers",
+    max_workers: int = 4,
+    max_per_host: int = 4,
+    min_interval: float = 0.0,
+    store: Optional[ArtifactStore] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Download PDFs concurrently over the shared session, yielding one
+    {"file_path", "error"} dict per URL in input order as soon as it is ready.
+    `arxiv_urls` is consumed lazily, at most `max_workers` ahead. URLs of
+    the same paper (any version) are downloaded once and share the outcome.
+    The per-host cap is process-wide: concurrent calls share it.
+    """
+    limiter = get_host_limiter(max_per_host, min_interval)
+    session = get_session()
+
+    def _one(url: str) -> Dict[str, Any]:
+        try:
+            return {"file_path": download_pdf(url, output_dir, session=session, limiter=limiter, store=store), "error": None}
+        except Exception as e:
+            return {"file_path": None, "error": str(e)}
+
+    order: Deque[str] = deque()  # paper key of every input URL, in input order
+    outcomes: Dict[str, Dict[str, Any]] = {}
+
+    def _unique() -> Iterator[str]:
+        queued = set()
+        for url in arxiv_urls:
+            key = _paper_key(url)
+            order.append(key)
+            if key not in queued:
+                queued.add(key)
+                yield url
+
+    def _fan_out(results: Iterator[tuple]) -> Iterator[Dict[str, Any]]:
+        # unique results arrive in first-seen order; repeats reuse them
+        for url, outcome in results:
+            outcomes[_paper_key(url)] = outcome
+            while order and order[0] in outcomes:
+                yield dict(outcomes[order.popleft()])
+        while order:  # repeats read after the last unique URL
+            yield dict(outcomes[order.popleft()])
+
+    def _keyed(url: str) -> tuple:
+        return url, _one(url)
+
+    if max_workers <= 1:
+        yield from _fan_out(map(_keyed, _unique()))
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-download") as executor:
+        yield from _fan_out(ordered_map(_keyed, _unique(), executor, window=max_workers))
+
+
+def _paper_key(url: str) -> str:
+    match = ARXIV_ABS_RE.search(url)
+    return base_arxiv_id(match.group(1)) if match else url
+
+
+def download_pdfs(arxiv_urls: List[str], output_dir: str = "data/papers", **kwargs: Any) -> List[Dict[str, Any]]:
+    """
+    Download many PDFs concurrently over the shared session.
+    Returns one {"file_path", "error"} dict per URL, in the input order.
+    """
+    return list(iter_download_pdfs(arxiv_urls, output_dir, **kwargs))
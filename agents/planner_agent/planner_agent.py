@@ -1,38 +1,58 @@
-import os
 import json
 from utils.logger import log_info, log_error
 from agents.base import BaseAgent
-from utils.llm import call_llm  # 🔹 assumes you have utils/llm.py wrapper
+from utils.llm import call_llm
+from utils.llm_cache import get_llm_cache
 
-CACHE_FILE = "data/cache/planner_cache.json"
+CACHE_SCOPE = "planner"
+
+
+def _is_json(text: str) -> bool:
+    try:
+        json.loads(text)
+        return True
+    except ValueError:
+        return False
+
+
+def fallback_plan(instruction: str, num_papers: int = 3) -> dict:
+    """The plan used when the LLM can't be reached: search -> download -> summarise -> write."""
+    return {
+        "workflow": [
+            {"agent": "SearchAgent", "params": {"query": instruction, "max_results": num_papers}},
+            {"agent": "PDFDownloaderAgent", "params": {}},
+            {"agent": "SummariserAgent", "params": {}},
+            {"agent": "WriterAgent", "params": {}}
+        ],
+        "num_papers": num_papers
+    }
+
+
+def _with_query(workflow: dict, instruction: str) -> dict:
+    """Point the plan's SearchAgent steps at `instruction` (a near match was planned for another one)."""
+    for step in workflow.get("workflow") or []:
+        if isinstance(step, dict) and step.get("agent") == "SearchAgent":
+            params = step.get("params")
+            step["params"] = {**(params if isinstance(params, dict) else {}), "query": instruction}
+    return workflow
 
 
 class PlannerAgent(BaseAgent):
-    def __init__(self, name=None, task_id=None, reset_cache: bool = False):
+    def __init__(self, name=None, task_id=None, reset_cache: bool = False, near_duplicates: bool = False):
         super().__init__(name=name or "PlannerAgent", task_id=task_id)
 
-        # ensure cache dir exists
-        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
-
-        self.cache_file = CACHE_FILE
+        # Plans are cached in the shared LLM cache (data/cache/llm_cache.sqlite3).
+        # With `near_duplicates`, a near-identical earlier instruction's plan is
+        # reused, with its search query replaced by the current instruction.
+        self.cache = get_llm_cache()
         self.reset_cache = reset_cache
+        self.near_duplicates = near_duplicates
 
         # handle reset cache
-        if self.reset_cache and os.path.exists(self.cache_file):
-            os.remove(self.cache_file)
+        if self.reset_cache:
+            self.cache.clear(scope_prefix=CACHE_SCOPE)
             log_info("[PlannerAgent] 🗑️ Cache cleared.")
 
-        # load cache if exists
-        if os.path.exists(self.cache_file):
-            with open(self.cache_file, "r") as f:
-                self.cache = json.load(f)
-        else:
-            self.cache = {}
-
-    def _save_cache(self):
-        with open(self.cache_file, "w") as f:
-            json.dump(self.cache, f, indent=2)
-
     def run(self, input: dict) -> dict:
         """
         Generate workflow plan for an instruction.
@@ -43,15 +63,8 @@ class PlannerAgent(BaseAgent):
         if not instruction:
             return {"status": "error", "message": "No instruction provided"}
 
-        cache_key = f"{instruction.lower()}::{num_papers}"
-
-        # 🔹 Check cache
-        if cache_key in self.cache:
-            log_info(f"[PlannerAgent] ⚡ Using cached workflow for: '{instruction}'")
-            return self.cache[cache_key]
-
-        # 🔹 Otherwise generate workflow
-        log_info(f"[PlannerAgent] 🧠 Creating new workflow for instruction: '{instruction}'")
+        # 🔹 Generate workflow (call_llm answers from the LLM cache when it can)
+        log_info(f"[PlannerAgent] 🧠 Planning workflow for instruction: '{instruction}'")
 
         prompt = f"""
         You are PlannerAgent. Convert this user instruction into a step-by-step agent workflow.
@@ -73,24 +86,19 @@ class PlannerAgent(BaseAgent):
         """
 
         try:
-            llm_response = call_llm(prompt)
+            # opt-in: near-duplicate instructions with the same paper count share a plan
+            llm_response = call_llm(
+                prompt,
+                near_text=instruction if self.near_duplicates else None,
+                scope=f"{CACHE_SCOPE}::{num_papers}",
+                validate=_is_json,
+            )
             workflow = json.loads(llm_response)
+            if self.near_duplicates and isinstance(workflow, dict):
+                workflow = _with_query(workflow, instruction)
             log_info("[PlannerAgent] ✅ Workflow generated via LLM.")
         except Exception as e:
             log_error(f"[PlannerAgent] ❌ Failed LLM planning, falling back. Error: {e}")
-
-            workflow = {
-                "workflow": [
-                    {"agent": "SearchAgent", "params": {"query": instruction, "max_results": num_papers}},
-                    {"agent": "PDFDownloaderAgent", "params": {}},
-                    {"agent": "SummariserAgent", "params": {}},
-                    {"agent": "WriterAgent", "params": {}}
-                ],
-                "num_papers": num_papers
-            }
-
-        # store in cache
-        self.cache[cache_key] = workflow
-        self._save_cache()
+            workflow = fallback_plan(instruction, num_papers)
 
         return workflow
@@ -1,25 +1,34 @@
+from typing import Dict, Iterator, List
 from agents.base import BaseAgent
-from .tools import search_papers
+from .tools import iter_search
 from utils.logger import log_info, log_warn, log_error
 
 
+def _queries(input: dict) -> List[str]:
+    return input.get("queries") or ([input["query"]] if input.get("query") else [])
+
+
 class SearchAgent(BaseAgent):
     """
     Agent responsible for searching research papers on arXiv.
+
+    Input: {"query": str} or {"queries": [str, ...]}, optional
+    "max_results" (per query, default 5) and "use_cache" (default True).
     """
 
+    stream_key = "papers"
+
     def run(self, input: dict) -> dict:
-        query = input.get("query")
-        if not query:
+        queries = _queries(input)
+        if not queries:
             log_error("[SearchAgent] ❌ Missing 'query' in input")
             return {"error": "Missing 'query'"}
 
         try:
-            log_info(f"[SearchAgent] 🔎 Searching arXiv for query='{query}'...")
-            papers = search_papers(query, max_results=5)
+            papers = list(self.run_stream(input))
 
             if not papers:
-                log_warn(f"[SearchAgent] ⚠️ No results found for query='{query}'")
+                log_warn(f"[SearchAgent] ⚠️ No results found for {queries}")
                 return {"papers": []}
 
             log_info(f"[SearchAgent] ✅ Retrieved {len(papers)} papers")
@@ -28,3 +37,16 @@ class SearchAgent(BaseAgent):
         except Exception as e:
             log_error(f"[SearchAgent] ❌ Error while searching arXiv: {e}")
             return {"error": str(e)}
+
+    def run_stream(self, input: dict) -> Iterator[Dict]:
+        """Yield papers as their result pages are parsed."""
+        queries = _queries(input)
+        if not queries:
+            log_error("[SearchAgent] ❌ Missing 'query' in input")
+            return
+        log_info(f"[SearchAgent] 🔎 Searching arXiv for {len(queries)} query(s): {queries}...")
+        yield from iter_search(
+            queries,
+            max_results=int(input.get("max_results", 5)),
+            use_cache=input.get("use_cache", True),
+        )
@@ -1,58 +1,403 @@
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from agents.base import BaseAgent
-from utils.logger import log_error, log_info, log_warn
-from agents.summariser_agent.tools import summarise_text, extract_text_from_pdf
-from typing import Dict, List, Any
+from utils.logger import log_debug, log_error, log_info, log_warn
+from agents.summariser_agent.tools import (
+    BATCH_DOC_TOKENS,
+    BATCH_MAX_DOCS,
+    DOC_HEADER_TOKENS,
+    MAX_WORKERS,
+    MODEL_NAME,
+    SUMMARY_TOKENS,
+    batch_budget,
+    summarise_batch,
+    summarise_text,
+)
+from utils import tracing
+from utils.artifact_store import get_store, hash_bytes, hash_file
+from utils.pdf_text import cached_full_text, join_pages, parse_pages, save_pages
+from utils.tokens import count_tokens
+from utils.vector_index import get_vector_index
+from typing import Callable, Deque, Dict, Iterable, Iterator, Any, List, Optional, Tuple
+
+# (index, pdf dict, text, content hash, summary key, future resolved with the result)
+_Item = Tuple[int, Dict[str, Any], str, str, str, Future]
+
+
+def _paper_id(pdf: Dict[str, Any], i: int) -> str:
+    """arXiv ID from the paper URL, else its title; used to label trace spans."""
+    url = pdf.get("url") or ""
+    return url.split("/abs/", 1)[1] if "/abs/" in url else pdf.get("title") or f"untitled-{i}"
+
+
+class _Batcher:
+    """
+    Collects short documents until a request's worth (by tokens or count)
+    and hands them to `submit` as one batch. After close(), every document
+    is sent as soon as it arrives, so nothing waits for a batch that will
+    never fill.
+    """
+
+    def __init__(self, submit: Callable[[List[_Item]], None], max_docs: int, budget: int):
+        self._submit = submit
+        self.max_docs = max(1, max_docs)
+        self.budget = budget
+        self._items: List[_Item] = []
+        self._tokens = 0
+        self._closed = False
+        # re-entrant: a batch that fails at once calls back in (abstract fallbacks) from submit
+        self._lock = threading.RLock()
+
+    def add(self, item: _Item, tokens: int) -> None:
+        cost = tokens + DOC_HEADER_TOKENS + SUMMARY_TOKENS
+        with self._lock:
+            if self._items and self._tokens + cost > self.budget:
+                self._flush_locked()
+            self._items.append(item)
+            self._tokens += cost
+            if self._closed or len(self._items) >= self.max_docs:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        items, self._items, self._tokens = self._items, [], 0
+        if items:
+            self._submit(items)
 
 
 class SummariserAgent(BaseAgent):
-    def __init__(self, task_id: str | None = None):
+    """
+    Summarises downloaded PDFs as a two-stage pipeline:
+    text extraction (CPU-bound) runs in a process pool and Groq calls
+    (network-bound) in a thread pool, so the stages overlap across papers.
+
+      - parse_workers: processes extracting text
+      - llm_workers:   papers being summarised at once
+      - max_workers:   concurrent section calls within one paper (map-reduce)
+      - queue_size:    papers admitted to the pipeline at once; bounds how
+                       much extracted text is held in memory
+      - batch_tokens:  documents up to this many tokens are packed several
+                       to a Groq request (0 disables batching)
+
+    Items without a readable PDF but with an abstract (the `summary` field
+    of search results) are summarised from the abstract, batched; so are
+    papers whose PDF gives no summary (no text, a parse or LLM failure).
+    """
+
+    stream_key = "summaries"
+
+    def __init__(
+        self,
+        task_id: str | None = None,
+        max_workers: int = MAX_WORKERS,
+        parse_workers: int | None = None,
+        llm_workers: int = 4,
+        queue_size: int = 8,
+        batch_tokens: int = BATCH_DOC_TOKENS,
+    ):
         super().__init__(name="SummariserAgent",task_id=task_id, tool_names=[])
+        self.max_workers = max_workers
+        self.parse_workers = parse_workers or min(4, os.cpu_count() or 1)
+        self.llm_workers = llm_workers
+        self.queue_size = max(1, queue_size)
+        self.batch_tokens = batch_tokens
+        self.store = get_store()
+        self.index = get_vector_index()
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self._parse_pool_lock = threading.Lock()
         log_info("SummariserAgent initialized.")
 
+    def _get_parse_pool(self) -> ProcessPoolExecutor:
+        """Parser processes stay warm across runs until close()."""
+        with self._parse_pool_lock:
+            if self._parse_pool is None:
+                self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+            return self._parse_pool
+
+    def close(self) -> None:
+        with self._parse_pool_lock:
+            if self._parse_pool is not None:
+                self._parse_pool.shutdown(wait=True, cancel_futures=True)
+                self._parse_pool = None
+
     def run(self, input: Dict[str, Any]) -> Dict[str, Any]:
-        pdfs: List[Dict[str, Any]] = input.get("pdfs", [])
-        if not pdfs:
-            log_warn("No PDFs found in input.")
-            return {"summaries": []}
+        summaries = list(self.run_stream(input))
+        log_info(f"✅ Generated summaries for {len(summaries)} PDFs.")
+        return {"summaries": summaries}
 
-        log_info(f"Summarising {len(pdfs)} PDFs...")
-        summaries = []
+    def run_stream(self, input: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield each summarised pdf dict in input order, as soon as it and every
+        paper before it are done. `pdfs` may be a lazy iterator; at most
+        `queue_size` papers are pulled ahead of the consumer.
+        """
+        pdfs: Iterable[Dict[str, Any]] = input.get("pdfs") or []
+        log_info("Summarising PDFs...")
+        slots = threading.BoundedSemaphore(self.queue_size)
+        pending: Deque[Future] = deque()
 
-        for i, pdf in enumerate(pdfs, start=1):
-            title = pdf.get("title", f"untitled-{i}")
-            file_path = pdf.get("file_path")
+        parse_pool = self._get_parse_pool()
+        with ThreadPoolExecutor(max_workers=self.llm_workers, thread_name_prefix="summarise") as llm_pool:
+            # batches can hold slots, so they never wait for more than queue_size papers
+            batcher = _Batcher(
+                lambda items: self._submit_batch(items, llm_pool, slots, batcher),
+                max_docs=min(BATCH_MAX_DOCS, self.queue_size),
+                budget=batch_budget(),
+            )
 
-            if not file_path or not os.path.exists(file_path):
-                log_warn(f"[{i}] Invalid or missing file path for: {title}")
-                continue
+            for i, pdf in enumerate(pdfs, start=1):
+                # hand finished papers downstream before admitting more
+                while pending and pending[0].done():
+                    result = pending.popleft().result()
+                    if result is not None:
+                        yield result
 
-            try:
-                text = extract_text_from_pdf(file_path)
-                if not text:
-                    log_warn(f"[{i}] No text extracted from: {title}")
+                title = pdf.get("title", f"untitled-{i}")
+                file_path = pdf.get("file_path")
+
+                has_file = bool(file_path) and os.path.exists(file_path)
+                abstract = pdf.get("summary")
+                if not has_file and not (abstract and self.batch_tokens):
+                    log_warn(f"[{i}] Invalid or missing file path for: {title}")
                     continue
 
-                log_info(f"[{i}] Summarising: {title}")
-                summary = summarise_text(text)
-                if not summary:
-                    log_warn(f"[{i}] Empty summary for: {title}")
+                done: Future = Future()
+                pending.append(done)
+                if not has_file:
+                    self._admit(slots, batcher)
+                    self._summarise_short(i, pdf, abstract, hash_bytes(abstract.encode("utf-8")), slots, batcher, done)
                     continue
-                summary_path = os.path.splitext(file_path)[0] + ".summary.txt"
 
                 try:
-                    with open(summary_path, "w", encoding="utf-8") as f:
-                        f.write(summary)
-                    log_info(f"[{i}] ✅ Summary saved to: {summary_path}")
-                except Exception as file_error:
-                    log_warn(f"[{i}] ⚠️ Could not save summary: {file_error}")
-                pdf["summary"] = summary
-                pdf["summary_path"] = summary_path
-                summaries.append(pdf)
-                log_info(f"[{i}] ✅ Summarised: {title}")
+                    # Artifacts are keyed by the PDF's content hash; the summary is
+                    # also tied to the model that produced it.
+                    pdf_hash = hash_file(file_path)
+                    summary_key = hash_bytes(f"{pdf_hash}:{MODEL_NAME}".encode())
 
+                    cached = self.store.get("summary", pdf_hash, input_hash=summary_key)
+                    if cached:
+                        with open(cached["path"], "r", encoding="utf-8") as f:
+                            pdf["summary"] = f.read()
+                        pdf["summary_path"] = cached["path"]
+                        self._index(pdf, pdf_hash, pdf["summary"])
+                        done.set_result(pdf)
+                        log_info("[%d] ⚡ Using stored summary for: %s", i, title)
+                        continue
+
+                    text = cached_full_text(self.store, pdf_hash)
+                except Exception as e:
+                    log_error(f"[{i}] ❌ Failed to summarise '{title}': {e}")
+                    self._admit(slots, batcher)
+                    self._fall_back(i, pdf, slots, batcher, done)
+                    continue
+
+                # blocks while `queue_size` papers are already in flight
+                self._admit(slots, batcher)
+                if text is None:
+                    parsed = parse_pool.submit(parse_pages, file_path)
+                else:
+                    parsed = Future()
+                    parsed.set_result(text)
+
+                # the callback runs on a pool thread: carry the trace context over
+                parsed.add_done_callback(tracing.propagate(
+                    lambda f, i=i, pdf=pdf, pdf_hash=pdf_hash, summary_key=summary_key,
+                    from_store=text is not None, done=done, started=time.time():
+                    self._on_parsed(f, i, pdf, pdf_hash, summary_key, from_store, llm_pool, slots, batcher, done, started)
+                ))
+
+            batcher.close()
+            while pending:
+                result = pending.popleft().result()
+                if result is not None:
+                    yield result
+
+    def _on_parsed(
+        self,
+        parsed: Future,
+        i: int,
+        pdf: Dict[str, Any],
+        pdf_hash: str,
+        summary_key: str,
+        from_store: bool,
+        llm_pool: ThreadPoolExecutor,
+        slots: threading.BoundedSemaphore,
+        batcher: _Batcher,
+        done: Future,
+        started: float,
+    ) -> None:
+        """Stage 1 -> stage 2 hand-off; every path releases the slot and resolves `done`."""
+        title = pdf.get("title", f"untitled-{i}")
+
+        def _finish(summarised: Future) -> None:
+            result = None
+            try:
+                result = summarised.result()
             except Exception as e:
                 log_error(f"[{i}] ❌ Failed to summarise '{title}': {e}")
+            if result is None:
+                self._fall_back(i, pdf, slots, batcher, done)
+                return
+            slots.release()
+            done.set_result(result)
 
-        log_info(f"✅ Generated summaries for {len(summaries)} / {len(pdfs)} PDFs.")
-        return {"summaries": summaries}
+        try:
+            if from_store:
+                text = parsed.result()
+            else:
+                pages, page_count = parsed.result()
+                # parsed in a worker process, so the span is timed from here (queueing included)
+                tracing.get_tracer().record(
+                    "parse_pages", "parse", started, time.time() - started, item=_paper_id(pdf, i), pages=page_count
+                )
+                save_pages(self.store, pdf_hash, pages, page_count, producer="SummariserAgent")
+                text = join_pages(pages)
+            if not text:
+                log_warn(f"[{i}] No text extracted from: {title}")
+                self._fall_back(i, pdf, slots, batcher, done)
+                return
+            if self.batch_tokens:
+                tokens = count_tokens(text)
+                if tokens <= self.batch_tokens:
+                    batcher.add((i, pdf, text, pdf_hash, summary_key, done), tokens)
+                    return
+            tracing.submit(llm_pool, self._summarise_one, i, pdf, text, pdf_hash, summary_key).add_done_callback(_finish)
+        except Exception as e:
+            log_error(f"[{i}] ❌ Failed to summarise '{title}': {e}")
+            self._fall_back(i, pdf, slots, batcher, done)
+
+    def _fall_back(
+        self, i: int, pdf: Dict[str, Any], slots: threading.BoundedSemaphore, batcher: _Batcher, done: Future
+    ) -> None:
+        """
+        A paper whose PDF gave no summary: summarise its abstract instead if it
+        has one, else drop it. Called holding the paper's slot.
+        """
+        abstract = pdf.get("summary")
+        if abstract and self.batch_tokens and pdf.get("summary_source") != "abstract":
+            log_info("[%d] ↪️ Using the abstract for: %s", i, pdf.get("title", f"untitled-{i}"))
+            self._summarise_short(i, pdf, abstract, hash_bytes(abstract.encode("utf-8")), slots, batcher, done)
+            return
+        slots.release()
+        done.set_result(None)
+
+    @staticmethod
+    def _admit(slots: threading.BoundedSemaphore, batcher: _Batcher) -> None:
+        if not slots.acquire(blocking=False):
+            # about to wait for a slot: don't let a half-full batch hold them
+            batcher.flush()
+            slots.acquire()
+
+    def _summarise_short(
+        self,
+        i: int,
+        pdf: Dict[str, Any],
+        text: str,
+        text_hash: str,
+        slots: threading.BoundedSemaphore,
+        batcher: _Batcher,
+        done: Future,
+    ) -> None:
+        """Abstract-only items: stored summary if any, else into the batch. Holds one slot."""
+        summary_key = hash_bytes(f"{text_hash}:{MODEL_NAME}".encode())
+        try:
+            cached = self.store.get("summary", text_hash, input_hash=summary_key)
+            if cached:
+                with open(cached["path"], "r", encoding="utf-8") as f:
+                    pdf["summary"] = f.read()
+                pdf["summary_path"] = cached["path"]
+                pdf["summary_source"] = "abstract"
+                self._index(pdf, text_hash, pdf["summary"])
+                log_info("[%d] ⚡ Using stored summary for: %s", i, pdf.get("title"))
+                slots.release()
+                done.set_result(pdf)
+                return
+        except Exception as e:
+            log_warn(f"[{i}] ⚠️ Could not read stored summary: {e}")
+        pdf["summary_source"] = "abstract"
+        batcher.add((i, pdf, text, text_hash, summary_key, done), count_tokens(text))
+
+    def _submit_batch(
+        self, items: List[_Item], llm_pool: ThreadPoolExecutor, slots: threading.BoundedSemaphore, batcher: _Batcher
+    ) -> None:
+        def _finish(summarised: Future) -> None:
+            try:
+                results = summarised.result()
+            except Exception as e:
+                log_error(f"❌ Batched summaries failed: {e}")
+                results = [None] * len(items)
+            for (i, pdf, _, _, _, done), result in zip(items, results):
+                if result is None:
+                    self._fall_back(i, pdf, slots, batcher, done)
+                    continue
+                slots.release()
+                done.set_result(result)
+
+        tracing.submit(llm_pool, self._summarise_many, items).add_done_callback(_finish)
+
+    def _summarise_many(self, items: List[_Item]) -> List[Optional[Dict[str, Any]]]:
+        log_info(f"Summarising {len(items)} short documents in one batch...")
+        summaries = summarise_batch([text for _, _, text, _, _, _ in items], max_docs=len(items))
+        return [
+            self._keep_summary(i, pdf, summary, pdf_hash, summary_key, None if pdf.get("summary_source") else text)
+            for (i, pdf, text, pdf_hash, summary_key, _), summary in zip(items, summaries)
+        ]
+
+    def _summarise_one(
+        self, i: int, pdf: Dict[str, Any], text: str, pdf_hash: str, summary_key: str
+    ) -> Optional[Dict[str, Any]]:
+        title = pdf.get("title", f"untitled-{i}")
+        log_debug("[%d] Summarising: %s", i, title)
+        with tracing.context(item=_paper_id(pdf, i)):
+            summary = summarise_text(text, max_workers=self.max_workers)
+        return self._keep_summary(i, pdf, summary, pdf_hash, summary_key, text)
+
+    def _keep_summary(
+        self, i: int, pdf: Dict[str, Any], summary: str, pdf_hash: str, summary_key: str, text: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Store, index and attach a fresh summary; None if it came back empty."""
+        title = pdf.get("title", f"untitled-{i}")
+        if not summary:
+            log_warn(f"[{i}] Empty summary for: {title}")
+            return None
+
+        summary_path = None
+        try:
+            meta = self.store.put_text(
+                "summary", pdf_hash, summary, producer="SummariserAgent", input_hash=summary_key
+            )
+            summary_path = meta["path"]
+            log_debug("[%d] ✅ Summary saved to: %s", i, summary_path)
+        except Exception as file_error:
+            log_warn(f"[{i}] ⚠️ Could not save summary: {file_error}")
+        pdf["summary"] = summary
+        pdf["summary_path"] = summary_path
+        self._index(pdf, pdf_hash, summary, text)
+        log_info("[%d] ✅ Summarised: %s", i, title)
+        return pdf
+
+    def _index(self, pdf: Dict[str, Any], pdf_hash: str, summary: str, text: Optional[str] = None) -> None:
+        """Add the summary (and full text, when at hand) to the local vector index."""
+        url = pdf.get("url") or ""
+        meta = {
+            "arxiv_id": url.split("/abs/", 1)[1] if "/abs/" in url else None,
+            "title": pdf.get("title"),
+            "url": url or None,
+        }
+        try:
+            self.index.add(f"summary:{pdf_hash}", summary, kind="summary", ref=pdf_hash, **meta)
+            if text:
+                self.index.add_text(pdf_hash, text, **meta)
+        except Exception as e:
+            log_warn(f"⚠️ Could not index '{pdf.get('title')}': {e}")
@@ -1,57 +1,243 @@
+import json
 import os
-import textwrap
-from groq import Groq
-from PyPDF2 import PdfReader
-from utils.logger import log_info, log_error
-from config.config import GROQ_API_KEY
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from utils import tracing
+from utils.llm import chat
+from utils.logger import log_info, log_error, log_warn
+from utils.pdf_text import join_pages, parse_pages
+from utils.tokens import SAFETY_MARGIN, context_window, count_tokens, output_budget, pack, truncate_to_tokens
 
+MODEL_NAME = "llama3-70b-8192"  
 
-if not GROQ_API_KEY:
-    raise EnvironmentError("❌ GROQ_API_KEY not found in .env")
+SYSTEM_PROMPT = "You are a helpful assistant that summarizes academic PDFs."
+CHUNK_TOKENS = 3000          # per-section budget for the map step
+MAX_WORKERS = 4              # concurrent Groq calls per paper
 
-# Setup Groq client
-client = Groq(
-    api_key=GROQ_API_KEY,
+BATCH_DOC_TOKENS = 1500      # documents up to this size may share a request
+BATCH_MAX_DOCS = 8           # documents per batched request
+SUMMARY_TOKENS = 300         # expected output per document in a batch
+DOC_HEADER_TOKENS = 8        # "[Paper n]" separator per document
+BATCH_PROMPT = (
+    "Summarize each of the {n} scientific papers below in 5–7 bullet points. "
+    "Reply with only a JSON object mapping each paper number to its summary, "
+    'e.g. {{"1": "- point\\n- point", "2": "..."}}.\n\n'
 )
 
-MODEL_NAME = "llama3-70b-8192"  
+
+def _hard_split(para: str, chunk_tokens: int) -> List[str]:
+    """Cut a paragraph larger than a whole chunk into chunk-sized pieces."""
+    pieces = []
+    rest = para
+    while rest:
+        head = truncate_to_tokens(rest, chunk_tokens) or rest[:chunk_tokens]
+        pieces.append(head)
+        rest = rest[len(head):].lstrip()
+    return pieces or [""]
+
+
+def split_into_chunks(text: str, chunk_tokens: int = CHUNK_TOKENS) -> List[str]:
+    """
+    Split text into sections of at most ~`chunk_tokens` tokens,
+    breaking on paragraph boundaries where possible.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    for para in text.split("\n\n"):
+        tokens = count_tokens(para)
+        pieces = _hard_split(para, chunk_tokens) if tokens > chunk_tokens else [para]
+        for piece in pieces:
+            piece_tokens = tokens if len(pieces) == 1 else count_tokens(piece)
+            if current and size + piece_tokens > chunk_tokens:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += piece_tokens + 1
+
+    if current:
+        chunks.append("\n\n".join(current))
+    return [c for c in chunks if c.strip()]
+
+
+def _complete(prompt: str, max_tokens: Optional[int] = None, validate=None) -> str:
+    # goes through the shared LLM cache: a re-run costs no tokens
+    if max_tokens is None:
+        max_tokens = output_budget(count_tokens(prompt), MODEL_NAME)
+    return chat(
+        [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        model=MODEL_NAME,
+        temperature=0.4,
+        max_tokens=max_tokens,
+        validate=validate,
+    )
+
+
+def _summarise_section(index: int, total: int, section: str) -> str:
+    prompt = (
+        f"This is section {index} of {total} of a scientific paper. "
+        f"Summarize its key points in 3–5 bullet points:\n\n{section}"
+    )
+    try:
+        budget = output_budget(count_tokens(prompt), MODEL_NAME, ratio=0.1, floor=96, ceiling=384)
+        return _complete(prompt, max_tokens=budget)
+    except Exception as e:
+        log_error(f"[Summariser] ❌ Section {index}/{total} failed: {e}")
+        return ""
+
+
+def _merge_summaries(partials: List[str], chunk_tokens: int, max_workers: int) -> str:
+    """Reduce step: merge partial summaries, in rounds if they don't fit in one prompt."""
+    joined = "\n\n".join(partials)
+    if count_tokens(joined) > chunk_tokens and len(partials) > 1:
+        groups = split_into_chunks(joined, chunk_tokens)
+        if len(groups) < len(partials):
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                merged = list(executor.map(
+                    tracing.propagate(lambda i_g: _summarise_section(i_g[0], len(groups), i_g[1])),
+                    enumerate(groups, start=1),
+                ))
+            merged = [m for m in merged if m]
+            if not merged:
+                return ""
+            return _merge_summaries(merged, chunk_tokens, max_workers)
+
+    prompt = (
+        "Below are bullet-point summaries of consecutive sections of one scientific paper. "
+        f"Merge them into a single summary of the whole paper in 5–7 bullet points:\n\n{joined}"
+    )
+    return _complete(prompt)
+
 
 # Summarise text using Groq LLM
-def summarise_text(text: str) -> str:
+def summarise_text(
+    text: str,
+    chunk_tokens: int = CHUNK_TOKENS,
+    max_workers: int = MAX_WORKERS,
+) -> str:
+    """
+    Summarise a paper. Short texts take a single Groq call; longer ones are
+    split into token-bounded sections that are summarised concurrently
+    (at most `max_workers` calls in flight) and then merged, so the whole
+    document is covered.
+    """
     if not text.strip():
         log_error("Invalid input: Empty text")
         return ""
 
-    prompt = f"""Summarize the following scientific paper in 5–7 bullet points:\n\n{textwrap.shorten(text, width=12000, placeholder="...")}"""
+    sections = split_into_chunks(text, chunk_tokens)
 
     try:
-        log_info("[Summariser] Requesting summary from Groq...")
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that summarizes academic PDFs."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.4,
-            max_tokens=512,
-        )
-        summary = response.choices[0].message.content
+        if len(sections) <= 1:
+            log_info("[Summariser] Requesting summary from Groq...")
+            summary = _complete(f"Summarize the following scientific paper in 5–7 bullet points:\n\n{text.strip()}")
+            log_info("[Summariser] Received summary from Groq.")
+            return summary
+
+        log_info(f"[Summariser] Map-reduce over {len(sections)} sections (max_workers={max_workers})...")
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            partials = list(executor.map(
+                tracing.propagate(lambda i_s: _summarise_section(i_s[0], len(sections), i_s[1])),
+                enumerate(sections, start=1),
+            ))
+        partials = [p for p in partials if p]
+        if not partials:
+            log_error("[Summariser] ❌ All section summaries failed")
+            return ""
+
+        summary = _merge_summaries(partials, chunk_tokens, max_workers)
         log_info("[Summariser] Received summary from Groq.")
-        return summary.strip() if summary else ""
+        return summary
     except Exception as e:
         log_error(f"[Summariser] ❌ Groq request failed: {e}")
         return ""
 
-# Extract raw text from PDF
+
+def parse_batch_response(response: str, n: int) -> Dict[int, str]:
+    """
+    Per-paper summaries from a batched reply: {paper number: summary}.
+    Papers missing from the reply (or a reply that is not JSON) are left out.
+    """
+    match = re.search(r"\{.*\}", response or "", re.DOTALL)
+    if not match:
+        return {}
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    summaries: Dict[int, str] = {}
+    for key, value in data.items():
+        digits = re.sub(r"\D", "", str(key))
+        if not digits or not 1 <= int(digits) <= n:
+            continue
+        if isinstance(value, list):
+            value = "\n".join(str(v) if str(v).lstrip().startswith("-") else f"- {v}" for v in value)
+        if isinstance(value, str) and value.strip():
+            summaries[int(digits)] = value.strip()
+    return summaries
+
+
+def _summarise_group(texts: List[str]) -> Dict[int, str]:
+    n = len(texts)
+    prompt = BATCH_PROMPT.format(n=n) + "\n\n".join(
+        f"[Paper {j}]\n{text.strip()}" for j, text in enumerate(texts, start=1)
+    )
+    room = context_window(MODEL_NAME) - count_tokens(prompt) - SAFETY_MARGIN
+    return parse_batch_response(
+        _complete(
+            prompt,
+            max_tokens=max(1, min(n * SUMMARY_TOKENS, room)),
+            validate=lambda reply: len(parse_batch_response(reply, n)) == n,
+        ),
+        n,
+    )
+
+
+def batch_budget() -> int:
+    """Tokens a batched request may spend on documents and their summaries."""
+    return context_window(MODEL_NAME) - SAFETY_MARGIN - count_tokens(BATCH_PROMPT)
+
+
+def summarise_batch(texts: List[str], max_docs: int = BATCH_MAX_DOCS) -> List[str]:
+    """
+    Summarise many short documents (abstracts, short papers) with as few
+    Groq calls as possible: documents are packed, in order, into requests
+    that fit the model's context window (input plus SUMMARY_TOKENS of
+    output per document) and the JSON reply is split back out per document.
+    Documents the reply misses are summarised on their own. Returns one
+    summary per text ("" on failure).
+    """
+    summaries = [""] * len(texts)
+    counts = [count_tokens(t) for t in texts]
+    groups = pack(counts, batch_budget(), DOC_HEADER_TOKENS, SUMMARY_TOKENS, max_items=max_docs)
+    log_info(f"[Summariser] Packing {len(texts)} documents into {len(groups)} requests...")
+
+    for group in groups:
+        parsed: Dict[int, str] = {}
+        if len(group) > 1:
+            try:
+                parsed = _summarise_group([texts[i] for i in group])
+            except Exception as e:
+                log_error(f"[Summariser] ❌ Batched request failed: {e}")
+            if len(parsed) < len(group):
+                log_warn(f"[Summariser] ⚠️ Batched reply covered {len(parsed)}/{len(group)} documents")
+        for j, i in enumerate(group, start=1):
+            summaries[i] = parsed.get(j) or summarise_text(texts[i])
+    return summaries
+
+# Extract raw text from PDF (no caching; safe to run in a worker process)
 def extract_text_from_pdf(pdf_path: str) -> str:
     try:
-        reader = PdfReader(pdf_path)
-        text = ""
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text
-        return text.strip()
+        pages, _ = parse_pages(pdf_path)
+        return join_pages(pages)
     except Exception as e:
         log_error(f"[ExtractText] ❌ PDF read failed: {e}")
         return ""
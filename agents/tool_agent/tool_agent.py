@@ -1,5 +1,6 @@
 from typing import Dict , Any , Optional
 from agents.base import BaseAgent
+from tools.load_tools import DEFAULT_TOOLS
 from utils.logger import log_error, log_info
 
 class ToolAgent(BaseAgent):
@@ -11,7 +12,11 @@ class ToolAgent(BaseAgent):
     """
 
     def __init__(self, name: Optional[str] = None, task_id: Optional[str] = None, tool_names=None):
-        super().__init__(name=name or "ToolAgent", task_id=task_id, tool_names=tool_names)
+        super().__init__(
+            name=name or "ToolAgent",
+            task_id=task_id,
+            tool_names=DEFAULT_TOOLS if tool_names is None else tool_names,
+        )
 
     def run(self, input: Dict[str, Any]) -> Dict[str, Any]:
         """
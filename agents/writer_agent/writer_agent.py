@@ -1,10 +1,19 @@
 import os
+import re
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List
 from agents.base import BaseAgent
 from utils.logger import log_error, log_info, log_warn
 
+
+def _safe(name: str) -> str:
+    """A job-supplied report name as one plain file name (no separators or leading dots)."""
+    return re.sub(r"[^\w\-.]", "_", name).lstrip(".")
+
+
 class WriterAgent(BaseAgent):
+    stream_key = "sections"
+
     def __init__(self, task_id: str | None = None):
         super().__init__(name="WriterAgent" , task_id=task_id, tool_names=[])
         self.output_dir = "data/reports"
@@ -12,12 +21,12 @@ class WriterAgent(BaseAgent):
         log_info("WriterAgent initialized.")
 
     def run(self, input: Dict[str, Any]) -> Dict[str, Any]:
-        summaries: List[Dict[str, Any]] = input.get("summaries", [])
-        if not summaries:
+        sections = list(self.run_stream(input))
+        if not sections:
             log_warn("[Writer] No summaries found in input.")
             return {"report": "", "report_path": None}
 
-        log_info(f"[Writer] Generating report for {len(summaries)} summaries...")
+        log_info(f"[Writer] Generating report for {len(sections)} summaries...")
 
         date_str = datetime.now().strftime("%Y-%m-%d")
         report_lines: List[str] = []
@@ -25,34 +34,21 @@ class WriterAgent(BaseAgent):
         # Header
         report_lines.append("📘 Multi-Paper Summary Report")
         report_lines.append(f"Date: {date_str}")
-        report_lines.append(f"Number of Papers: {len(summaries)}")
+        report_lines.append(f"Number of Papers: {len(sections)}")
         report_lines.append("\n" + "─" * 40 + "\n")
-
-        for idx, paper in enumerate(summaries, start=1):
-            title = paper.get("title", f"Paper #{idx}")
-            url = paper.get("url", "URL not available")
-            summary = paper.get("summary")
-
-            if not summary:
-                log_warn(f"[Writer] Skipping '{title}' — summary missing.")
-                continue
-
-            report_lines.append(f"{idx}. 📝 Title: {title}")
-            report_lines.append(f"🔗 URL: {url}\n")
-            report_lines.append("Summary:\n")
-            report_lines.append(summary.strip())
-            report_lines.append("\n" + "─" * 40 + "\n")
+        report_lines.extend(sections)
 
         final_report = "\n".join(report_lines)
 
-        # Save report
-        report_path = os.path.join(self.output_dir, f"{date_str}_report.txt")
-        
+        # Save report ("report_name" keeps concurrent jobs from sharing a file)
+        report_name = _safe(str(input.get("report_name") or "")) or f"{date_str}_report"
+        report_path = os.path.join(self.output_dir, f"{report_name}.txt")
+
         try:
             with open(report_path, "w", encoding="utf-8") as f:
                 f.write(final_report)
             log_info(f"[Writer] ✅ Report saved to: {report_path}")
-        
+
         except Exception as e:
             log_error(f"[Writer] ❌ Failed to save report — {e}")
             report_path = None
@@ -61,3 +57,30 @@ class WriterAgent(BaseAgent):
             "report": final_report,
             "report_path": report_path
         }
+
+    def run_stream(self, input: Dict[str, Any]) -> Iterator[str]:
+        """
+        Render one report section per summary as it arrives.
+        `summaries` may be a lazy iterator from SummariserAgent.run_stream;
+        only the rendered text is kept, not the upstream paper dicts.
+        """
+        idx = 0
+        for paper in input.get("summaries") or []:
+            title = paper.get("title", f"Paper #{idx + 1}")
+            url = paper.get("url", "URL not available")
+            summary = paper.get("summary")
+
+            if not summary:
+                log_warn(f"[Writer] Skipping '{title}' — summary missing.")
+                continue
+
+            idx += 1
+            section_lines = [
+                f"{idx}. 📝 Title: {title}",
+                f"🔗 URL: {url}\n",
+                "Summary:\n",
+                summary.strip(),
+                "\n" + "─" * 40 + "\n",
+            ]
+            log_info(f"[Writer] ✍️ Added section {idx}: {title}")
+            yield "\n".join(section_lines)
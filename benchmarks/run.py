@@ -0,0 +1,301 @@
+# benchmarks/run.py
+"""
+AgentFlow benchmark suite, run against local stand-ins (benchmarks.standins).
+
+    python -m benchmarks.run                        # everything, 3 repeats
+    python -m benchmarks.run --only summariser main --papers 10 --llm-latency 0.2
+
+Every repeat runs in a fresh subprocess and an empty working directory, so
+caches start cold and no process-wide singleton carries over. Only the
+timed part of each benchmark is measured (setup such as writing PDFs is
+not). Results go to data/benchmarks/<timestamp>_<commit>.json and are
+compared with the previous results file; `--fail-over PCT` exits non-zero
+when a benchmark's median got more than PCT percent slower.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.standins import Corpus, FakeArxiv, FakeGroq, point_at
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = "data/benchmarks"
+DAG_CONFIG = os.path.join(REPO_ROOT, "config", "example_dag_workflow.yaml")
+
+DEFAULTS = {"papers": 6, "pages": 3, "corpus": 50, "llm_latency": 0.05, "arxiv_latency": 0.0, "memory_ops": 500}
+
+
+# ---- benchmarks --------------------------------------------------------------
+# Each takes the run parameters, does its (untimed) setup and returns the timed
+# callable; the callable returns the number of items it processed.
+
+def bench_search(p: Dict[str, Any]) -> Callable[[], int]:
+    from utils.arxiv import search_many
+
+    # politeness delays off: this measures paging, parsing and dedup
+    return lambda: len(search_many(["graphs", "transformers"], max_results=p["corpus"], page_size=20,
+                                   min_interval=0, max_per_host=4, use_cache=False))
+
+
+def bench_download(p: Dict[str, Any]) -> Callable[[], int]:
+    from agents.pdf_downloader_agent.tools import download_pdfs
+
+    urls = [f"https://arxiv.org/abs/2501.{i:05d}v1" for i in range(p["papers"])]
+
+    def _run() -> int:
+        outcomes = download_pdfs(urls, "papers", max_workers=4)
+        return sum(o["file_path"] is not None for o in outcomes)
+
+    return _run
+
+
+def bench_pdf_parser(p: Dict[str, Any], corpus: Corpus) -> Callable[[], int]:
+    from tools.pdf_parser import PDFParserTool
+
+    paths = [item["file_path"] for item in corpus.write_pdfs("papers", p["papers"])]
+    tool = PDFParserTool()
+    return lambda: tool.run({"pdf_paths": paths})["succeeded"]
+
+
+def bench_memory(p: Dict[str, Any]) -> Callable[[], int]:
+    from tools.memory import MemoryTool
+
+    tool = MemoryTool(db_path="memory/bench.sqlite3")
+    n = p["memory_ops"]
+
+    def _run() -> int:
+        for i in range(n):
+            tool.run({"action": "write", "paper_id": f"p{i % 50}", "key": f"k{i}", "data": {"i": i}})
+        for i in range(n):
+            tool.run({"action": "read", "paper_id": f"p{i % 50}", "key": f"k{i}"})
+        items = [{"paper_id": f"q{i % 50}", "key": f"k{i}", "data": i} for i in range(n)]
+        tool.run({"action": "write_many", "items": items})
+        tool.run({"action": "read_many", "items": items})
+        return 4 * n
+
+    return _run
+
+
+def bench_summariser(p: Dict[str, Any], corpus: Corpus) -> Callable[[], int]:
+    from agents.summariser_agent.summariser_agent import SummariserAgent
+
+    pdfs = corpus.write_pdfs("papers", p["papers"])
+    agent = SummariserAgent(task_id="bench")
+
+    def _run() -> int:
+        try:
+            return len(agent.run({"pdfs": pdfs})["summaries"])
+        finally:
+            agent.close()
+
+    return _run
+
+
+def bench_run_workflow(p: Dict[str, Any]) -> Callable[[], int]:
+    import yaml
+
+    from workflow_runner import run_workflow
+    from workflow_executor import get_agent_pool
+
+    with open(DAG_CONFIG, "r") as f:
+        config = yaml.safe_load(f)
+    for step in config["workflow"]:
+        if step["agent"] == "SearchAgent":
+            step.setdefault("params", {})["max_results"] = p["papers"]
+
+    def _run() -> int:
+        try:
+            results = run_workflow(config, task_id="bench")
+        finally:
+            get_agent_pool().close()
+        return sum(len(out.get("summaries") or []) for out in results.values() if isinstance(out, dict))
+
+    return _run
+
+
+def bench_main(p: Dict[str, Any]) -> Callable[[], int]:
+    import main
+
+    def _run() -> int:
+        main.main("graph neural networks")
+        return len(glob.glob("data/reports/*.txt"))
+
+    return _run
+
+
+BENCHMARKS: Dict[str, Callable[..., Callable[[], int]]] = {
+    "search": bench_search,
+    "download": bench_download,
+    "pdf_parser": bench_pdf_parser,
+    "memory": bench_memory,
+    "summariser": bench_summariser,
+    "run_workflow": bench_run_workflow,
+    "main": bench_main,
+}
+NEEDS_CORPUS = {"pdf_parser", "summariser"}
+
+
+# ---- child process -----------------------------------------------------------
+
+def run_child(name: str, params: Dict[str, Any], arxiv_url: str, groq_url: str, out_path: str) -> None:
+    """One timed repeat, in the current (fresh) working directory."""
+    with point_at(arxiv_url, groq_url):
+        if name in NEEDS_CORPUS:
+            corpus = Corpus(params["corpus"], params["pages"])
+            timed = BENCHMARKS[name](params, corpus)
+        else:
+            timed = BENCHMARKS[name](params)
+        started = time.perf_counter()
+        items = timed()
+        seconds = time.perf_counter() - started
+    with open(out_path, "w") as f:
+        json.dump({"seconds": seconds, "items": items}, f)
+
+
+def _run_repeat(
+    name: str, params: Dict[str, Any], arxiv: FakeArxiv, groq: FakeGroq, verbose: bool
+) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix=f"agentflow-bench-{name}-") as workdir:
+        out_path = os.path.join(workdir, "result.json")
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")]))}
+        before = dict(arxiv.counts), dict(groq.counts)
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--child", name, "--params", json.dumps(params),
+             "--arxiv-url", arxiv.url, "--groq-url", groq.url, "--result", out_path],
+            cwd=workdir, env=env, check=True,
+            stdout=None if verbose else subprocess.DEVNULL, stderr=None if verbose else subprocess.DEVNULL,
+        )
+        with open(out_path) as f:
+            result = json.load(f)
+    requests = {kind: count - before[0].get(kind, 0) for kind, count in arxiv.counts.items()}
+    requests.update({kind: count - before[1].get(kind, 0) for kind, count in groq.counts.items()})
+    result["requests"] = {kind: count for kind, count in requests.items() if count}
+    return result
+
+
+def run_benchmarks(
+    names: List[str], params: Dict[str, Any], repeat: int = 3, verbose: bool = False
+) -> Dict[str, Any]:
+    """Run each named benchmark `repeat` times against fresh stand-ins; returns the results document."""
+    corpus = Corpus(params["corpus"], params["pages"])
+    benchmarks: Dict[str, Any] = {}
+    with FakeArxiv(corpus, latency=params["arxiv_latency"]) as arxiv, FakeGroq(params["llm_latency"]) as groq:
+        for name in names:
+            runs = [_run_repeat(name, params, arxiv, groq, verbose) for _ in range(repeat)]
+            seconds = [r["seconds"] for r in runs]
+            median = statistics.median(seconds)
+            benchmarks[name] = {
+                "median_s": round(median, 4),
+                "min_s": round(min(seconds), 4),
+                "runs_s": [round(s, 4) for s in seconds],
+                "items": runs[-1]["items"],
+                "items_per_s": round(runs[-1]["items"] / median, 2) if median else None,
+                "requests": runs[-1]["requests"],
+            }
+            print(f"{name:<14} median {median:8.3f}s  items {runs[-1]['items']:>5}  requests {runs[-1]['requests']}")
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "params": params,
+        "repeat": repeat,
+        "benchmarks": benchmarks,
+    }
+
+
+# ---- results -----------------------------------------------------------------
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(doc: Dict[str, Any], results_dir: str = RESULTS_DIR) -> str:
+    os.makedirs(results_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(results_dir, f"{stamp}_{doc.get('commit') or 'nocommit'}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    return path
+
+
+def latest_results(results_dir: str = RESULTS_DIR) -> Optional[str]:
+    paths = sorted(glob.glob(os.path.join(results_dir, "*.json")))
+    return paths[-1] if paths else None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, float]:
+    """Percent change of each shared benchmark's median (positive = slower)."""
+    if current.get("params") != baseline.get("params"):
+        print("⚠️ Baseline used different parameters; deltas are not like for like")
+    deltas = {}
+    for name, result in current["benchmarks"].items():
+        old = baseline.get("benchmarks", {}).get(name)
+        if old and old.get("median_s"):
+            deltas[name] = round(100.0 * (result["median_s"] - old["median_s"]) / old["median_s"], 1)
+    return deltas
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark AgentFlow against local stand-ins")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--papers", type=int, default=DEFAULTS["papers"], help="Papers per pipeline run")
+    parser.add_argument("--pages", type=int, default=DEFAULTS["pages"], help="Pages per synthetic PDF")
+    parser.add_argument("--corpus", type=int, default=DEFAULTS["corpus"], help="Papers the fake arXiv knows")
+    parser.add_argument("--llm-latency", type=float, default=DEFAULTS["llm_latency"], help="Seconds per fake Groq call")
+    parser.add_argument("--arxiv-latency", type=float, default=DEFAULTS["arxiv_latency"])
+    parser.add_argument("--memory-ops", type=int, default=DEFAULTS["memory_ops"])
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--baseline", help="Results file to compare with (default: the latest in --results-dir)")
+    parser.add_argument("--fail-over", type=float, help="Exit 1 if any median is this many percent slower")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show the benchmarked code's logs")
+    # internal: one timed repeat in a subprocess
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--params", help=argparse.SUPPRESS)
+    parser.add_argument("--arxiv-url", help=argparse.SUPPRESS)
+    parser.add_argument("--groq-url", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child, json.loads(args.params), args.arxiv_url, args.groq_url, args.result)
+        return 0
+
+    params = {
+        "papers": args.papers, "pages": args.pages, "corpus": args.corpus, "llm_latency": args.llm_latency,
+        "arxiv_latency": args.arxiv_latency, "memory_ops": args.memory_ops,
+    }
+    baseline_path = args.baseline or latest_results(args.results_dir)
+    doc = run_benchmarks(args.only or list(BENCHMARKS), params, repeat=max(1, args.repeat), verbose=args.verbose)
+    path = save_results(doc, args.results_dir)
+    print(f"📄 Results saved to {path}")
+
+    if not baseline_path:
+        return 0
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        deltas = compare(doc, json.load(f))
+    print(f"Compared with {baseline_path}:")
+    for name, delta in deltas.items():
+        print(f"  {name:<14} {delta:+.1f}%")
+    if args.fail_over is not None and any(d > args.fail_over for d in deltas.values()):
+        print(f"❌ Slower than the baseline by more than {args.fail_over}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
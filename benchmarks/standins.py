@@ -0,0 +1,303 @@
+# benchmarks/standins.py
+"""
+Local stand-ins for AgentFlow's upstreams, so the pipeline can be run and
+timed without network access or API keys:
+
+  - FakeArxiv: Atom search API (/api/query) and PDFs (/pdf/<id>.pdf)
+    for a synthetic corpus
+  - FakeGroq:  OpenAI-style /openai/v1/chat/completions with a
+    configurable latency per request
+  - point_at(): redirects the code to them for the duration of a block
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+VOCABULARY = (
+    "graph neural network attention transformer model training data learning layer node edge "
+    "embedding representation benchmark dataset accuracy loss gradient optimisation sparse dense "
+    "message passing convolution spectral spatial temporal dynamic equation solver kernel "
+    "experiment result baseline method approach propose show improve efficient scalable robust"
+).split()
+LINES_PER_PAGE = 55
+WORDS_PER_LINE = 12
+
+
+def _escape_pdf(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: List[List[str]]) -> bytes:
+    """A minimal valid PDF (Helvetica text, one line per entry) built without any PDF library."""
+    n = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{4 + 2 * i} 0 R" for i in range(n)), n)).encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, lines in enumerate(pages):
+        ops = ["BT", "/F1 10 Tf", "13 TL", "56 760 Td"] + [f"({_escape_pdf(line)}) Tj T*" for line in lines] + ["ET"]
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        objects.append((
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        ).encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+class Corpus:
+    """
+    Deterministic synthetic papers: arXiv-style metadata, an abstract and
+    `pages` pages of text each. PDFs are rendered on first request.
+    """
+
+    def __init__(self, size: int = 20, pages: int = 3, seed: int = 0):
+        self.size = size
+        self.pages = pages
+        self.seed = seed
+        self._pdfs: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self.papers = [self._paper(i) for i in range(size)]
+        self.by_id = {p["arxiv_id"]: p for p in self.papers}
+
+    def _words(self, rng: random.Random, n: int) -> str:
+        return " ".join(rng.choice(VOCABULARY) for _ in range(n))
+
+    def _paper(self, i: int) -> Dict[str, str]:
+        rng = random.Random(self.seed * 100003 + i)
+        return {
+            "arxiv_id": f"2501.{i:05d}v1",
+            "title": f"Synthetic paper {i}: {self._words(rng, 5)}",
+            "summary": self._words(rng, 150) + ".",
+            "author": f"Author {i}",
+        }
+
+    def pdf(self, arxiv_id: str) -> Optional[bytes]:
+        if arxiv_id not in self.by_id:
+            return None
+        with self._lock:
+            if arxiv_id not in self._pdfs:
+                index = self.papers.index(self.by_id[arxiv_id])
+                rng = random.Random(self.seed * 100003 + index + 7)
+                pages = [
+                    [self._words(rng, WORDS_PER_LINE) for _ in range(LINES_PER_PAGE)]
+                    for _ in range(self.pages)
+                ]
+                pages[0].insert(0, self.by_id[arxiv_id]["title"])
+                self._pdfs[arxiv_id] = make_pdf(pages)
+            return self._pdfs[arxiv_id]
+
+    def write_pdfs(self, directory: str, count: Optional[int] = None) -> List[Dict[str, str]]:
+        """Write PDFs to `directory`; returns SummariserAgent-style {"title", "url", "file_path"} dicts."""
+        os.makedirs(directory, exist_ok=True)
+        items = []
+        for paper in self.papers[:count]:
+            path = os.path.join(directory, paper["arxiv_id"] + ".pdf")
+            with open(path, "wb") as f:
+                f.write(self.pdf(paper["arxiv_id"]))
+            items.append({
+                "title": paper["title"],
+                "url": f"http://arxiv.org/abs/{paper['arxiv_id']}",
+                "file_path": path,
+            })
+        return items
+
+    def feed(self, query: str, start: int, max_results: int) -> bytes:
+        """Atom page of results; each query sees the corpus in its own (rotated) order."""
+        shift = zlib.crc32(query.encode("utf-8")) % max(1, self.size)
+        ranked = self.papers[shift:] + self.papers[:shift]
+        entries = []
+        for paper in ranked[start:start + max_results]:
+            arxiv_id = paper["arxiv_id"]
+            entries.append(
+                "<entry>"
+                f"<id>http://arxiv.org/abs/{arxiv_id}</id>"
+                "<published>2025-01-01T00:00:00Z</published>"
+                f"<title>{escape(paper['title'])}</title>"
+                f"<summary>{escape(paper['summary'])}</summary>"
+                f"<author><name>{escape(paper['author'])}</name></author>"
+                f'<link href="http://arxiv.org/abs/{arxiv_id}" rel="alternate" type="text/html"/>'
+                f'<link title="pdf" href="http://arxiv.org/pdf/{arxiv_id}" rel="related" type="application/pdf"/>'
+                '<category term="cs.LG"/>'
+                "</entry>"
+            )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+            f"<opensearch:totalResults>{self.size}</opensearch:totalResults>{''.join(entries)}</feed>"
+        ).encode("utf-8")
+
+
+class StandIn:
+    """An HTTP server on 127.0.0.1 (random port) in a daemon thread; counts requests by path kind."""
+
+    def __init__(self):
+        stand_in = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stand_in._dispatch(self, "GET")
+
+            def do_POST(self):
+                stand_in._dispatch(self, "POST")
+
+            def log_message(self, *args):
+                pass
+
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        host, port = self.server.server_address
+        self.url = f"http://{host}:{port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "StandIn":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _count(self, kind: str) -> None:
+        with self._lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        raise NotImplementedError
+
+    @staticmethod
+    def _reply(handler: BaseHTTPRequestHandler, status: int, body: bytes, content_type: str) -> None:
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+class FakeArxiv(StandIn):
+    """arXiv search API and PDF host for a Corpus; `latency` seconds per request."""
+
+    def __init__(self, corpus: Corpus, latency: float = 0.0):
+        super().__init__()
+        self.corpus = corpus
+        self.latency = latency
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        url = urlparse(handler.path)
+        if url.path == "/api/query":
+            self._count("search")
+            qs = parse_qs(url.query)
+            body = self.corpus.feed(
+                qs.get("search_query", [""])[0],
+                int(qs.get("start", ["0"])[0]),
+                int(qs.get("max_results", ["10"])[0]),
+            )
+            self._reply(handler, 200, body, "application/atom+xml")
+            return
+        match = re.fullmatch(r"/pdf/(.+)\.pdf", url.path)
+        pdf = self.corpus.pdf(match.group(1)) if match else None
+        if pdf is None:
+            self._reply(handler, 404, b"not found", "text/plain")
+            return
+        self._count("pdf")
+        self._reply(handler, 200, pdf, "application/pdf")
+
+
+class FakeGroq(StandIn):
+    """
+    Chat completions that take `latency` seconds. Batched summary prompts
+    ("[Paper n]" sections) get a JSON object keyed by paper number, the
+    way the real model is asked to answer; anything else gets bullets.
+    """
+
+    def __init__(self, latency: float = 0.05):
+        super().__init__()
+        self.latency = latency
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        length = int(handler.headers.get("Content-Length") or 0)
+        request = json.loads(handler.rfile.read(length) or b"{}")
+        self._count("chat")
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = (request.get("messages") or [{}])[-1].get("content", "")
+        numbers = re.findall(r"^\[Paper (\d+)\]$", prompt, re.MULTILINE)
+        if numbers:
+            content = json.dumps({n: f"- Stand-in summary of paper {n}\n- Second point" for n in numbers})
+        else:
+            content = "- Stand-in summary point\n- Another point\n- A third point"
+        body = json.dumps({
+            "id": f"chatcmpl-{self.counts['chat']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stand-in"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4},
+        }).encode("utf-8")
+        self._reply(handler, 200, body, "application/json")
+
+
+@contextmanager
+def point_at(arxiv_url: str, groq_url: str) -> Iterator[None]:
+    """
+    Send arXiv and Groq traffic to stand-ins inside the block: patches the
+    API/PDF URLs, sets GROQ_BASE_URL (and a dummy key), drops the cached
+    Groq client and lifts the client-side rate limit for the stand-in host.
+    """
+    from agents.pdf_downloader_agent import tools as pdf_tools
+    from utils import arxiv, llm, upstream
+
+    host = urlparse(arxiv_url).hostname
+    saved = (
+        arxiv.ARXIV_API_URL,
+        pdf_tools.ARXIV_PDF_URL,
+        {k: os.environ.get(k) for k in ("GROQ_BASE_URL", "GROQ_API_KEY")},
+        upstream.UPSTREAM_LIMITS.get(host),
+    )
+    arxiv.ARXIV_API_URL = f"{arxiv_url}/api/query"
+    pdf_tools.ARXIV_PDF_URL = f"{arxiv_url}/pdf/{{arxiv_id}}.pdf"
+    os.environ["GROQ_BASE_URL"] = groq_url
+    os.environ["GROQ_API_KEY"] = os.environ.get("GROQ_API_KEY") or "stand-in"
+    upstream.UPSTREAM_LIMITS[host] = {"rate": 1e6, "burst": 1e6}
+    llm._client = None
+    try:
+        yield
+    finally:
+        arxiv.ARXIV_API_URL, pdf_tools.ARXIV_PDF_URL = saved[0], saved[1]
+        for key, value in saved[2].items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        if saved[3] is None:
+            upstream.UPSTREAM_LIMITS.pop(host, None)
+        else:
+            upstream.UPSTREAM_LIMITS[host] = saved[3]
+        llm._client = None
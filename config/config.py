@@ -1,10 +1,36 @@
 import os
-from dotenv import load_dotenv
+import threading
 
-load_dotenv()
+_env_loaded = False
+_env_lock = threading.Lock()
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
-if not GROQ_API_KEY:
-    raise ValueError("Missing GROQ_API_KEY in .env")
+def _load_env() -> None:
+    """Read .env once, on the first settings lookup rather than at import."""
+    global _env_loaded
+    with _env_lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
 
+            load_dotenv()
+            _env_loaded = True
+
+
+def get_setting(name: str, default: str | None = None) -> str | None:
+    _load_env()
+    return os.getenv(name, default)
+
+
+def get_groq_api_key() -> str:
+    key = get_setting("GROQ_API_KEY")
+    if not key:
+        raise ValueError("Missing GROQ_API_KEY in .env")
+    return key
+
+
+def __getattr__(name: str):
+    # `from config.config import GROQ_API_KEY` still works, but only checks
+    # the key when it is actually imported by name
+    if name == "GROQ_API_KEY":
+        return get_groq_api_key()
+    raise AttributeError(f"module 'config.config' has no attribute '{name}'")
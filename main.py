@@ -1,55 +1,64 @@
-import sys ,uuid
+import argparse, itertools, uuid
 from agents.search_agent.search_agent import SearchAgent
 from agents.pdf_downloader_agent.pdf_downloader_agent import PDFDownloaderAgent
 from agents.summariser_agent.summariser_agent import SummariserAgent
 from agents.writer_agent.writer_agent import WriterAgent
 from utils.logger import log_info , log_warn
+from utils.profiling import MODES, Profiler
 
-def main(query: str):
+def main(query: str, profile: str | None = None):
     task_id = str(uuid.uuid4())
     log_info(f"Starting pipeline...(task_id={task_id})")
+    if not profile:
+        return _pipeline(query, task_id)
 
-    # 1. Search relevant papers
-    search_agent = SearchAgent(task_id=task_id)
-    search_output = search_agent.run({"query": query})
-    results = search_output.get("papers", [])
-    if not results:
-        log_warn("No search results, Exiting early")
-        return
-    results = results[:3] # limit to top 3 paper
+    # the stages are lazy streams consumed by the writer, so they are profiled as one step
+    profiler = Profiler(task_id, mode=profile)
+    try:
+        with profiler.step("pipeline"):
+            return _pipeline(query, task_id)
+    finally:
+        profiler.print_summary()
+        profiler.close()
 
 
-    # 2. Download PDFs
+def _pipeline(query: str, task_id: str):
+    # Agents are chained as lazy streams: a paper is downloaded as soon as
+    # search yields it, and summarised as soon as its PDF lands.
+    search_agent = SearchAgent(task_id=task_id)
     pdf_downloader = PDFDownloaderAgent(task_id=task_id)
-    pdf_output = pdf_downloader.run({"papers": results})
-    pdfs = pdf_output.get("pdfs", [])
-    if not pdfs:
-        log_warn("No PDFs downloaded. Exiting early")
-        return
+    summariser = SummariserAgent(task_id=task_id)
+    writer = WriterAgent(task_id=task_id)
 
+    # 1. Search relevant papers (limit to top 3 paper)
+    papers = itertools.islice(search_agent.run_stream({"query": query}), 3)
 
-    # 3. Summarise PDFs
-    summariser = SummariserAgent(task_id=task_id)
-    summary_output = summariser.run(pdf_output)
-    summaries = summary_output.get("summaries", [])
-    if not summaries:
-        log_warn("No summaries generated . Exiting early")
-        return
+    # 2. Download PDFs
+    pdfs = pdf_downloader.run_stream({"papers": papers})
 
+    # 3. Summarise PDFs
+    summaries = summariser.run_stream({"pdfs": pdfs})
 
     # 4. Compile summaries into final report
-    writer = WriterAgent(task_id=task_id)
-    report_output = writer.run(summary_output)
-
+    try:
+        report_output = writer.run({"summaries": summaries})
+    finally:
+        summariser.close()
+    if not report_output.get("report_path"):
+        log_warn("No summaries generated. No report written")
+        return
 
     #  Done
     log_info("Pipeline complete!")
-    if report_output.get("report_path"):
-        log_info(f" Final report saved at: {report_output['report_path']}")
+    log_info(f" Final report saved at: {report_output['report_path']}")
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python main.py '<your-query>'")
-        sys.exit(1)
-    main(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Search, download, summarise and report on arXiv papers")
+    parser.add_argument("query", help="Search query")
+    parser.add_argument(
+        "--profile", nargs="?", const="all", choices=list(MODES),
+        help="Profile the run with cProfile (cpu), tracemalloc (memory) or both (all) into data/profiles/<task_id>/",
+    )
+    args = parser.parse_args()
+    main(args.query, profile=args.profile)
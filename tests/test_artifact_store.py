@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+
+import pytest
+
+from utils import artifact_store
+from utils.artifact_store import ArtifactStore, hash_bytes
+
+
+def test_put_get_roundtrip_with_metadata(tmp_path):
+    store = ArtifactStore(root=str(tmp_path))
+    pdf = tmp_path / "paper.pdf"
+    pdf.write_bytes(b"%PDF-1.4 body")
+
+    meta = store.put_file("pdf", "2401.00001v2", str(pdf), producer="test", arxiv_id="2401.00001v2", move=True)
+
+    assert not pdf.exists()
+    hit = store.get("pdf", "2401.00001v2")
+    assert hit["content_hash"] == hash_bytes(b"%PDF-1.4 body")
+    assert hit["size"] == len(b"%PDF-1.4 body")
+    assert hit["producer"] == "test"
+    assert hit["path"] == meta["path"] and hit["path"].endswith(".pdf")
+
+
+def test_derived_artifact_misses_on_stale_input_hash(tmp_path):
+    store = ArtifactStore(root=str(tmp_path))
+    store.put_text("summary", "pdfhash", "- point", producer="test", input_hash="model-a")
+
+    assert store.read_text("summary", "pdfhash", input_hash="model-a") == "- point"
+    assert store.read_text("summary", "pdfhash", input_hash="model-b") is None
+
+
+def test_lru_eviction_keeps_store_under_budget(tmp_path):
+    store = ArtifactStore(root=str(tmp_path), max_bytes=250, eviction_grace=0)
+    store.put_bytes("text", "a", b"a" * 100, producer="test")
+    store.put_bytes("text", "b", b"b" * 100, producer="test")
+    store.get("text", "a")  # "b" is now least recently used
+    store.put_bytes("text", "c", b"c" * 100, producer="test")
+
+    assert store.get("text", "b") is None
+    assert store.get("text", "a") is not None
+    assert store.get("text", "c") is not None
+    assert store.total_bytes() <= 250
+
+
+
+def test_recently_returned_blobs_are_not_evicted(tmp_path):
+    store = ArtifactStore(root=str(tmp_path), max_bytes=250, eviction_grace=0.2)
+    store.put_bytes("text", "a", b"a" * 100, producer="test")
+    store.put_bytes("text", "b", b"b" * 100, producer="test")
+    path = store.get("text", "a")["path"]
+    store.put_bytes("text", "c", b"c" * 100, producer="test")
+
+    # everything was touched within the grace window: the caller's path survives
+    assert os.path.exists(path)
+    assert store.get("text", "b") is not None
+
+    time.sleep(0.3)
+    store.get("text", "c")
+    store.put_bytes("text", "d", b"d" * 100, producer="test")
+
+    assert store.get("text", "a") is None and store.get("text", "b") is None
+    assert store.total_bytes() <= 250
+
+
+def test_concurrent_put_file_of_the_same_content(tmp_path):
+    store = ArtifactStore(root=str(tmp_path / "store"))
+    sources = []
+    for i in range(8):
+        src = tmp_path / f"copy{i}.pdf"
+        src.write_bytes(b"%PDF-1.4 " + b"x" * 1_000_000)
+        sources.append(src)
+    barrier = threading.Barrier(len(sources))
+    errors = []
+
+    def _put(i, src):
+        barrier.wait()
+        try:
+            store.put_file("pdf", f"2401.0000{i}", str(src), producer="test", move=i % 2 == 0)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=_put, args=(i, src)) for i, src in enumerate(sources)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    blobs = [name for _, _, names in os.walk(store.blob_dir) for name in names]
+    assert len(blobs) == 1 and blobs[0].endswith(".pdf")
+    assert os.path.getsize(store.get("pdf", "2401.00003")["path"]) == 1_000_009
+
+
+def test_failed_blob_write_leaves_no_temp_file(tmp_path, monkeypatch):
+    store = ArtifactStore(root=str(tmp_path))
+
+    def _full(src, dst):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(artifact_store.os, "replace", _full)
+    with pytest.raises(OSError):
+        store.put_bytes("text", "a", b"a" * 100, producer="test")
+
+    assert [name for _, _, names in os.walk(store.blob_dir) for name in names] == []
+    assert store.get("text", "a") is None
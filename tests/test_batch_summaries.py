@@ -0,0 +1,121 @@
+import json
+import re
+import threading
+
+import pytest
+
+from agents.summariser_agent import tools
+from utils.tokens import count_tokens, output_budget, pack, truncate_to_tokens
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Answers batched prompts with JSON (dropping papers listed in `drop`), single prompts with text."""
+    calls = []
+    drop = set()
+    lock = threading.Lock()
+
+    def _chat(messages, model, temperature, max_tokens, validate=None, **kwargs):
+        prompt = messages[-1]["content"]
+        with lock:
+            calls.append((prompt, max_tokens))
+        papers = re.findall(r"\[Paper (\d+)\]\n(.*?)(?=\n\n\[Paper |\Z)", prompt, re.DOTALL)
+        if papers:
+            return json.dumps({n: f"- about {body.split()[0]}" for n, body in papers if body.split()[0] not in drop})
+        return "- single " + prompt.rsplit("\n\n", 1)[-1].split()[0]
+
+    monkeypatch.setattr(tools, "chat", _chat)
+    return calls, drop
+
+
+def _abstracts(n):
+    return [f"paper{i} " + "we study graph neural networks on citation data. " * 20 for i in range(n)]
+
+
+def test_short_documents_share_requests_and_are_split_back(fake_llm):
+    calls, _ = fake_llm
+
+    summaries = tools.summarise_batch(_abstracts(10))
+
+    assert summaries == [f"- about paper{i}" for i in range(10)]
+    assert len(calls) == 2  # 8 + 2, not 10 requests
+    # max_tokens follows the batch size
+    assert [max_tokens for _, max_tokens in calls] == [8 * tools.SUMMARY_TOKENS, 2 * tools.SUMMARY_TOKENS]
+
+
+def test_documents_missing_from_the_reply_fall_back_to_single_requests(fake_llm):
+    calls, drop = fake_llm
+    drop.add("paper1")
+
+    summaries = tools.summarise_batch(_abstracts(3))
+
+    assert summaries == ["- about paper0", "- single paper1", "- about paper2"]
+    assert len(calls) == 2
+
+
+def test_packing_respects_the_context_window(fake_llm):
+    calls, _ = fake_llm
+    big = ["paper%d " % i + "token " * 1400 for i in range(6)]
+
+    summaries = tools.summarise_batch(big)
+
+    assert all(s.startswith("- about paper") for s in summaries)
+    for prompt, max_tokens in calls:
+        assert count_tokens(prompt) + max_tokens <= tools.context_window(tools.MODEL_NAME)
+    assert 1 < len(calls) < 6
+
+
+def test_parse_batch_response_tolerates_prose_and_lists():
+    reply = 'Here you go:\n{"Paper 1": ["a", "- b"], "2": "- c", "9": "out of range"}\nThanks'
+
+    assert tools.parse_batch_response(reply, 2) == {1: "- a\n- b", 2: "- c"}
+    assert tools.parse_batch_response("not json", 2) == {}
+
+
+def test_token_helpers():
+    assert pack([10, 10, 10, 50], budget=30) == [[0, 1, 2], [3]]
+    assert pack([5] * 5, budget=100, per_item_output=10, max_items=2) == [[0, 1], [2, 3], [4]]
+
+    text = "alpha beta gamma delta " * 100
+    cut = truncate_to_tokens(text, 50)
+    assert count_tokens(cut) <= 50 and text.startswith(cut) and len(cut) > 0
+
+    assert output_budget(400, "llama3-70b-8192") == 128
+    assert output_budget(3000, "llama3-70b-8192") == 750
+    assert output_budget(8000, "llama3-70b-8192") == 1  # nothing left of the window
+
+
+def test_long_text_is_chunked_by_tokens():
+    text = "\n\n".join("word " * 400 for _ in range(10))
+
+    chunks = tools.split_into_chunks(text, chunk_tokens=1000)
+
+    assert len(chunks) == 5
+    assert all(count_tokens(c) <= 1000 for c in chunks)
+
+
+def test_agent_batches_abstracts_in_order_without_deadlock(fake_llm, monkeypatch, tmp_path):
+    from agents.summariser_agent import summariser_agent
+    from utils.artifact_store import ArtifactStore
+    from utils.vector_index import VectorIndex
+
+    monkeypatch.setattr(summariser_agent, "summarise_batch", tools.summarise_batch)
+    monkeypatch.setattr(summariser_agent, "get_store", lambda: ArtifactStore(str(tmp_path / "artifacts")))
+    monkeypatch.setattr(summariser_agent, "get_vector_index", lambda: VectorIndex(str(tmp_path / "index")))
+    calls, _ = fake_llm
+    papers = [{"title": f"t{i}", "summary": text} for i, text in enumerate(_abstracts(7))]
+
+    agent = summariser_agent.SummariserAgent(task_id="t", queue_size=3)
+    try:
+        out = agent.run({"pdfs": papers})
+        # batches of at most queue_size: 3 + 3, and the last one on its own
+        assert [p["summary"] for p in out["summaries"]] == [f"- about paper{i}" for i in range(6)] + ["- single paper6"]
+        assert all(p["summary_source"] == "abstract" for p in out["summaries"])
+        assert len(calls) == 3
+
+        # stored summaries are reused on the next run
+        again = agent.run({"pdfs": [{"title": "t0", "summary": _abstracts(1)[0]}]})
+        assert again["summaries"][0]["summary"] == "- about paper0"
+        assert len(calls) == 3
+    finally:
+        agent.close()
@@ -0,0 +1,26 @@
+import fitz
+
+from benchmarks.run import DEFAULTS, compare, run_benchmarks
+from benchmarks.standins import Corpus
+
+
+def test_stand_in_pdfs_parse():
+    corpus = Corpus(size=2, pages=2)
+    paper = corpus.papers[0]
+
+    with fitz.open(stream=corpus.pdf(paper["arxiv_id"]), filetype="pdf") as doc:
+        assert doc.page_count == 2
+        assert paper["title"].split(":")[0] in doc[0].get_text()
+
+
+def test_benchmarks_run_in_isolation_and_compare():
+    params = dict(DEFAULTS, papers=2, pages=1, corpus=5, llm_latency=0.0, memory_ops=20)
+
+    doc = run_benchmarks(["memory", "pdf_parser"], params, repeat=1)
+
+    assert set(doc["benchmarks"]) == {"memory", "pdf_parser"}
+    assert doc["benchmarks"]["memory"]["items"] == 4 * 20  # write, read, write_many, read_many
+    assert doc["benchmarks"]["pdf_parser"]["items"] == 2
+
+    slower = {"params": params, "benchmarks": {"memory": {"median_s": doc["benchmarks"]["memory"]["median_s"] / 2}}}
+    assert compare(doc, slower)["memory"] == 100.0
@@ -0,0 +1,42 @@
+import time
+
+from utils.llm_cache import LLMCache
+
+MODEL = "test-model"
+
+
+def _msgs(prompt):
+    return [{"role": "user", "content": prompt}]
+
+
+def test_exact_hit_depends_on_all_parameters(tmp_path):
+    cache = LLMCache(db_path=str(tmp_path / "llm.sqlite3"))
+    cache.put(MODEL, _msgs("hello"), 0.4, 512, "world")
+
+    assert cache.get(MODEL, _msgs("hello"), 0.4, 512) == "world"
+    assert cache.get(MODEL, _msgs("hello"), 0.4, 256) is None
+    assert cache.get(MODEL, _msgs("hello"), 0.0, 512) is None
+    assert cache.stats == {"hits": 1, "near_hits": 0, "misses": 2}
+
+
+def test_near_duplicate_match_is_scoped(tmp_path):
+    cache = LLMCache(db_path=str(tmp_path / "llm.sqlite3"))
+    cache.put(MODEL, _msgs("plan A"), 0.2, 1024, "{}", near_text="Graph transformers", scope="planner::3")
+
+    assert cache.get(MODEL, _msgs("plan B"), 0.2, 1024, near_text="graph transformers!", scope="planner::3") == "{}"
+    assert cache.get(MODEL, _msgs("plan B"), 0.2, 1024, near_text="graph transformers", scope="planner::5") is None
+    assert cache.get(MODEL, _msgs("plan B"), 0.2, 1024, near_text="diffusion models", scope="planner::3") is None
+    assert cache.stats["near_hits"] == 1
+
+
+def test_ttl_and_size_bound(tmp_path):
+    cache = LLMCache(db_path=str(tmp_path / "llm.sqlite3"), ttl=0.05, max_entries=2)
+    cache.put(MODEL, _msgs("a"), 0.0, 1, "A")
+    time.sleep(0.1)
+    assert cache.get(MODEL, _msgs("a"), 0.0, 1) is None
+
+    cache.ttl = 3600
+    for prompt in ["b", "c", "d"]:
+        cache.put(MODEL, _msgs(prompt), 0.0, 1, prompt.upper())
+    assert cache.get(MODEL, _msgs("b"), 0.0, 1) is None
+    assert cache.get(MODEL, _msgs("d"), 0.0, 1) == "D"
@@ -0,0 +1,105 @@
+import json
+import os
+import time
+
+import pytest
+
+from utils import logger, tracing
+
+
+class _ListSink:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    logger.flush()
+    sink = _ListSink()
+    monkeypatch.setattr(logger, "_sinks", [sink])
+    monkeypatch.setattr(logger, "_level", logger.INFO)
+    monkeypatch.setattr(logger, "_configured", True)
+    return sink
+
+
+def test_levels_and_lazy_formatting(sink):
+    calls = []
+
+    def expensive():
+        calls.append(1)
+        return "expensive"
+
+    logger.log_debug(expensive)
+    logger.log_debug("hidden %s", "x")
+    logger.log_info("paper %d of %d", 1, 3)
+    logger.log_warn(expensive)
+    logger.set_level("error")
+    logger.log_warn("dropped")
+    logger.log_error("bad %s", "thing")
+    assert logger.flush()
+
+    assert [(r["level"], r["message"]) for r in sink.records] == [
+        ("INFO", "paper 1 of 3"), ("WARN", "expensive"), ("ERROR", "bad thing"),
+    ]
+    assert calls == [1]
+    assert logger.is_enabled(logger.ERROR) and not logger.is_enabled(logger.WARN)
+
+
+def test_bad_format_arguments_do_not_lose_the_message(sink):
+    logger.log_info("no placeholders", 42)
+    logger.flush()
+    assert sink.records[0]["message"] == "no placeholders 42"
+
+
+def test_jsonl_sink_writes_one_file_per_task(tmp_path, monkeypatch, sink):
+    jsonl = logger.JsonlSink(str(tmp_path))
+    logger._sinks.append(jsonl)
+
+    with tracing.context(task_id="t1", step="search"):
+        logger.log_info("one")
+    with tracing.context(task_id="t2"):
+        logger.log_warn("two")
+    logger.log_info("outside")
+    logger.flush()
+    jsonl.close()
+
+    assert sorted(os.listdir(tmp_path)) == ["process.jsonl", "t1.jsonl", "t2.jsonl"]
+    with open(tmp_path / "t1.jsonl") as f:
+        record = json.loads(f.readline())
+    assert record["message"] == "one" and record["step"] == "search" and record["level"] == "INFO"
+    assert "levelno" not in record and record["ts"] <= time.time()
+
+
+def test_disabled_debug_is_cheap(sink):
+    start = time.perf_counter()
+    for i in range(100_000):
+        logger.log_debug("item %d", i)
+    elapsed = time.perf_counter() - start
+
+    logger.flush()
+    assert sink.records == []
+    assert elapsed < 0.5  # ~100 ns per call; formatting never happens
+
+
+def test_first_debug_line_honours_log_level(monkeypatch):
+    logger.flush()
+    sink = _ListSink()
+    monkeypatch.setattr(logger, "_sinks", [sink])
+    monkeypatch.setattr(logger, "_level", logger.INFO)
+    monkeypatch.setattr(logger, "_configured", False)  # settings not read yet
+    monkeypatch.setenv("LOG_LEVEL", "debug")
+    monkeypatch.delenv("LOG_DIR", raising=False)
+
+    logger.log_debug("early %s", "line")
+    logger.flush()
+
+    assert [r["message"] for r in sink.records] == ["early line"]
@@ -0,0 +1,67 @@
+import json
+import multiprocessing
+
+from tools.memory import MemoryTool
+
+
+def _writer(db_path: str, worker: int) -> None:
+    memory = MemoryTool(db_path=db_path)
+    for i in range(50):
+        memory.run({"action": "write", "paper_id": f"w{worker}", "key": f"k{i}", "data": i})
+
+
+def test_point_actions_keep_existing_interface(tmp_path):
+    memory = MemoryTool(db_path=str(tmp_path / "memory.sqlite3"))
+
+    assert memory.run({"action": "write", "paper_id": "p1", "key": "summary", "data": {"a": 1}}) == {"status": "success"}
+    assert memory.run({"action": "read", "paper_id": "p1", "key": "summary"}) == {"status": "success", "result": {"a": 1}}
+    assert memory.run({"action": "list", "paper_id": "p1"}) == {"status": "success", "keys": ["summary"]}
+    assert memory.run({"action": "delete", "paper_id": "p1", "key": "summary"}) == {"status": "success"}
+    assert memory.run({"action": "read", "paper_id": "p1", "key": "summary"})["status"] == "not_found"
+    assert memory.run({"action": "store", "paper_id": "p1", "key": "x"})["status"] == "error"
+
+
+def test_batch_actions(tmp_path):
+    memory = MemoryTool(db_path=str(tmp_path / "memory.sqlite3"))
+    items = [{"paper_id": "p", "key": f"k{i}", "data": i} for i in range(3)]
+
+    assert memory.run({"action": "write_many", "items": items}) == {"status": "success", "count": 3}
+    result = memory.run({
+        "action": "read_many",
+        "items": [{"paper_id": "p", "key": "k2"}, {"paper_id": "p", "key": "nope"}, {"paper_id": "p", "key": "k0"}],
+    })
+    assert result == {"status": "success", "results": [2, None, 0]}
+    assert memory.run({"action": "write_many", "items": ["p/k"]})["status"] == "error"
+    assert memory.run({"action": "read_many", "items": [None]})["status"] == "error"
+
+
+def test_imports_legacy_json_file(tmp_path):
+    (tmp_path / "shared_memory.json").write_text(json.dumps({"p": {"summary": "old"}}))
+
+    memory = MemoryTool(db_path=str(tmp_path / "shared_memory.sqlite3"))
+
+    assert memory.run({"action": "read", "paper_id": "p", "key": "summary"})["result"] == "old"
+    assert (tmp_path / "shared_memory.json.imported").exists()
+
+    # cleared memory stays cleared when the tool is opened again
+    memory.run({"action": "delete", "paper_id": "p", "key": "summary"})
+    memory.close()
+    reopened = MemoryTool(db_path=str(tmp_path / "shared_memory.sqlite3"))
+    assert reopened.run({"action": "read", "paper_id": "p", "key": "summary"})["status"] == "not_found"
+
+
+def test_concurrent_writers_from_several_processes(tmp_path):
+    db_path = str(tmp_path / "memory.sqlite3")
+    MemoryTool(db_path=db_path)  # create schema up front
+
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_writer, args=(db_path, w)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+        assert p.exitcode == 0
+
+    memory = MemoryTool(db_path=db_path)
+    for w in range(4):
+        assert len(memory.run({"action": "list", "paper_id": f"w{w}"})["keys"]) == 50
@@ -0,0 +1,259 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agents.pdf_downloader_agent import tools
+
+PDF_BYTES = b"%PDF-1.4\n% stand-in\n" + b"0" * 4096 + b"\n%%EOF\n"
+
+
+class _ArxivStandIn(BaseHTTPRequestHandler):
+    delay = 0.1
+    active = 0
+    peak = 0
+    ranges = []
+    bodies = {}  # arXiv ID -> body served instead of PDF_BYTES
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            time.sleep(cls.delay)
+            if "missing" in self.path:
+                self.send_error(404)
+                return
+            body = b"<html>not a pdf</html>" if "junk" in self.path else PDF_BYTES
+            body = cls.bodies.get(self.path.rsplit("/", 1)[-1][:-len(".pdf")], body)
+            range_header = self.headers.get("Range")
+            cls.ranges.append(range_header)
+            if range_header:
+                start = int(range_header.split("=")[1].rstrip("-"))
+                body = body[start:]
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{start + len(body) - 1}/{start + len(body)}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def arxiv_server(monkeypatch):
+    _ArxivStandIn.active = 0
+    _ArxivStandIn.peak = 0
+    _ArxivStandIn.ranges = []
+    _ArxivStandIn.bodies = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ArxivStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    monkeypatch.setattr(tools, "ARXIV_PDF_URL", f"http://{host}:{port}/pdf/{{arxiv_id}}.pdf")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_pdfs_keeps_order_and_caps_per_host(arxiv_server, tmp_path):
+    urls = [f"https://arxiv.org/abs/2401.{i:05d}" for i in range(8)]
+
+    started = time.monotonic()
+    outcomes = tools.download_pdfs(urls, str(tmp_path), max_workers=8, max_per_host=3)
+    elapsed = time.monotonic() - started
+
+    assert [o["error"] for o in outcomes] == [None] * 8
+    assert [o["file_path"] for o in outcomes] == [
+        str(tmp_path / f"2401.{i:05d}.pdf") for i in range(8)
+    ]
+    assert _ArxivStandIn.peak <= 3
+    # 8 requests at 0.1s each with 3 in flight: well under the sequential 0.8s
+    assert elapsed < 0.7
+
+
+def test_concurrent_batches_share_one_per_host_cap(arxiv_server, tmp_path):
+    batches = [[f"https://arxiv.org/abs/240{b}.{i:05d}" for i in range(4)] for b in range(3)]
+    threads = [
+        threading.Thread(target=tools.download_pdfs, args=(urls, str(tmp_path)), kwargs={"max_workers": 4, "max_per_host": 2})
+        for urls in batches
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert _ArxivStandIn.peak <= 2  # not 2 per call
+
+
+def test_download_pdfs_isolates_failures(arxiv_server, tmp_path):
+    urls = [
+        "https://arxiv.org/abs/2401.00001",
+        "https://arxiv.org/abs/missing",
+        "https://arxiv.org/abs/2401.00002",
+    ]
+
+    outcomes = tools.download_pdfs(urls, str(tmp_path), max_workers=3)
+
+    assert outcomes[0]["file_path"].endswith("2401.00001.pdf")
+    assert outcomes[1]["file_path"] is None and outcomes[1]["error"]
+    assert outcomes[2]["file_path"].endswith("2401.00002.pdf")
+
+
+def test_truncated_cache_hit_is_redownloaded(arxiv_server, tmp_path):
+    cached = tmp_path / "2401.00003.pdf"
+    cached.write_bytes(b"")
+
+    path = tools.download_pdf("https://arxiv.org/abs/2401.00003", str(tmp_path))
+
+    assert cached.read_bytes() == PDF_BYTES
+    assert path == str(cached)
+
+
+def test_partial_download_resumes_with_range(arxiv_server, tmp_path):
+    part = tmp_path / "2401.00004.pdf.part"
+    part.write_bytes(PDF_BYTES[:1000])
+
+    path = tools.download_pdf("https://arxiv.org/abs/2401.00004", str(tmp_path))
+
+    assert _ArxivStandIn.ranges == ["bytes=1000-"]
+    assert (tmp_path / "2401.00004.pdf").read_bytes() == PDF_BYTES
+    assert not part.exists()
+    assert path.endswith("2401.00004.pdf")
+
+
+def test_concurrent_downloads_of_one_paper_share_the_result(arxiv_server, tmp_path):
+    url = "https://arxiv.org/abs/2401.00005"
+    paths, errors = [], []
+
+    def _download():
+        try:
+            paths.append(tools.download_pdf(url, str(tmp_path)))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=_download) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert paths == [str(tmp_path / "2401.00005.pdf")] * 4
+    assert (tmp_path / "2401.00005.pdf").read_bytes() == PDF_BYTES
+    # the first download fetched the file; the others found it in place
+    assert _ArxivStandIn.ranges == [None]
+    assert tools._id_locks == {}  # released locks don't pile up
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_download_pdfs_fetches_repeated_papers_once(arxiv_server, tmp_path, workers):
+    urls = [
+        "https://arxiv.org/abs/2401.00006v1",
+        "https://arxiv.org/abs/2401.00007",
+        "https://arxiv.org/abs/2401.00006v2",
+        "https://arxiv.org/abs/2401.00006v1",
+    ]
+
+    outcomes = tools.download_pdfs(urls, str(tmp_path), max_workers=workers)
+
+    first = str(tmp_path / "2401.00006v1.pdf")
+    assert [o["file_path"] for o in outcomes] == [first, str(tmp_path / "2401.00007.pdf"), first, first]
+    assert len(_ArxivStandIn.ranges) == 2
+
+
+def test_bad_pdfs_do_not_open_the_circuit(arxiv_server, tmp_path, monkeypatch):
+    from utils.upstream import FAILURE_THRESHOLD, get_upstream
+
+    up = get_upstream(tools.ARXIV_PDF_URL)
+    monkeypatch.setattr(up, "backoff_base", 0.0)
+    monkeypatch.setattr(_ArxivStandIn, "delay", 0.0)
+
+    urls = [f"https://arxiv.org/abs/junk{i}" for i in range(FAILURE_THRESHOLD + 1)]
+    outcomes = tools.download_pdfs(urls + ["https://arxiv.org/abs/2401.00008"], str(tmp_path), max_workers=1)
+
+    assert all("non-PDF" in o["error"] for o in outcomes[:-1])
+    assert len(_ArxivStandIn.ranges) == (FAILURE_THRESHOLD + 1) * up.max_attempts + 1  # each retried in full
+    assert outcomes[-1]["file_path"].endswith("2401.00008.pdf")
+    assert up.breaker.state == "closed"
+
+
+def test_agent_stream_yields_before_the_papers_run_out_and_skips_failures(arxiv_server, tmp_path, monkeypatch):
+    from agents.pdf_downloader_agent.pdf_downloader_agent import PDFDownloaderAgent
+    from utils import artifact_store
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(artifact_store, "_store", None)
+    pulled = []
+
+    def _papers():
+        for i in range(8):
+            pulled.append(i)
+            if i == 2:
+                yield {"title": "no url"}
+            elif i == 3:
+                yield {"title": "gone", "url": "https://arxiv.org/abs/missing"}
+            else:
+                yield {"title": f"paper{i}", "url": f"https://arxiv.org/abs/2401.{i:05d}"}
+
+    stream = PDFDownloaderAgent(max_workers=2, min_interval=0.0).run_stream({"papers": _papers()})
+
+    first = next(stream)
+    assert first["title"] == "paper0"
+    assert len(pulled) < 8  # the first PDF arrives while papers are still to come
+    rest = [pdf["title"] for pdf in stream]
+    assert rest == ["paper1", "paper4", "paper5", "paper6", "paper7"]
+
+
+def test_abstracts_reach_the_summariser_through_the_downloader(arxiv_server, tmp_path, monkeypatch):
+    import fitz
+
+    from agents.pdf_downloader_agent.pdf_downloader_agent import PDFDownloaderAgent
+    from agents.summariser_agent import summariser_agent
+    from utils import artifact_store, vector_index
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(artifact_store, "_store", None)
+    monkeypatch.setattr(vector_index, "_index", None)
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "fulltext graph neural networks.")
+    _ArxivStandIn.bodies["2401.00001"] = doc.tobytes()
+    doc.close()
+    monkeypatch.setattr(summariser_agent, "summarise_text", lambda text, max_workers=None: "- single " + text.split()[0])
+    monkeypatch.setattr(
+        summariser_agent, "summarise_batch",
+        lambda texts, max_docs=None: ["- batched " + t.split()[0] for t in texts],
+    )
+    papers = [
+        {"title": "fetched", "url": "https://arxiv.org/abs/2401.00001", "summary": "abstract1 on graphs."},
+        {"title": "gone", "url": "https://arxiv.org/abs/missing", "summary": "abstract2 on graphs."},
+        {"title": "gone, no abstract", "url": "https://arxiv.org/abs/missing2"},
+    ]
+
+    pdfs = list(PDFDownloaderAgent(min_interval=0.0).run_stream({"papers": papers}))
+
+    assert [(p["title"], p["summary"], bool(p["file_path"])) for p in pdfs] == [
+        ("fetched", "abstract1 on graphs.", True),
+        ("gone", "abstract2 on graphs.", False),
+    ]
+
+    summariser = summariser_agent.SummariserAgent(parse_workers=1)
+    try:
+        summaries = summariser.run({"pdfs": iter(pdfs)})["summaries"]
+    finally:
+        summariser.close()
+
+    assert [(s["title"], s["summary"], s.get("summary_source")) for s in summaries] == [
+        ("fetched", "- batched fulltext", None),
+        ("gone", "- batched abstract2", "abstract"),
+    ]
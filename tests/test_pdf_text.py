@@ -0,0 +1,147 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import fitz
+import pytest
+
+from tools.pdf_parser import PDFParserTool
+from utils import pdf_text
+from utils.artifact_store import ArtifactStore
+from utils.vector_index import VectorIndex
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    path = tmp_path / "sample.pdf"
+    doc = fitz.open()
+    for n in range(5):
+        doc.new_page().insert_text((72, 72), f"Page {n} text")
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_page_range_and_char_budget_parse_only_needed_pages(sample_pdf, tmp_path):
+    store = ArtifactStore(root=str(tmp_path / "artifacts"))
+
+    ranged = pdf_text.extract(sample_pdf, first_page=1, last_page=3, store=store)
+    assert ranged["text"] == "Page 1 text\n\nPage 2 text"
+    assert ranged["pages_parsed"] == 2 and ranged["page_count"] == 5
+
+    budget = pdf_text.extract(sample_pdf, max_chars=5, store=store)
+    assert budget["text"] == "Page "
+    assert budget["pages_parsed"] == 1  # page 0 only; pages 1-2 came from the cache
+
+
+def test_cached_pages_are_never_reparsed(sample_pdf, tmp_path):
+    store = ArtifactStore(root=str(tmp_path / "artifacts"))
+
+    first = pdf_text.extract(sample_pdf, store=store)
+    second = pdf_text.extract(sample_pdf, store=store)
+
+    assert first["pages_parsed"] == 5
+    assert second["pages_parsed"] == 0
+    assert second["text"] == first["text"]
+    assert pdf_text.cached_full_text(store, pdf_text.hash_file(sample_pdf)) == first["text"]
+
+
+def test_concurrent_page_saves_are_merged(tmp_path):
+    # two store instances on one root, like two worker processes
+    root = str(tmp_path / "artifacts")
+    stores = [ArtifactStore(root=root), ArtifactStore(root=root)]
+    barrier = threading.Barrier(2)
+
+    def _save(store, parity):
+        barrier.wait()
+        for n in range(parity, 40, 2):
+            pdf_text.save_pages(store, "pdfhash", {n: f"page {n}"}, page_count=40)
+
+    threads = [threading.Thread(target=_save, args=(store, i)) for i, store in enumerate(stores)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    pages, page_count = pdf_text.load_cached_pages(stores[0], "pdfhash")
+    assert page_count == 40
+    assert pages == {n: f"page {n}" for n in range(40)}
+
+
+def test_pdf_parser_tool_uses_engine(sample_pdf, tmp_path):
+    tool = PDFParserTool(store=ArtifactStore(root=str(tmp_path / "artifacts")), index=VectorIndex(str(tmp_path / "index")))
+
+    first = tool.run({"pdf_path": sample_pdf, "last_page": 2})
+    again = tool.run({"pdf_path": sample_pdf, "last_page": 2})
+
+    assert first["text"] == "Page 0 text\n\nPage 1 text"
+    assert first["cached"] is False and again["cached"] is True
+
+
+def test_batch_mode_streams_results_and_times_out_slow_files(sample_pdf, tmp_path, monkeypatch):
+    if multiprocessing.get_start_method() != "fork":
+        pytest.skip("patching the worker relies on fork")
+    slow = tmp_path / "slow.pdf"
+    slow.write_bytes(open(sample_pdf, "rb").read() + b"\n% slow")
+    real_parse = pdf_text.parse_pages
+
+    def parse_pages(path, page_numbers=None):
+        if path.endswith("slow.pdf"):
+            time.sleep(30)
+        return real_parse(path, page_numbers)
+
+    monkeypatch.setattr(pdf_text, "parse_pages", parse_pages)
+    tool = PDFParserTool(
+        store=ArtifactStore(root=str(tmp_path / "artifacts")), index=VectorIndex(str(tmp_path / "index")), max_workers=2,
+    )
+
+    started = time.monotonic()
+    result = tool.run({"pdf_paths": [str(slow), sample_pdf, "missing.pdf"], "timeout": 1})
+
+    assert time.monotonic() - started < 10
+    assert [r["status"] for r in result["results"]] == ["error", "success", "error"]
+    assert "Timed out" in result["results"][0]["message"]
+    assert result["results"][1]["page_count"] == 5
+    assert result["succeeded"] == 1
+
+
+def test_batch_mode_uses_a_bounded_pool_and_keeps_duplicates_in_order(sample_pdf, tmp_path, monkeypatch):
+    if multiprocessing.get_start_method() != "fork":
+        pytest.skip("patching the worker relies on fork")
+    pids = multiprocessing.Manager().list()
+    real_parse = pdf_text.parse_pages
+
+    def parse_pages(path, page_numbers=None):
+        pids.append(os.getpid())
+        return real_parse(path, page_numbers)
+
+    monkeypatch.setattr(pdf_text, "parse_pages", parse_pages)
+    paths = []
+    for n in range(6):
+        path = tmp_path / f"copy{n}.pdf"
+        path.write_bytes(open(sample_pdf, "rb").read() + f"\n% copy {n}".encode())
+        paths.append(str(path))
+    tool = PDFParserTool(
+        store=ArtifactStore(root=str(tmp_path / "artifacts")), index=VectorIndex(str(tmp_path / "index")), max_workers=2,
+    )
+
+    batch = [paths[0], paths[1], paths[0], *paths[2:], paths[1]]
+    result = tool.run({"pdf_paths": batch})
+
+    assert [r["pdf_path"] for r in result["results"]] == batch
+    assert result["succeeded"] == len(batch)
+    assert len(pids) == 6  # each distinct file parsed once
+    assert len(set(pids)) <= 2  # by at most max_workers processes
+
+
+def test_null_or_bad_page_bounds(sample_pdf, tmp_path):
+    tool = PDFParserTool(store=ArtifactStore(root=str(tmp_path / "artifacts")), index=VectorIndex(str(tmp_path / "index")))
+
+    whole = tool.run({"pdf_path": sample_pdf, "first_page": None, "last_page": None})
+    bad = tool.run({"pdf_path": sample_pdf, "first_page": "two"})
+    negative = tool.run({"pdf_path": sample_pdf, "last_page": -1})
+
+    assert whole["status"] == "success" and whole["page_count"] == 5
+    assert bad == {"status": "error", "message": "'first_page' must be an integer"}
+    assert negative["status"] == "error"
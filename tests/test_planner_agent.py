@@ -0,0 +1,65 @@
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from agents.planner_agent.planner_agent import PlannerAgent
+from utils import llm, llm_cache
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, model, messages, temperature, max_tokens):
+        self.calls += 1
+        instruction = re.search(r'Instruction: "(.*)"', messages[-1]["content"]).group(1)
+        plan = {
+            "workflow": [
+                {"agent": "SearchAgent", "params": {"query": f"papers on {instruction}", "max_results": 3}},
+                {"agent": "PDFDownloaderAgent", "params": {}},
+                {"agent": "SummariserAgent", "params": {}},
+                {"agent": "WriterAgent", "params": {}},
+            ],
+            "num_papers": 3,
+        }
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(plan)))])
+
+
+@pytest.fixture
+def completions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(llm_cache, "_cache", None)
+    completions = _FakeCompletions()
+    client = SimpleNamespace(base_url=None, chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(llm, "get_client", lambda: client)
+    return completions
+
+
+def _query(plan):
+    return plan["workflow"][0]["params"]["query"]
+
+
+def test_similar_instructions_keep_their_own_query(completions):
+    planner = PlannerAgent()
+
+    first = planner.run({"instruction": "graph neural networks 2023", "num_papers": 3})
+    second = planner.run({"instruction": "graph neural networks 2024", "num_papers": 3})
+    again = planner.run({"instruction": "graph neural networks 2023", "num_papers": 3})
+
+    assert _query(first) == "papers on graph neural networks 2023"
+    assert _query(second) == "papers on graph neural networks 2024"
+    assert again == first
+    assert completions.calls == 2  # exact repeats still come from the cache
+
+
+def test_opt_in_near_match_reuses_the_plan_with_the_current_query(completions):
+    planner = PlannerAgent(near_duplicates=True)
+
+    planner.run({"instruction": "graph neural networks 2023", "num_papers": 3})
+    second = planner.run({"instruction": "graph neural networks 2024", "num_papers": 3})
+
+    assert completions.calls == 1
+    assert _query(second) == "graph neural networks 2024"
+    assert [s["agent"] for s in second["workflow"]][1:] == ["PDFDownloaderAgent", "SummariserAgent", "WriterAgent"]
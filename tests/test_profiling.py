@@ -0,0 +1,78 @@
+import os
+import pstats
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import workflow_executor
+from utils import tracing
+from utils.profiling import Profiler
+from workflow_executor import WorkflowExecutor
+
+
+_kept = []
+
+
+def _burn_cpu(n):
+    return sum(i * i for i in range(n))
+
+
+class _Agent:
+    def __init__(self, name):
+        self.name = name
+
+    def close(self):
+        pass
+
+    def run(self, data):
+        if self.name == "SearchAgent":
+            return {"papers": ["a", "b"]}
+        blob = "x" * (4 * 2**20)  # 4 MB held until the step returns
+        _kept.append("y" * 2**16)  # and 64 KB that outlive it
+        with ThreadPoolExecutor(1) as pool:
+            pool.submit(tracing.propagate(_burn_cpu), 200_000).result()
+        return {"pdfs": [data["papers"][0] + ".pdf"], "size": len(blob)}
+
+
+@pytest.fixture
+def profiled_run(monkeypatch, tmp_path):
+    monkeypatch.setattr(workflow_executor, "create_agent", lambda name, task_id=None: _Agent(name))
+    config = {"workflow": [
+        {"id": "search", "agent": "SearchAgent"},
+        {"id": "download", "agent": "PDFDownloaderAgent", "foreach": "search.papers"},
+    ]}
+    profiler = Profiler("task/1", mode="all", root=str(tmp_path), top_n=5)
+    WorkflowExecutor(config, max_workers=1, task_id="task/1", profiler=profiler).run()
+    profiler.close()
+    return profiler
+
+
+def test_each_step_and_item_gets_profile_files(profiled_run):
+    files = sorted(os.listdir(profiled_run.directory))
+
+    assert os.path.basename(profiled_run.directory) == "task_1"
+    # one allocation report per stretch of the step, here one per item (max_workers=1)
+    assert files == [
+        "download.0.prof", "download.1.prof", "download.alloc.1.txt", "download.alloc.txt",
+        "search.alloc.txt", "search.prof", "summary.json",
+    ]
+    # work handed to a pool thread is part of the step's CPU profile
+    stats = pstats.Stats(os.path.join(profiled_run.directory, "download.0.prof"))
+    assert any(func[2] == "_burn_cpu" for func in stats.stats)
+    assert not tracemalloc.is_tracing()
+
+
+def test_summary_reports_peak_memory_per_stage(profiled_run):
+    stages = {s["step"]: s for s in profiled_run.summary()}
+
+    assert stages["download"]["runs"] == 2 and stages["search"]["runs"] == 1
+    assert stages["download"]["peak_mb"] >= 4 > stages["search"]["peak_mb"]
+    assert all(row["threads"] == 2 for row in profiled_run.rows if row["step"] == "download")
+    with open(os.path.join(profiled_run.directory, "download.alloc.txt")) as f:
+        assert "test_profiling.py" in f.read().splitlines()[2]  # the leak tops the report
+
+
+def test_unknown_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        Profiler("t", mode="gpu", root=str(tmp_path))
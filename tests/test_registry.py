@@ -0,0 +1,99 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tools.base import BaseTool
+from tools.load_tools import TOOLS, get_tool, load_tools
+from utils.registry import Registry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _EchoTool(BaseTool):
+    created = 0
+
+    def __init__(self, name: str = "echo"):
+        super().__init__(name)
+        type(self).created += 1
+
+    def run(self, input):
+        return input
+
+
+def _run_python(code: str, tmp_path) -> str:
+    env = {k: v for k, v in os.environ.items() if k != "GROQ_API_KEY"}
+    env["PYTHONPATH"] = ROOT
+    # run from an empty directory so no .env file supplies a key
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True, check=True
+    ).stdout
+
+
+def test_agents_import_without_credentials(tmp_path):
+    out = _run_python(
+        "import agents.summariser_agent.summariser_agent, agents.planner_agent.planner_agent, config.config;"
+        "print('ok')",
+        tmp_path,
+    )
+    assert out.splitlines()[-1] == "ok"
+
+
+def test_cli_import_defers_heavy_dependencies(tmp_path):
+    out = _run_python(
+        "import sys, workflow_runner;"
+        "print(sorted(m for m in ('groq', 'fitz', 'rich', 'requests', 'dotenv', 'tools.pdf_parser') if m in sys.modules))",
+        tmp_path,
+    )
+    assert out.strip() == "[]"
+
+
+def test_agent_and_pdf_text_imports_defer_pdf_engines(tmp_path):
+    out = _run_python(
+        "import sys, utils.pdf_text, agents.summariser_agent.summariser_agent, tools.pdf_parser;"
+        "print(sorted(m for m in ('fitz', 'pymupdf', 'PyPDF2') if m in sys.modules))",
+        tmp_path,
+    )
+    assert out.strip() == "[]"
+
+
+def test_missing_key_raises_only_when_requested(tmp_path):
+    out = _run_python(
+        "import config.config as c\n"
+        "try:\n    c.get_groq_api_key()\nexcept ValueError as e:\n    print(e)",
+        tmp_path,
+    )
+    assert "GROQ_API_KEY" in out
+
+
+def test_tools_are_shared_and_imported_lazily():
+    TOOLS.register("echo", _EchoTool)
+    _EchoTool.created = 0
+
+    first = load_tools(["echo"])["echo"]
+    second = load_tools(["echo", "nope"])
+
+    assert second == {"echo": first}
+    assert get_tool("echo") is first
+    assert _EchoTool.created == 1
+
+
+def test_registry_resolves_string_targets_on_first_load():
+    registry = Registry("agentflow.test", {"join": "os.path:join"})
+
+    assert registry.names() == ["join"]
+    assert registry.load("join") is os.path.join
+    with pytest.raises(KeyError):
+        registry.load("missing")
+
+
+def test_empty_tool_list_loads_nothing_and_closed_tools_are_rebuilt():
+    from tools.load_tools import close_tools
+
+    assert load_tools([]) == {}
+
+    TOOLS.register("echo", _EchoTool)
+    first = get_tool("echo")
+    close_tools()
+    assert get_tool("echo") is not first
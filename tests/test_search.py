@@ -0,0 +1,173 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from utils import arxiv
+from utils.search_cache import SearchCache
+
+TOTALS = {"graphs": 250, "llms": 40}
+
+
+def _feed(query, start, size):
+    total = TOTALS.get(query, 0)
+    # "llms" shares its first ten papers with "graphs" (as a newer version)
+    entries = []
+    for i in range(start, min(start + size, total)):
+        arxiv_id = f"2401.{i:05d}v2" if query == "llms" and i < 10 else f"2401.{i:05d}v1"
+        if query == "llms" and i >= 10:
+            arxiv_id = f"2402.{i:05d}v1"
+        entries.append(
+            f"<entry><id>http://arxiv.org/abs/{arxiv_id}</id>"
+            f"<title>{query} paper {i}</title><summary>abstract {i}</summary></entry>"
+        )
+    return (
+        '<feed xmlns="http://www.w3.org/2005/Atom" '
+        'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+        f"<opensearch:totalResults>{total}</opensearch:totalResults>{''.join(entries)}</feed>"
+    )
+
+
+class _ApiStandIn(BaseHTTPRequestHandler):
+    requests = []
+    started = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        qs = parse_qs(urlparse(self.path).query)
+        query, start, size = qs["search_query"][0], int(qs["start"][0]), int(qs["max_results"][0])
+        with self.lock:
+            self.requests.append((query, start, size))
+            self.started.append(time.monotonic())
+        body = _feed(query, start, size).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api_server(monkeypatch):
+    _ApiStandIn.requests = []
+    _ApiStandIn.started = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ApiStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    monkeypatch.setattr(arxiv, "ARXIV_API_URL", f"http://{host}:{port}/api/query")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SearchCache(db_path=str(tmp_path / "search.sqlite3"))
+
+
+def _search(queries, cache, **kwargs):
+    return arxiv.search_many(queries, page_size=100, min_interval=0, max_per_host=4, cache=cache, **kwargs)
+
+
+def test_pages_through_results_up_to_max_results(api_server, cache):
+    papers = _search(["graphs"], cache, max_results=230)
+
+    assert [p["arxiv_id"] for p in papers] == [f"2401.{i:05d}v1" for i in range(230)]
+    assert sorted(_ApiStandIn.requests) == [("graphs", 0, 100), ("graphs", 100, 100), ("graphs", 200, 30)]
+
+
+def test_stops_at_total_results(api_server, cache):
+    papers = _search(["llms"], cache, max_results=500)
+
+    assert len(papers) == 40
+    assert [r[1] for r in _ApiStandIn.requests] == [0]
+
+
+def test_dedupes_across_queries_and_rerun_hits_cache(api_server, cache):
+    papers = _search(["graphs", "llms"], cache, max_results=50)
+
+    assert len(papers) == 50 + 30
+    shared = papers[0]
+    assert shared["arxiv_id"] == "2401.00000v1"
+    assert shared["queries"] == ["graphs", "llms"]
+
+    sent = len(_ApiStandIn.requests)
+    assert _search(["graphs", "llms"], cache, max_results=50) == papers
+    assert len(_ApiStandIn.requests) == sent
+
+
+def test_concurrent_searches_share_one_politeness_budget(api_server):
+    def _one(query):
+        arxiv.search_many([query], max_results=20, page_size=10, max_per_host=1, min_interval=0.2, use_cache=False)
+
+    threads = [threading.Thread(target=_one, args=(q,)) for q in ("graphs", "llms")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # two pages per search, spaced by the shared limiter whichever search sent them
+    started = sorted(_ApiStandIn.started)
+    assert len(started) == 4
+    assert min(b - a for a, b in zip(started, started[1:])) >= 0.15
+
+
+def test_search_agent_honours_max_results(api_server, cache, monkeypatch):
+    monkeypatch.setattr(arxiv, "get_search_cache", lambda: cache)
+    from agents.search_agent.search_agent import SearchAgent
+
+    output = SearchAgent(task_id="t").run({"query": "graphs", "max_results": 12})
+
+    assert len(output["papers"]) == 12
+
+
+def test_feed_parser_extracts_metadata_incrementally():
+    import io
+
+    feed = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">
+  <opensearch:totalResults>2</opensearch:totalResults>
+  <entry>
+    <id>http://arxiv.org/abs/hep-th/9901001v1</id>
+    <published>1999-01-04T00:00:00Z</published>
+    <title>Strings
+      on a Lattice</title>
+    <summary> An abstract. </summary>
+    <author><name>Ada Lovelace</name></author>
+    <author><name>Alan Turing</name></author>
+    <link href="http://arxiv.org/abs/hep-th/9901001v1" rel="alternate" type="text/html"/>
+    <link title="pdf" href="http://arxiv.org/pdf/hep-th/9901001v1" rel="related" type="application/pdf"/>
+    <category term="hep-th" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="math-ph" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>
+  <entry><id>http://arxiv.org/api/errors#incorrect_id_format</id><summary>bad id</summary></entry>
+</feed>"""
+    info = {}
+    papers = list(arxiv.iter_feed(io.BytesIO(feed), info))
+
+    assert info == {"total": 2}
+    assert papers == [{
+        "arxiv_id": "hep-th/9901001v1",
+        "title": "Strings on a Lattice",
+        "summary": "An abstract.",
+        "url": "http://arxiv.org/abs/hep-th/9901001v1",
+        "pdf_url": "http://arxiv.org/pdf/hep-th/9901001v1",
+        "authors": ["Ada Lovelace", "Alan Turing"],
+        "categories": ["hep-th", "math-ph"],
+        "published": "1999-01-04T00:00:00Z",
+    }]
+
+
+def test_web_search_tool_uses_shared_backend(api_server, cache, monkeypatch):
+    monkeypatch.setattr(arxiv, "get_search_cache", lambda: cache)
+    from tools.web_search import WebSearchTool
+
+    output = WebSearchTool().run({"query": "llms", "max_results": 3})
+
+    assert [p["arxiv_id"] for p in output["results"]] == ["2401.00000v2", "2401.00001v2", "2401.00002v2"]
+    assert output["papers"][0]["pdf_url"] == "https://arxiv.org/pdf/2401.00000v2.pdf"
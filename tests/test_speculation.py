@@ -0,0 +1,123 @@
+import sys
+import threading
+import time
+
+import pytest
+
+import workflow_executor
+from agents.planner_agent import planner_agent
+from agents.planner_agent.planner_agent import fallback_plan
+from utils.checkpoints import CheckpointStore
+from workflow_executor import AgentPool
+from workflow_runner import plan_and_run
+
+RUNS = []
+LOCK = threading.Lock()
+PREFETCH_DELAY = 0.0
+
+
+class _Agent:
+    def __init__(self, name):
+        self.name = name
+
+    def close(self):
+        pass
+
+    def run(self, data):
+        with LOCK:
+            RUNS.append((self.name, data.get("query")))
+        if self.name == "SearchAgent":
+            time.sleep(0.3)
+            return {"papers": [f"{data['query']}-{i}" for i in range(data["max_results"])]}
+        if self.name == "PDFDownloaderAgent":
+            if threading.current_thread().name == "speculative":
+                time.sleep(PREFETCH_DELAY)
+                with LOCK:
+                    RUNS.append(("prefetched", None))
+            return {"pdfs": [p + ".pdf" for p in data["papers"]]}
+        if self.name == "SummariserAgent":
+            return {"summaries": [p + ":summary" for p in data["pdfs"]]}
+        return {"report": data["summaries"]}
+
+
+def _planner(plan, delay):
+    class _Planner:
+        def __init__(self, reset_cache=False):
+            pass
+
+        def run(self, input):
+            time.sleep(delay)  # the LLM call
+            return plan
+
+    return _Planner
+
+
+@pytest.fixture(autouse=True)
+def fake_agents(monkeypatch):
+    RUNS.clear()
+    monkeypatch.setattr(workflow_executor, "create_agent", lambda name, task_id=None: _Agent(name))
+
+
+def _run(tmp_path, monkeypatch, plan, delay, num_papers=2):
+    monkeypatch.setattr(planner_agent, "PlannerAgent", _planner(plan, delay))
+    return plan_and_run(
+        "graph transformers", num_papers, task_id="t1", pool=AgentPool(),
+        checkpoints=CheckpointStore(str(tmp_path / "checkpoints.sqlite3")), speculate=True,
+    )
+
+
+def test_matching_plan_keeps_speculative_work(tmp_path, monkeypatch):
+    results = _run(tmp_path, monkeypatch, fallback_plan("graph transformers", 3), delay=0.5, num_papers=3)
+
+    assert results["step4"]["report"][0] == "graph transformers-0.pdf:summary"
+    # the search ran once, during planning, and was restored for the real run
+    assert RUNS.count(("SearchAgent", "graph transformers")) == 1
+    # only the first SPECULATIVE_DOWNLOADS papers were prefetched
+    assert RUNS.count(("PDFDownloaderAgent", None)) == 2
+
+
+def test_matching_plan_does_not_wait_for_the_prefetch(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys.modules[__name__], "PREFETCH_DELAY", 1.0)
+    results = _run(tmp_path, monkeypatch, fallback_plan("graph transformers", 2), delay=0.4)
+
+    assert results["step4"]["report"][0] == "graph transformers-0.pdf:summary"
+    # the real run went ahead while the prefetch was still going;
+    # plan_and_run only waits for it on the way out
+    names = [name for name, _ in RUNS]
+    assert names.index("WriterAgent") < names.index("prefetched")
+
+
+def test_different_plan_cancels_speculative_work(tmp_path, monkeypatch):
+    plan = fallback_plan("graph transformer architectures", 2)
+    results = _run(tmp_path, monkeypatch, plan, delay=0.05)
+
+    assert results["step4"]["report"][0] == "graph transformer architectures-0.pdf:summary"
+    # the speculative search was in flight and finished; its download never started
+    assert RUNS.count(("SearchAgent", "graph transformers")) == 1
+    assert RUNS.count(("PDFDownloaderAgent", None)) == 1
+    assert ("SearchAgent", "graph transformer architectures") in RUNS
+
+
+def test_dropped_step_finishing_during_reconcile_is_discarded_after_its_record(tmp_path, monkeypatch):
+    events = []
+
+    class _SlowRecords(CheckpointStore):
+        def record(self, task_id, step, index, status, output):
+            if step.get("params", {}).get("query") == "graph transformers":
+                time.sleep(0.3)  # still writing when the plan arrives
+                events.append("speculative record")
+            super().record(task_id, step, index, status, output)
+
+        def discard(self, task_id, step_ids):
+            events.append("discard")
+            super().discard(task_id, step_ids)
+
+    monkeypatch.setattr(planner_agent, "PlannerAgent", _planner(fallback_plan("graph transformer architectures", 2), 0.4))
+    results = plan_and_run(
+        "graph transformers", 2, task_id="t1", pool=AgentPool(),
+        checkpoints=_SlowRecords(str(tmp_path / "checkpoints.sqlite3")), speculate=True,
+    )
+
+    # the speculative search's record must land before the discard, not after it
+    assert events == ["speculative record", "discard"]
+    assert results["step4"]["report"][0] == "graph transformer architectures-0.pdf:summary"
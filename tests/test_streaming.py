@@ -0,0 +1,88 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.search_agent import search_agent
+from agents.search_agent.search_agent import SearchAgent
+from utils.streaming import ordered_map
+
+
+class _Source:
+    """A lazy upstream that records how far it has been pulled and whether it was closed."""
+
+    def __init__(self, n):
+        self.n = n
+        self.pulled = 0
+        self.closed = False
+
+    def __iter__(self):
+        try:
+            for i in range(self.n):
+                self.pulled += 1
+                yield i
+        finally:
+            self.closed = True
+
+
+def test_ordered_map_yields_in_order_before_the_input_is_exhausted():
+    source = _Source(20)
+
+    def _slow_first(i):
+        time.sleep(0.1 if i == 0 else 0.0)
+        return i * 10
+
+    with ThreadPoolExecutor(4) as pool:
+        results = ordered_map(_slow_first, iter(source), pool, window=4)
+        first = next(results)
+        pulled_at_first = source.pulled
+        rest = list(results)
+
+    assert first == 0 and rest == [i * 10 for i in range(1, 20)]
+    assert pulled_at_first <= 4  # backpressure: at most `window` in flight
+
+
+def test_ordered_map_stops_pulling_when_the_consumer_stops():
+    source = _Source(100)
+    calls = []
+    lock = threading.Lock()
+
+    def _record(i):
+        with lock:
+            calls.append(i)
+        return i
+
+    with ThreadPoolExecutor(2) as pool:
+        results = ordered_map(_record, iter(source), pool, window=2)
+        assert list(itertools.islice(results, 3)) == [0, 1, 2]
+        results.close()
+
+    assert source.pulled <= 5
+    assert len(calls) <= 5
+
+
+def test_ordered_map_passes_error_items_through():
+    def _parse(i):
+        return {"error": f"bad {i}"} if i % 2 else {"value": i}
+
+    with ThreadPoolExecutor(2) as pool:
+        results = list(ordered_map(_parse, range(4), pool, window=2))
+
+    assert results == [{"value": 0}, {"error": "bad 1"}, {"value": 2}, {"error": "bad 3"}]
+
+
+def test_search_agent_stream_is_lazy_and_closes_upstream_on_early_stop(monkeypatch):
+    source = _Source(50)
+
+    def _iter_search(queries, max_results, use_cache):
+        for i in source:
+            yield {"arxiv_id": f"2401.{i:05d}", "title": f"paper {i}"}
+
+    monkeypatch.setattr(search_agent, "iter_search", _iter_search)
+    stream = SearchAgent().run_stream({"query": "graphs", "max_results": 50})
+
+    papers = list(itertools.islice(stream, 3))
+    stream.close()
+
+    assert [p["arxiv_id"] for p in papers] == ["2401.00000", "2401.00001", "2401.00002"]
+    assert source.pulled == 3 and source.closed
@@ -0,0 +1,111 @@
+import re
+import threading
+import time
+
+import pytest
+
+from agents.summariser_agent import tools
+from utils.tokens import count_tokens
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Section prompts answer "- s<n>" (later sections answer sooner); merge prompts echo their input."""
+    calls = []
+    failing = set()
+    lock = threading.Lock()
+
+    def _chat(messages, model, temperature, max_tokens, validate=None, **kwargs):
+        prompt = messages[-1]["content"]
+        with lock:
+            calls.append(prompt)
+        section = re.match(r"This is section (\d+) of (\d+)", prompt)
+        if section:
+            index, total = int(section.group(1)), int(section.group(2))
+            if index in failing:
+                raise RuntimeError("rate limited")
+            time.sleep(0.01 * (total - index))  # finish out of order
+            return f"- s{index}"
+        if prompt.startswith("Below are bullet-point summaries"):
+            return "merged: " + " | ".join(prompt.split("\n\n")[1:])
+        return "- whole paper"
+
+    monkeypatch.setattr(tools, "chat", _chat)
+    return calls, failing
+
+
+def _paper(paragraphs, words=40):
+    return "\n\n".join(f"para{i} " + "graph neural networks " * (words // 3) for i in range(paragraphs))
+
+
+def test_chunks_keep_paragraphs_whole_within_the_budget_without_overlap():
+    text = _paper(12)
+
+    chunks = tools.split_into_chunks(text, chunk_tokens=150)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(c) <= 150 for c in chunks)
+    # every paragraph lands in exactly one chunk, in order
+    assert "\n\n".join(chunks) == text
+    assert all(c.startswith("para") for c in chunks)
+
+
+def test_oversized_paragraph_is_cut_at_the_budget():
+    text = "short intro\n\n" + "token " * 500
+
+    chunks = tools.split_into_chunks(text, chunk_tokens=100)
+
+    assert chunks[0].startswith("short intro")
+    assert all(count_tokens(c) <= 100 for c in chunks)
+    assert sum(c.count("token") for c in chunks) == 500
+
+
+def test_short_text_takes_one_call(fake_llm):
+    calls, _ = fake_llm
+
+    assert tools.summarise_text("A short abstract about graphs.") == "- whole paper"
+    assert len(calls) == 1 and calls[0].startswith("Summarize the following scientific paper")
+
+
+def test_sections_are_merged_in_document_order(fake_llm):
+    calls, _ = fake_llm
+    text = _paper(12)
+    sections = len(tools.split_into_chunks(text, chunk_tokens=150))
+
+    summary = tools.summarise_text(text, chunk_tokens=150, max_workers=4)
+
+    assert summary == "merged: " + " | ".join(f"- s{i}" for i in range(1, sections + 1))
+    assert len(calls) == sections + 1
+
+
+def test_failed_section_is_left_out_of_the_merge(fake_llm):
+    _, failing = fake_llm
+    failing.add(2)
+    text = _paper(12)
+    sections = len(tools.split_into_chunks(text, chunk_tokens=150))
+
+    summary = tools.summarise_text(text, chunk_tokens=150)
+
+    assert summary == "merged: " + " | ".join(f"- s{i}" for i in range(1, sections + 1) if i != 2)
+
+
+def test_all_sections_failing_returns_empty(fake_llm):
+    calls, failing = fake_llm
+    failing.update(range(1, 100))
+
+    assert tools.summarise_text(_paper(12), chunk_tokens=150) == ""
+    assert not any(c.startswith("Below are") for c in calls)  # no merge call
+
+
+def test_partials_too_long_for_one_prompt_merge_in_rounds(fake_llm):
+    calls, _ = fake_llm
+    partials = [f"- point {i} " + "detail " * 30 for i in range(6)]
+
+    groups = len(tools.split_into_chunks("\n\n".join(partials), 150))
+
+    summary = tools._merge_summaries(partials, chunk_tokens=150, max_workers=2)
+
+    # one intermediate round over groups of partials, then the final merge in order
+    assert 1 < groups < len(partials)
+    assert len([c for c in calls if c.startswith("This is section")]) == groups
+    assert summary == "merged: " + " | ".join(f"- s{i}" for i in range(1, groups + 1))
@@ -0,0 +1,125 @@
+import time
+
+import fitz
+import pytest
+
+from agents.summariser_agent import summariser_agent
+from agents.summariser_agent.summariser_agent import SummariserAgent
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    from utils import artifact_store, vector_index
+
+    # stores open under tmp_path, not the repo's data/
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(artifact_store, "_store", None)
+    monkeypatch.setattr(vector_index, "_index", None)
+
+    def _summarise(text, max_workers=None):
+        title = text.split()[0]
+        time.sleep(0.3 if title == "paper1" else 0.0)  # the first paper finishes last
+        return f"- summary of {title}"
+
+    monkeypatch.setattr(summariser_agent, "summarise_text", _summarise)
+    agent = SummariserAgent(parse_workers=2, llm_workers=4, batch_tokens=0)
+    yield agent
+    agent.close()
+
+
+def _pdf(tmp_path, name):
+    path = tmp_path / f"{name}.pdf"
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), f"{name} studies graph neural networks.")
+    doc.save(str(path))
+    doc.close()
+    return {"title": name, "url": f"https://arxiv.org/abs/{name}", "file_path": str(path)}
+
+
+def test_summaries_come_out_in_input_order(agent, tmp_path):
+    pdfs = [_pdf(tmp_path, f"paper{i}") for i in range(1, 5)]
+
+    summaries = list(agent.run_stream({"pdfs": iter(pdfs)}))
+
+    assert [s["title"] for s in summaries] == ["paper1", "paper2", "paper3", "paper4"]
+    assert summaries[0]["summary"] == "- summary of paper1"
+
+
+def test_bad_pdf_does_not_drop_the_others(agent, tmp_path):
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"%PDF-1.4 not really a pdf")
+    pdfs = [
+        _pdf(tmp_path, "paper1"),
+        {"title": "broken", "file_path": str(broken)},
+        {"title": "missing", "file_path": str(tmp_path / "missing.pdf")},
+        _pdf(tmp_path, "paper2"),
+    ]
+
+    summaries = agent.run({"pdfs": pdfs})["summaries"]
+
+    assert [s["title"] for s in summaries] == ["paper1", "paper2"]
+
+
+def test_close_stops_the_parse_pool_and_the_agent_can_run_again(agent, tmp_path):
+    agent.run({"pdfs": [_pdf(tmp_path, "paper2")]})
+    pool = agent._parse_pool
+    assert pool is not None
+
+    agent.close()
+    assert agent._parse_pool is None
+    with pytest.raises(RuntimeError):
+        pool.submit(len, "x")  # shut down
+
+    # the next run starts a new pool
+    again = agent.run({"pdfs": [_pdf(tmp_path, "paper3")]})["summaries"]
+    assert [s["summary"] for s in again] == ["- summary of paper3"]
+    assert agent._parse_pool is not None and agent._parse_pool is not pool
+
+
+def test_stream_yields_before_the_pdfs_run_out(agent, tmp_path):
+    agent.queue_size = 2
+    pdfs = [_pdf(tmp_path, f"paper{i}") for i in range(2, 8)]
+    pulled = []
+
+    def _pdfs():
+        for pdf in pdfs:
+            pulled.append(pdf["title"])
+            yield pdf
+
+    stream = agent.run_stream({"pdfs": _pdfs()})
+
+    assert next(stream)["title"] == "paper2"
+    assert len(pulled) < len(pdfs)
+    assert [s["title"] for s in stream] == [f"paper{i}" for i in range(3, 8)]
+
+
+def test_papers_whose_pdf_gives_no_summary_fall_back_to_the_abstract(agent, tmp_path, monkeypatch):
+    def _batch(texts, max_docs=None):
+        # the LLM returns nothing for the "fails" paper's full text
+        return ["" if t.startswith("fails") else "- from " + t.split()[0] for t in texts]
+
+    monkeypatch.setattr(summariser_agent, "summarise_batch", _batch)
+    agent.batch_tokens = 1500
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"%PDF-1.4 not really a pdf")
+    scanned = tmp_path / "scanned.pdf"
+    doc = fitz.open()
+    doc.new_page()  # an image-only page: no text layer
+    doc.save(str(scanned))
+    doc.close()
+    pdfs = [
+        {**_pdf(tmp_path, "paper1"), "summary": "abstract1 about graphs."},
+        {"title": "broken", "file_path": str(broken), "summary": "abstract2 about graphs."},
+        {"title": "scanned", "file_path": str(scanned), "summary": "abstract3 about graphs."},
+        {**_pdf(tmp_path, "fails"), "summary": "abstract4 about graphs."},
+        {"title": "no abstract", "file_path": str(broken)},
+    ]
+
+    summaries = agent.run({"pdfs": pdfs})["summaries"]
+
+    assert [(s["title"], s["summary"], s.get("summary_source")) for s in summaries] == [
+        ("paper1", "- from paper1", None),
+        ("broken", "- from abstract2", "abstract"),
+        ("scanned", "- from abstract3", "abstract"),
+        ("fails", "- from abstract4", "abstract"),
+    ]
@@ -0,0 +1,124 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import workflow_executor
+from agents.base import BaseAgent
+from tools.base import BaseTool
+from utils import tracing
+from utils.upstream import Upstream
+from workflow_executor import WorkflowExecutor
+
+
+@pytest.fixture(autouse=True)
+def tracer(monkeypatch):
+    tracer = tracing.Tracer()
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+    return tracer
+
+
+class _EchoTool(BaseTool):
+    def __init__(self):
+        super().__init__("echo")
+
+    def run(self, input):
+        return {"status": "success", "result": input}
+
+
+class _FetchAgent(BaseAgent):
+    def __init__(self, task_id=None):
+        super().__init__(task_id=task_id)
+        self.tools = {"echo": _EchoTool()}
+        self.upstream = Upstream("example.org", rate=1000, burst=1000)
+
+    def run(self, input):
+        def _get():
+            tracing.add(bytes=100)
+            return "body"
+
+        self.upstream.call(_get)
+        return self.get_tool("echo").run(input)
+
+
+def test_spans_nest_and_carry_context(tracer):
+    agent = _FetchAgent(task_id="own-id")
+
+    with tracing.context(task_id="t1", item="paper-1"):
+        agent.run({"x": 1})
+    agent.run({"x": 2})  # outside any context: the agent's own task_id
+
+    spans = tracer.spans("t1")
+    by_kind = {s["kind"]: s for s in spans}
+    assert set(by_kind) == {"agent", "tool", "http"}
+    assert by_kind["agent"]["name"] == "_FetchAgent" and by_kind["agent"]["parent"] is None
+    assert by_kind["http"]["parent"] == by_kind["tool"]["parent"] == by_kind["agent"]["id"]
+    assert by_kind["http"]["name"] == "example.org" and by_kind["http"]["attrs"]["bytes"] == 100
+    assert all(s["item"] == "paper-1" for s in spans)
+    assert len(tracer.spans("own-id")) == 3
+
+
+def test_context_follows_work_into_thread_pools(tracer):
+    def _work(n):
+        with tracing.span(f"job{n}", "internal"):
+            return n
+
+    with tracing.context(task_id="t2"), ThreadPoolExecutor(2) as pool:
+        list(pool.map(tracing.propagate(_work), range(3)))
+        tracing.submit(pool, _work, 3).result()
+        pool.submit(_work, 4).result()  # not propagated
+
+    assert sorted(s["name"] for s in tracer.spans("t2")) == ["job0", "job1", "job2", "job3"]
+
+
+def test_executor_attributes_spans_to_steps_and_items(tracer, monkeypatch):
+    class _Agent:
+        def __init__(self, name):
+            self.name = name
+
+        def close(self):
+            pass
+
+        def run(self, data):
+            with tracing.span(self.name, "agent"):
+                if self.name == "SearchAgent":
+                    return {"papers": ["a", "b"]}
+                return {"pdfs": [p + ".pdf" for p in data["papers"]]}
+
+    monkeypatch.setattr(workflow_executor, "create_agent", lambda name, task_id=None: _Agent(name))
+    config = {"workflow": [
+        {"id": "search", "agent": "SearchAgent"},
+        {"id": "download", "agent": "PDFDownloaderAgent", "foreach": "search.papers"},
+    ]}
+
+    WorkflowExecutor(config, task_id="t3").run()
+
+    spans = tracer.spans("t3")
+    assert sorted((s["step"], s["item"]) for s in spans) == [("download", "0"), ("download", "1"), ("search", None)]
+
+
+def test_exports_and_stage_breakdown(tracer, tmp_path):
+    with tracing.context(task_id="t4"):
+        for tokens in (10, 30):
+            with tracing.span("llama3-70b-8192", "llm"):
+                tracing.annotate(prompt_tokens=tokens, completion_tokens=5)
+        with pytest.raises(ValueError):
+            with tracing.span("arxiv.org", "http"):
+                raise ValueError("boom")
+    spans = tracer.spans("t4")
+
+    rows = {r["stage"]: r for r in tracing.stage_breakdown(spans)}
+    assert rows["llm:llama3-70b-8192"]["count"] == 2 and rows["llm:llama3-70b-8192"]["tokens"] == 50
+    assert rows["http:arxiv.org"]["errors"] == 1
+
+    lines = open(tracing.export(spans, str(tmp_path / "trace.jsonl"))).read().splitlines()
+    assert [json.loads(line)["kind"] for line in lines] == ["llm", "llm", "http"]
+
+    with open(tracing.export(spans, str(tmp_path / "trace.json"))) as f:
+        events = json.load(f)["traceEvents"]
+    complete = [e for e in events if e["ph"] == "X"]
+    assert len(complete) == 3 and complete[0]["cat"] == "llm" and complete[0]["args"]["prompt_tokens"] == 10
+    assert any(e["ph"] == "M" and e["name"] == "thread_name" for e in events)
+
+    tracer.clear("t4")
+    assert tracer.spans("t4") == []
@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utils import upstream
+from utils.upstream import CircuitOpenError, TokenBucket, Upstream, parse_duration
+
+
+class _FlakyStandIn(BaseHTTPRequestHandler):
+    """Answers with the next status from `script` (then 200s); 429s carry Retry-After."""
+
+    script = []
+    hits = []
+    lock = threading.Lock()
+
+    def _reply(self):
+        with self.lock:
+            status = self.script.pop(0) if self.script else 200
+            self.hits.append((self.path, status, time.monotonic()))
+        if status == 200 and self.path.endswith("/chat/completions"):
+            body = json.dumps({
+                "id": "c1", "object": "chat.completion", "created": 0, "model": "m",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "stand-in summary"}}],
+            }).encode()
+        else:
+            body = b"ok" if status == 200 else b"{}"
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "0.2")
+        self.send_header("x-ratelimit-remaining-requests", "50")
+        self.send_header("x-ratelimit-reset-requests", "10s")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _FlakyStandIn.script = []
+    _FlakyStandIn.hits = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    yield f"http://{host}:{port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _upstream(url, **kwargs):
+    return Upstream(url.split("://")[1], **{"backoff_base": 0.01, **kwargs})
+
+
+def _get(up, url):
+    """GET through `up`; retryable statuses raise inside the retry loop, like requests callers do."""
+
+    def _send():
+        response = requests.get(url)
+        if response.status_code in upstream.RETRY_STATUSES:
+            raise requests.HTTPError(f"{response.status_code} from {url}", response=response)
+        return response
+
+    return up.call(_send)
+
+
+def test_429_pauses_for_retry_after_and_slows_the_bucket(server):
+    _FlakyStandIn.script = [429]
+    up = _upstream(server, rate=100, burst=100)
+
+    response = _get(up, server + "/x")
+
+    assert response.status_code == 200
+    (_, first, t0), (_, second, t1) = _FlakyStandIn.hits
+    assert (first, second) == (429, 200)
+    assert t1 - t0 >= 0.2
+    assert up.bucket.rate < 100
+    assert up.breaker.state == "closed"
+
+
+def test_5xx_is_retried_with_backoff_and_4xx_is_not(server):
+    _FlakyStandIn.script = [503, 502]
+    up = _upstream(server)
+    assert _get(up, server + "/a").status_code == 200
+    assert [status for _, status, _ in _FlakyStandIn.hits] == [503, 502, 200]
+
+    _FlakyStandIn.script = [404]
+    assert _get(up, server + "/b").status_code == 404
+    assert len(_FlakyStandIn.hits) == 4
+
+
+def test_circuit_opens_then_probes_after_reset_timeout(server):
+    _FlakyStandIn.script = [500] * 4
+    up = _upstream(server, max_attempts=2, failure_threshold=3, reset_timeout=0.3)
+
+    with pytest.raises(requests.HTTPError):
+        _get(up, server + "/down")
+    with pytest.raises(CircuitOpenError):
+        _get(up, server + "/down")  # third failure opens the circuit mid-call
+    sent = len(_FlakyStandIn.hits)
+    with pytest.raises(CircuitOpenError):
+        _get(up, server + "/down")
+    assert len(_FlakyStandIn.hits) == sent  # shed without touching the server
+
+    time.sleep(0.35)
+    _FlakyStandIn.script = []
+    assert _get(up, server + "/down").status_code == 200
+    assert up.breaker.state == "closed"
+
+
+def test_token_bucket_paces_after_the_burst_and_follows_headers():
+    bucket = TokenBucket(rate=20, burst=2)
+    started = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # 2 immediate, then 4 more at 20/s
+    assert 0.15 <= time.monotonic() - started < 0.5
+
+    bucket.observe({"x-ratelimit-remaining-requests": "30", "x-ratelimit-reset-requests": "10s"})
+    assert bucket.rate == pytest.approx(3.0)
+
+
+def test_parse_duration():
+    assert parse_duration("2") == 2.0
+    assert parse_duration("2m59.5s") == pytest.approx(179.5)
+    assert parse_duration("120ms") == pytest.approx(0.12)
+    assert parse_duration("soon") is None
+
+
+def test_groq_calls_go_through_the_upstream(server):
+    from groq import Groq
+
+    from utils.llm import chat
+
+    _FlakyStandIn.script = [429]
+    client = Groq(api_key="test", base_url=server, max_retries=0)
+
+    content = chat([{"role": "user", "content": "hi"}], client=client, use_cache=False)
+
+    assert content == "stand-in summary"
+    assert [status for _, status, _ in _FlakyStandIn.hits] == [429, 200]
+    assert upstream.get_upstream(server).bucket.rate < upstream.DEFAULT_LIMITS["rate"]
@@ -0,0 +1,85 @@
+import fitz
+import pytest
+
+from tools.pdf_parser import PDFParserTool
+from tools.vector_search import VectorSearchTool
+from utils.artifact_store import ArtifactStore
+from utils.vector_index import VectorIndex
+
+DOCS = {
+    "2401.00001": "Graph neural networks for molecule property prediction and drug discovery.",
+    "2401.00002": "Large language models follow instructions after reinforcement learning from human feedback.",
+    "2401.00003": "Diffusion models generate images by iteratively denoising gaussian noise.",
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = VectorIndex(root=str(tmp_path / "index"))
+    for arxiv_id, text in DOCS.items():
+        idx.add(f"summary:{arxiv_id}", text, kind="summary", arxiv_id=arxiv_id + "v1", title=arxiv_id)
+    return idx
+
+
+def test_search_ranks_the_matching_document_first(index):
+    results = index.search("language models and human feedback", k=2)
+
+    assert results[0]["arxiv_id"] == "2401.00002"
+    assert results[0]["text"] == DOCS["2401.00002"]
+    assert results[0]["score"] > (results[1]["score"] if len(results) > 1 else 0)
+
+
+def test_unchanged_documents_are_skipped_and_changed_ones_rewritten(index, tmp_path):
+    assert index.add("summary:2401.00001", DOCS["2401.00001"], kind="summary") is False
+    assert index.add("summary:2401.00003", "Protein folding with transformers.", kind="summary") is True
+    assert len(index) == 3
+
+    # persisted: a fresh handle over the same files sees the rewrite
+    reopened = VectorIndex(root=str(tmp_path / "index"))
+    assert reopened.search("protein folding", k=1)[0]["doc_id"] == "summary:2401.00003"
+    assert reopened.search("denoising gaussian noise", k=1) == []
+
+
+def test_missing_ignores_versions_and_keeps_order(index):
+    assert index.missing(["2402.99999v1", "2401.00002v3", "2401.00009"]) == ["2402.99999v1", "2401.00009"]
+
+
+def test_parser_text_is_indexed_in_chunks_and_searchable_by_kind(index, tmp_path):
+    path = tmp_path / "paper.pdf"
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Quantum error correction with surface codes")
+    doc.save(str(path))
+    doc.close()
+
+    parser = PDFParserTool(store=ArtifactStore(root=str(tmp_path / "artifacts")), index=index)
+    assert parser.run({"pdf_path": str(path)})["status"] == "success"
+
+    tool = VectorSearchTool(index=index)
+    found = tool.run({"query": "surface codes", "kind": "text"})
+    assert [r["title"] for r in found["results"]] == ["paper.pdf"]
+    assert tool.run({"query": "surface codes", "kind": "summary"})["results"] == []
+    assert tool.run({"action": "missing", "arxiv_ids": ["2401.00001"]})["missing"] == []
+
+
+def test_shrinking_text_drops_stale_chunks(index):
+    long_text = " ".join(f"word{i}" for i in range(450))  # three passages
+    assert index.add_text("doc", long_text) == 3
+    index.add_text("doc", "word1 word2 shrunk")
+
+    assert [r["doc_id"] for r in index.search("word400 word401", kind="text")] == []
+    assert [r["doc_id"] for r in index.search("shrunk", kind="text")] == ["text:doc:0"]
+    assert index.add("summary:2401.00004", "Sparse attention kernels.", kind="summary") is True
+    assert index.search("sparse attention kernels")[0]["doc_id"] == "summary:2401.00004"
+
+
+def test_processes_sharing_an_index_get_distinct_rows(tmp_path):
+    root = str(tmp_path / "index")
+    a, b = VectorIndex(root=root), VectorIndex(root=root)  # separate connections, as in two processes
+
+    a.add("summary:1", "Graph neural networks for molecules.", kind="summary")
+    b.add("summary:2", "Diffusion models for images.", kind="summary")
+    a.add("summary:3", "Reinforcement learning from feedback.", kind="summary")
+
+    assert len(VectorIndex(root=root)) == 3
+    assert a.search("diffusion models images", k=1)[0]["doc_id"] == "summary:2"
+    assert b.search("graph neural molecules", k=1)[0]["doc_id"] == "summary:1"
@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+
+import pytest
+
+import worker
+from worker import QueueDir, Worker, read_jsonl_jobs
+
+
+class _Calls:
+    def __init__(self):
+        self.task_ids = []
+        self.configs = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = _Calls()
+
+    def _run_workflow(config, max_workers=8, task_id=None, pool=None):
+        with calls.lock:
+            calls.task_ids.append(task_id)
+            calls.configs.append(config)
+            calls.active += 1
+            calls.peak = max(calls.peak, calls.active)
+        time.sleep(0.1)
+        with calls.lock:
+            calls.active -= 1
+        query = config["workflow"][0]["params"]["query"]
+        if query == "boom":
+            return {"step1": {"status": "error", "message": "network down"}, "step2": {"status": "skipped"}}
+        return {"step1": {"papers": [query]}, "step2": {"report_path": f"reports/{query}.txt"}}
+
+    monkeypatch.setattr(worker, "run_workflow", _run_workflow)
+    return calls
+
+
+def _job(job_id, query):
+    return {"job_id": job_id, "workflow": [
+        {"agent": "SearchAgent", "params": {"query": query}},
+        {"agent": "WriterAgent"},
+    ]}
+
+
+def _records(path):
+    return list(read_jsonl_jobs(str(path)))
+
+
+def test_drains_jobs_concurrently_and_writes_one_record_each(calls, tmp_path):
+    out = tmp_path / "results.jsonl"
+    jobs = [_job(f"j{i}", f"q{i}") for i in range(6)] + [_job("bad", "boom")]
+
+    counts = Worker(str(out), concurrency=3, pool=object()).drain(jobs)
+
+    assert counts == {"success": 6, "error": 1, "skipped": 0}
+    assert calls.peak == 3
+    records = {r["job_id"]: r for r in _records(out)}
+    assert records["j0"]["status"] == "success" and records["j0"]["report_path"] == "reports/q0.txt"
+    assert records["j0"]["task_id"] == "job-j0"
+    assert records["bad"]["status"] == "error" and records["bad"]["steps"]["step2"] == "skipped"
+    # each job's report gets its own file name
+    report_names = sorted(c["workflow"][1]["params"]["report_name"].split("_")[-1] for c in calls.configs)
+    assert report_names == ["bad", "j0", "j1", "j2", "j3", "j4", "j5"]
+
+
+def test_restart_skips_succeeded_jobs_and_retries_failed_ones(calls, tmp_path):
+    out = tmp_path / "results.jsonl"
+    jobs_file = tmp_path / "jobs.jsonl"
+    jobs_file.write_text("\n".join(json.dumps(j) for j in [_job("a", "qa"), _job("bad", "boom")]) + "\nnot json\n")
+
+    Worker(str(out), pool=object()).drain(read_jsonl_jobs(str(jobs_file)))
+    counts = Worker(str(out), pool=object()).drain(read_jsonl_jobs(str(jobs_file)))
+
+    assert counts == {"success": 0, "error": 1, "skipped": 1}
+    assert calls.task_ids.count("job-a") == 1
+    assert calls.task_ids.count("job-bad") == 2
+
+
+def test_queue_dir_claims_and_acks_job_files(calls, tmp_path):
+    queue_root = tmp_path / "queue"
+    queue = QueueDir(str(queue_root))
+    (queue_root / "one.json").write_text(json.dumps(_job(None, "q1")))
+    (queue_root / "two.json").write_text(json.dumps(_job("two", "boom")))
+    (queue_root / "processing" / "left.json").write_text(json.dumps(_job(None, "q3")))
+
+    assert queue.requeue_stale() == 1
+    counts = Worker(str(tmp_path / "results.jsonl"), pool=object()).drain(queue.iter_jobs(), queue=queue)
+
+    assert counts["success"] == 2 and counts["error"] == 1
+    assert sorted(p.name for p in (queue_root / "done").iterdir()) == ["left.json", "one.json"]
+    assert [p.name for p in (queue_root / "failed").iterdir()] == ["two.json"]
+    assert list((queue_root / "processing").iterdir()) == []
+
+
+def test_queue_dir_fails_job_files_that_are_not_objects(calls, tmp_path):
+    queue_root = tmp_path / "queue"
+    queue = QueueDir(str(queue_root))
+    (queue_root / "a_list.json").write_text("[]")
+    (queue_root / "b_string.json").write_text('"x"')
+    (queue_root / "c_ok.json").write_text(json.dumps(_job(None, "q1")))
+
+    counts = Worker(str(tmp_path / "results.jsonl"), pool=object()).drain(queue.iter_jobs(), queue=queue)
+
+    assert counts["success"] == 1
+    assert sorted(p.name for p in (queue_root / "failed").iterdir()) == ["a_list.json", "b_string.json"]
+    assert [p.name for p in (queue_root / "done").iterdir()] == ["c_ok.json"]
+    assert list((queue_root / "processing").iterdir()) == []
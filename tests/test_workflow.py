@@ -1,49 +1,74 @@
-from agents.tool_agent.tool_agent import ToolAgent
-
-# Initialize ToolAgent with all tools
-agent = ToolAgent(tool_names=["web_search", "pdf_parser", "memory"])
-
-# 1. Search for papers
-search_result = agent.run({
-    "tool": "web_search",
-    "args": {"query": "graph neural networks"}
-})
-print("\n[Step 1] Search Result Keys:", search_result.keys())
-
-# Pick one paper
-papers = search_result["result"].get("papers", [])
-if not papers:
-    print("❌ No papers found.")
-    exit()
-paper = papers[0]
-pdf_url = paper["pdf_url"]
-
-print(f"\n[Step 2] Using first paper: {paper['title']}")
-
-# 2. Parse PDF
-parse_result = agent.run({
-    "tool": "pdf_parser",
-    "args": {"pdf_path": f"data/papers/{pdf_url.split('/')[-1]}"}
-})
-print("[Step 2] Parsed length:", parse_result["result"]["length"])
-
-paper_id = paper["pdf_url"].split("/")[-1].replace(".pdf", "")
-
-
-# 3. Store in Memory
-agent.run({
-    "tool": "memory",
-    "args": {
-        "action": "store",
-        "paper_id": paper["id"],
-        "key": "parsed_text",
-        "value": parse_result["result"]["text"][:500]  # just first 500 chars
+import pytest
+
+from benchmarks.standins import Corpus, FakeArxiv, FakeGroq, point_at
+
+
+@pytest.fixture
+def stand_ins(tmp_path, monkeypatch):
+    from utils import artifact_store, llm_cache, search_cache, vector_index
+
+    # fresh working directory, and no store opened under another one
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(artifact_store, "_store", None)
+    monkeypatch.setattr(llm_cache, "_cache", None)
+    monkeypatch.setattr(search_cache, "_cache", None)
+    monkeypatch.setattr(vector_index, "_index", None)
+    corpus = Corpus(size=5, pages=1)
+    with FakeArxiv(corpus) as arxiv, FakeGroq(latency=0) as groq, point_at(arxiv.url, groq.url):
+        yield corpus, arxiv, groq
+
+
+def test_tool_agent_search_parse_and_memory(stand_ins, tmp_path):
+    from agents.pdf_downloader_agent.tools import download_pdf
+    from agents.tool_agent.tool_agent import ToolAgent
+    from tools.memory import MemoryTool
+    from tools.pdf_parser import PDFParserTool
+    from tools.web_search import WebSearchTool
+    from utils.artifact_store import ArtifactStore
+    from utils.vector_index import VectorIndex
+
+    corpus, arxiv, _ = stand_ins
+    agent = ToolAgent(tool_names=[])
+    agent.tools = {
+        "web_search": WebSearchTool(),
+        "pdf_parser": PDFParserTool(store=ArtifactStore(str(tmp_path / "artifacts")), index=VectorIndex(str(tmp_path / "index"))),
+        "memory": MemoryTool(db_path=str(tmp_path / "memory.sqlite3")),
     }
-})
-
-# 4. Load from Memory
-load_result = agent.run({
-    "tool": "memory",
-    "args": {"action": "load", "paper_id": paper["id"], "key": "parsed_text"}
-})
-print("\n[Step 4] Loaded from memory:", load_result["result"][:200])
+
+    # 1. Search for papers
+    search_result = agent.run({"tool": "web_search", "args": {"query": "graph neural networks", "max_results": 2}})
+    papers = search_result["result"]["papers"]
+    assert len(papers) == 2 and papers[0]["arxiv_id"] in corpus.by_id
+
+    # 2. Download and parse the first one
+    pdf_path = download_pdf(papers[0]["url"], str(tmp_path / "papers"))
+    parse_result = agent.run({"tool": "pdf_parser", "args": {"pdf_path": pdf_path}})
+    assert parse_result["status"] == "success"
+    text = parse_result["result"]["text"]
+    assert papers[0]["title"].split(":")[0] in text
+
+    # 3. Store in memory and load it back
+    paper_id = papers[0]["arxiv_id"]
+    stored = agent.run({"tool": "memory", "args": {
+        "action": "write", "paper_id": paper_id, "key": "parsed_text", "data": text[:500],
+    }})
+    assert stored["result"]["status"] == "success"
+    loaded = agent.run({"tool": "memory", "args": {"action": "read", "paper_id": paper_id, "key": "parsed_text"}})
+    assert loaded["result"]["result"] == text[:500]
+    assert arxiv.counts == {"search": 1, "pdf": 1}
+    agent.tools["memory"].close()
+
+
+def test_main_pipeline_writes_a_report(stand_ins):
+    import glob
+
+    import main
+
+    _, arxiv, groq = stand_ins
+    main.main("graph neural networks")
+
+    reports = glob.glob("data/reports/*.txt")
+    assert len(reports) == 1
+    with open(reports[0], encoding="utf-8") as f:
+        assert "Number of Papers: 3" in f.read()
+    assert arxiv.counts["pdf"] == 3 and groq.counts["chat"] >= 1
@@ -0,0 +1,213 @@
+import threading
+import time
+
+import pytest
+
+import workflow_executor
+from workflow_executor import WorkflowExecutor, normalise_workflow
+
+
+class _FakeAgent:
+    """Stand-in agent: each name maps to a function of the input dict."""
+
+    log = []
+    lock = threading.Lock()
+
+    def __init__(self, name):
+        self.name = name
+
+    def run(self, data):
+        with self.lock:
+            self.log.append((self.name, "start", time.monotonic(), data))
+        output = BEHAVIOUR[self.name](data)
+        with self.lock:
+            self.log.append((self.name, "end", time.monotonic(), output))
+        return output
+
+
+def _search(data):
+    time.sleep(0.2)
+    return {"papers": [f"{data['query']}-{i}" for i in range(3)]}
+
+
+def _download(data):
+    paper = data["papers"][0]
+    time.sleep(0.3 if paper.endswith("-2") else 0.05)
+    return {"pdfs": [paper + ".pdf"]}
+
+
+def _summarise(data):
+    return {"summaries": [p + ":summary" for p in data["pdfs"]]}
+
+
+def _fail(data):
+    raise RuntimeError("boom")
+
+
+BEHAVIOUR = {
+    "SearchAgent": _search,
+    "PDFDownloaderAgent": _download,
+    "SummariserAgent": _summarise,
+    "WriterAgent": lambda data: {"report": sorted(data["summaries"])},
+    "FailingAgent": _fail,
+}
+
+
+@pytest.fixture(autouse=True)
+def fake_agents(monkeypatch):
+    _FakeAgent.log = []
+    monkeypatch.setattr(workflow_executor, "create_agent", lambda name, task_id=None: _FakeAgent(name))
+
+
+def test_legacy_linear_workflow_chains_outputs():
+    results = WorkflowExecutor({"workflow": [
+        {"agent": "SearchAgent", "params": {"query": "q"}},
+        {"agent": "PDFDownloaderAgent", "params": {}, "foreach": "step1.papers"},
+        {"agent": "SummariserAgent", "params": {}},
+    ]}).run()
+
+    assert results["step2"] == {"pdfs": ["q-0.pdf", "q-1.pdf", "q-2.pdf"]}
+    assert results["step3"] == {"summaries": ["q-0.pdf:summary", "q-1.pdf:summary", "q-2.pdf:summary"]}
+
+
+def test_independent_steps_run_concurrently_and_items_stream():
+    started = time.monotonic()
+    results = WorkflowExecutor({"workflow": [
+        {"id": "a", "agent": "SearchAgent", "params": {"query": "a"}},
+        {"id": "b", "agent": "SearchAgent", "params": {"query": "b"}},
+        {"id": "dl", "agent": "PDFDownloaderAgent", "foreach": "a.papers"},
+        {"id": "sum", "agent": "SummariserAgent", "foreach": "dl.pdfs"},
+        {"id": "report", "agent": "WriterAgent", "depends_on": ["sum", "b"], "inputs": {"summaries": "sum.summaries"}},
+    ]}).run()
+    elapsed = time.monotonic() - started
+
+    assert results["report"] == {"report": ["a-0.pdf:summary", "a-1.pdf:summary", "a-2.pdf:summary"]}
+    # critical path: search (0.2) + slowest download (0.3), not the sum of every step
+    assert elapsed < 0.8
+
+    first_summary = min(t for name, kind, t, _ in _FakeAgent.log if name == "SummariserAgent" and kind == "start")
+    slow_download_end = max(t for name, kind, t, _ in _FakeAgent.log if name == "PDFDownloaderAgent" and kind == "end")
+    assert first_summary < slow_download_end
+
+
+def test_failed_step_skips_dependents_but_not_siblings():
+    results = WorkflowExecutor({"workflow": [
+        {"id": "bad", "agent": "FailingAgent"},
+        {"id": "after_bad", "agent": "WriterAgent", "depends_on": ["bad"]},
+        {"id": "search", "agent": "SearchAgent", "params": {"query": "ok"}},
+    ]}).run()
+
+    assert results["bad"] == {"status": "error", "message": "boom"}
+    assert results["after_bad"]["status"] == "skipped"
+    assert results["search"]["papers"] == ["ok-0", "ok-1", "ok-2"]
+
+
+def test_rejects_cycles_and_unknown_dependencies():
+    with pytest.raises(ValueError, match="cycle"):
+        normalise_workflow({"workflow": [
+            {"id": "a", "agent": "SearchAgent", "depends_on": ["b"]},
+            {"id": "b", "agent": "SearchAgent", "depends_on": ["a"]},
+        ]})
+    with pytest.raises(ValueError, match="unknown step"):
+        normalise_workflow({"workflow": [{"id": "a", "agent": "SearchAgent", "depends_on": ["zzz"]}]})
+
+
+def test_shared_pool_reuses_agents_across_runs_until_closed(monkeypatch):
+    created = []
+    closed = []
+
+    class _PooledAgent(_FakeAgent):
+        def close(self):
+            closed.append(self.name)
+
+    def _create(name, task_id=None):
+        created.append(name)
+        return _PooledAgent(name)
+
+    monkeypatch.setattr(workflow_executor, "create_agent", _create)
+    pool = workflow_executor.AgentPool()
+    config = {"workflow": [
+        {"id": "a", "agent": "SearchAgent", "params": {"query": "a"}},
+        {"id": "b", "agent": "SearchAgent", "params": {"query": "b"}},
+    ]}
+
+    WorkflowExecutor(config, pool=pool).run()
+    WorkflowExecutor(config, pool=pool).run()
+    assert created == ["SearchAgent"]
+    assert closed == []
+
+    pool.close(shared=False)
+    assert closed == ["SearchAgent"]
+    WorkflowExecutor(config, pool=pool).run()
+    assert created == ["SearchAgent", "SearchAgent"]
+
+
+def test_rerun_with_same_task_id_resumes_from_checkpoints(tmp_path):
+    from utils.checkpoints import CheckpointStore
+
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    flaky = {"q-1.pdf": 1}
+
+    def _flaky_summarise(data):
+        pdf = data["pdfs"][0]
+        if flaky.get(pdf):
+            flaky[pdf] -= 1
+            raise RuntimeError("network down")
+        return _summarise(data)
+
+    BEHAVIOUR["FlakySummariser"] = _flaky_summarise
+    config = {"workflow": [
+        {"id": "search", "agent": "SearchAgent", "params": {"query": "q"}},
+        {"id": "dl", "agent": "PDFDownloaderAgent", "foreach": "search.papers"},
+        {"id": "sum", "agent": "FlakySummariser", "foreach": "dl.pdfs"},
+    ]}
+
+    def _runs(name):
+        return sum(1 for n, kind, _, _ in _FakeAgent.log if n == name and kind == "start")
+
+    try:
+        first = WorkflowExecutor(config, task_id="t1", checkpoints=store).run()
+        assert first["sum"]["summaries"] == ["q-0.pdf:summary", "q-2.pdf:summary"]
+        assert store.summary("t1") == {"done": 6, "failed": 1}
+
+        _FakeAgent.log = []
+        second = WorkflowExecutor(config, task_id="t1", checkpoints=store).run()
+        assert second["sum"]["summaries"] == ["q-0.pdf:summary", "q-1.pdf:summary", "q-2.pdf:summary"]
+        # only the failed item ran again
+        assert (_runs("SearchAgent"), _runs("PDFDownloaderAgent"), _runs("FlakySummariser")) == (0, 0, 1)
+
+        _FakeAgent.log = []
+        WorkflowExecutor(config, task_id="t1", checkpoints=store).run()
+        assert _FakeAgent.log == []
+        assert store.load_config("t1") == config
+
+        # a different task_id starts from scratch
+        WorkflowExecutor(config, task_id="t2", checkpoints=store).run()
+        assert _runs("SearchAgent") == 1
+    finally:
+        del BEHAVIOUR["FlakySummariser"]
+
+
+def test_pooled_agents_see_the_task_id_of_the_run_they_serve(monkeypatch):
+    from agents.base import BaseAgent
+
+    class _Agent(BaseAgent):
+        def run(self, data):
+            time.sleep(0.05)  # overlap the two runs
+            return {"task_id": self.task_id}
+
+    monkeypatch.setattr(workflow_executor, "create_agent", lambda name, task_id=None: _Agent(name, task_id=task_id))
+    pool = workflow_executor.AgentPool()
+    config = {"workflow": [{"id": "a", "agent": "SearchAgent"}]}
+    results = {}
+
+    def _run(task_id):
+        results[task_id] = WorkflowExecutor(config, task_id=task_id, pool=pool).run()["a"]["task_id"]
+
+    threads = [threading.Thread(target=_run, args=(t,)) for t in ("job-1", "job-2")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {"job-1": "job-1", "job-2": "job-2"}
@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+from agents.writer_agent.writer_agent import WriterAgent
+
+SUMMARIES = [{"title": "Graphs", "url": "https://arxiv.org/abs/2401.00001", "summary": "- a point"}]
+
+
+@pytest.fixture
+def writer(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return WriterAgent()
+
+
+@pytest.mark.parametrize("name", ["../../escaped", "/etc/passwd", "a/b\\c d", ".hidden"])
+def test_report_name_cannot_leave_the_reports_directory(writer, tmp_path, name):
+    path = writer.run({"summaries": SUMMARIES, "report_name": name})["report_path"]
+
+    assert os.path.dirname(path) == writer.output_dir
+    assert not os.path.basename(path).startswith(".")
+    assert os.path.realpath(path).startswith(str(tmp_path / "data" / "reports"))
+
+
+def test_job_report_name_is_kept(writer):
+    path = writer.run({"summaries": SUMMARIES, "report_name": "2026-10-18_job-1"})["report_path"]
+
+    assert path == os.path.join("data/reports", "2026-10-18_job-1.txt")
@@ -1,14 +1,17 @@
 # tools/__init__.py
+# Tool modules are imported on first use (see tools.load_tools.TOOLS), so
+# importing this package stays cheap.
 
 from tools.base import BaseTool
-from tools.pdf_parser import PDFParserTool
-from tools.memory import MemoryTool
-from tools.web_search import WebSearchTool
-
-def load_tools(task_id: str) -> dict:
-    """Returns a dictionary of tool_name -> tool_instance."""
-    return {
-        "pdf_parser": PDFParserTool(task_id),
-        "memory": MemoryTool(task_id),
-        "web_search": WebSearchTool(task_id),
-    }
+from tools.load_tools import TOOLS, get_tool, load_tools
+
+__all__ = ["BaseTool", "TOOLS", "get_tool", "load_tools"]
+
+
+def __getattr__(name: str):
+    # keep `from tools import PDFParserTool` working without eager imports
+    for tool_name in TOOLS.names():
+        cls = TOOLS.load(tool_name)
+        if cls.__name__ == name:
+            return cls
+    raise AttributeError(f"module 'tools' has no attribute '{name}'")
@@ -2,10 +2,30 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any
 
+from utils.tracing import traced_run
+
+
 class BaseTool(ABC):
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # every run() is timed as a "tool" span (see utils.tracing)
+        if "run" in cls.__dict__:
+            cls.run = traced_run("tool")(cls.__dict__["run"])
+
     def __init__(self, name: str):
         self.name = name
 
+    def open(self) -> None:
+        """
+        Acquire long-lived resources (sessions, DB handles).
+        Must be idempotent; the default has nothing to open.
+        """
+
+    def close(self) -> None:
+        """
+        Release what open() acquired. A closed tool may be opened again.
+        """
+
     @abstractmethod
     def run(self, input: Dict[str, Any]) -> Dict[str, Any]:
         """
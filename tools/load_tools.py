@@ -1,43 +1,73 @@
+import threading
 from typing import List, Dict, Optional
 from .base import BaseTool
 from utils.logger import log_error ,log_info , log_warn
+from utils.registry import TOOL_GROUP, Registry
+
+# tool name -> "module:Class", imported the first time the tool is used
+TOOLS = Registry(TOOL_GROUP, {
+    "pdf_parser": "tools.pdf_parser:PDFParserTool",
+    "memory": "tools.memory:MemoryTool",
+    "web_search": "tools.web_search:WebSearchTool",
+    "vector_search": "tools.vector_search:VectorSearchTool",
+})
+DEFAULT_TOOLS = ["pdf_parser", "memory", "web_search"]
+
+_instances: Dict[str, BaseTool] = {}
+_instances_lock = threading.Lock()
+
+
+def get_tool(tool_name: str) -> BaseTool:
+    """
+    Return the process-wide instance of a tool, creating it on first use.
+    Every agent shares it, along with its connections and caches.
+    """
+    with _instances_lock:
+        if tool_name not in _instances:
+            cls = TOOLS.load(tool_name)
+            tool = cls(name=tool_name)
+            tool.open()
+            _instances[tool_name] = tool
+            log_info(f"[LoadTools] ✅ Loaded {cls.__name__}")
+        return _instances[tool_name]
+
+
+def close_tools() -> None:
+    """Close every shared tool and drop it; later get_tool() calls build fresh ones."""
+    with _instances_lock:
+        tools = list(_instances.values())
+        _instances.clear()
+    for tool in tools:
+        try:
+            tool.close()
+        except Exception as e:
+            log_warn(f"[LoadTools] ⚠️ Failed to close tool '{tool.name}': {e}")
+
 
 def load_tools(use: Optional[List[str]] = None) -> Dict[str, BaseTool]:
     """
-    Initialize and return the selected tools.
+    Return the selected tools (shared instances, see get_tool).
 
     Arguments:
-        use: List of tool names to load. 
-            Options: "pdf_parser", "memory", "web_search".
+        use: List of tool names to load (None for DEFAULT_TOOLS).
+            Options: any name in TOOLS, e.g. "pdf_parser", "memory",
+            "web_search", "vector_search", or one provided by an installed
+            package under the "agentflow.tools" entry-point group.
 
     Returns:
         Dict mapping tool name to initialized tool instance.
     """
 
-    use = use or ["pdf_parser", "memory", "web_search"]
+    # an explicit empty list means "no tools"; only None selects the defaults
+    use = DEFAULT_TOOLS if use is None else use
     tools: Dict[str, BaseTool] = {}
 
     for tool_name in use:
         try:
-            if tool_name == "pdf_parser":
-                from .pdf_parser import PDFParserTool
-                tools["pdf_parser"] = PDFParserTool(name="pdf_parser")
-                log_info("[LoadTools] ✅ Loaded PDFParserTool")
-
-            elif tool_name == "memory":
-                from .memory import MemoryTool
-                tools["memory"] = MemoryTool(name="memory")
-                log_info("[LoadTools] ✅ Loaded MemoryTool")
-
-            elif tool_name == "web_search":
-                from .web_search import WebSearchTool
-                tools["web_search"] = WebSearchTool(name="web_search")
-                log_info("[LoadTools] ✅ Loaded WebSearchTool")
-            
-            else:
-                log_warn(f"[LoadTools] ⚠️ Unknown tool requested: '{tool_name}'")
-
+            tools[tool_name] = get_tool(tool_name)
+        except KeyError:
+            log_warn(f"[LoadTools] ⚠️ Unknown tool requested: '{tool_name}'")
         except Exception as e:
-            log_error(f"LoadTools] ❌ Failed to load tool '{tool_name}': {e}")
+            log_error(f"[LoadTools] ❌ Failed to load tool '{tool_name}': {e}")
 
     return tools
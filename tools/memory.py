@@ -1,82 +1,148 @@
 import os
 import json
-from typing import Dict, Any, Optional
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional
 from tools.base import BaseTool
-from utils.logger import log_info, log_warn ,log_error
+from utils.logger import log_debug, log_info, log_warn, log_error
+
+ACTIONS = ["write", "read", "delete", "list", "write_many", "read_many"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory (
+    paper_id TEXT NOT NULL,
+    key      TEXT NOT NULL,
+    value    TEXT,
+    PRIMARY KEY (paper_id, key)
+)
+"""
+
+
+def _is_item(item: Any) -> bool:
+    return isinstance(item, dict) and isinstance(item.get("paper_id"), str) and isinstance(item.get("key"), str)
 
 
 class MemoryTool(BaseTool):
-    def __init__(self, name: str = "memory"):
+    """
+    Shared key/value memory, addressed by (paper_id, key).
+
+    Backed by SQLite in WAL mode: point reads and writes go through the
+    primary-key index, and several worker processes can use the same file
+    at once. Values are stored as JSON text.
+    """
+
+    def __init__(self, name: str = "memory", db_path: str = "data/shared_memory.sqlite3"):
         super().__init__(name)
-        self.memory_file = "data/shared_memory.json"
-        os.makedirs("data", exist_ok=True)
-        if not os.path.exists(self.memory_file):
-            with open(self.memory_file, "w") as f:
-                json.dump({}, f)
+        self.db_path = db_path
+        self.legacy_file = os.path.join(os.path.dirname(db_path) or ".", "shared_memory.json")
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.open()
+
 
+    def open(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                return
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+        self._import_legacy_json()
 
-    def _read_memory(self) -> Dict[str, Dict[str, Any]]:
-        try:
-            with open(self.memory_file, "r") as f:
-                return json.load(f)
-        except Exception as e:
-            log_error(f"[MemoryTool] ❌ Failed to read memory: {e}")
-            return {}
 
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
 
-    def _write_memory(self, memory: Dict[str, Dict[str, Any]]) -> None:
-        try:
-            with open(self.memory_file, "w") as f:
-                json.dump(memory, f, indent=2)
-        except Exception as e:
-            log_error(f"[MemoryTool] ❌ Failed to write memory: {e}")
+
+    def _import_legacy_json(self) -> None:
+        """
+        One-time import of the old whole-file JSON memory into an empty
+        database; the file is then renamed to `*.imported` so entries deleted
+        later don't come back.
+        """
+        if not os.path.exists(self.legacy_file):
+            return
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM memory LIMIT 1").fetchone():
+                return
+            try:
+                with open(self.legacy_file, "r") as f:
+                    legacy = json.load(f)
+                rows = [
+                    (paper_id, key, json.dumps(value))
+                    for paper_id, entries in legacy.items()
+                    for key, value in entries.items()
+                ]
+                with self._conn:
+                    self._conn.executemany("INSERT OR REPLACE INTO memory VALUES (?, ?, ?)", rows)
+                try:
+                    os.replace(self.legacy_file, self.legacy_file + ".imported")
+                except FileNotFoundError:
+                    pass  # another process imported it at the same time
+                log_info(f"[MemoryTool] 📦 Imported {len(rows)} entries from {self.legacy_file}")
+            except Exception as e:
+                log_error(f"[MemoryTool] ❌ Failed to import legacy memory: {e}")
+
+
+    def _write_rows(self, rows: List[tuple]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO memory VALUES (?, ?, ?)", rows)
+
+
+    def _read_value(self, paper_id: str, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM memory WHERE paper_id = ? AND key = ?", (paper_id, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
 
 
     def run(self, input: Dict[str, Any]) -> Dict[str, Any]:
+        self.open()  # no-op unless the pool closed us
         action: Optional[str] = input.get("action")
         paper_id: Optional[str] = input.get("paper_id")
         key: Optional[str] = input.get("key")
 
         if not isinstance(action, str):
             return {"status": "error", "message": "Missing or invalid 'action' (must be string)"}
-        if action not in ["write", "read", "delete", "list"]:
+        if action not in ACTIONS:
             return {"status": "error", "message": f"Unknown action '{action}'"}
 
-        memory = self._read_memory()
-
         # 📝 Write
         if action == "write":
             if not isinstance(paper_id, str) or not isinstance(key, str):
                 return {"status": "error", "message": "'paper_id' and 'key' must be strings"}
-            data = input.get("data")
-            if paper_id not in memory:
-                memory[paper_id] = {}
-            memory[paper_id][key] = data
-            self._write_memory(memory)
-            log_info(f"[MemoryTool] ✅ Stored key='{key}' for paper_id='{paper_id}'")
+            self._write_rows([(paper_id, key, json.dumps(input.get("data")))])
+            log_debug("[MemoryTool] ✅ Stored key='%s' for paper_id='%s'", key, paper_id)
             return {"status": "success"}
 
         # 📖 Read
         elif action == "read":
             if not isinstance(paper_id, str) or not isinstance(key, str):
                 return {"status": "error", "message": "'paper_id' and 'key' must be strings"}
-            value = memory.get(paper_id, {}).get(key)
+            value = self._read_value(paper_id, key)
             if value is None:
-                log_warn(f"[MemoryTool] ⚠️ Key='{key}' not found for paper_id='{paper_id}'")
+                log_warn("[MemoryTool] ⚠️ Key='%s' not found for paper_id='%s'", key, paper_id)
                 return {"status": "not_found", "result": None}
-            log_info(f"[MemoryTool] ✅ Loaded key='{key}' for paper_id='{paper_id}'")
+            log_debug("[MemoryTool] ✅ Loaded key='%s' for paper_id='%s'", key, paper_id)
             return {"status": "success", "result": value}
-        
+
         # ❌ Delete
         elif action == "delete":
             if not isinstance(paper_id, str) or not isinstance(key, str):
                 return {"status": "error", "message": "'paper_id' and 'key' must be strings"}
-            if paper_id in memory and key in memory[paper_id]:
-                del memory[paper_id][key]
-                if not memory[paper_id]:  # cleanup empty dict
-                    del memory[paper_id]
-                self._write_memory(memory)
-                log_info(f"[MemoryTool] 🗑️ Deleted key='{key}' for paper_id='{paper_id}'")
+            with self._lock, self._conn:
+                deleted = self._conn.execute(
+                    "DELETE FROM memory WHERE paper_id = ? AND key = ?", (paper_id, key)
+                ).rowcount
+            if deleted:
+                log_debug("[MemoryTool] 🗑️ Deleted key='%s' for paper_id='%s'", key, paper_id)
                 return {"status": "success"}
             else:
                 return {"status": "not_found", "message": f"Key='{key}' not found"}
@@ -85,9 +151,38 @@ class MemoryTool(BaseTool):
         elif action == "list":
             if not isinstance(paper_id, str):
                 return {"status": "error", "message": "'paper_id' must be a string"}
-            keys = list(memory.get(paper_id, {}).keys())
-            log_info(f"[MemoryTool] 📋 Keys for paper_id='{paper_id}': {keys}")
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key FROM memory WHERE paper_id = ? ORDER BY rowid", (paper_id,)
+                ).fetchall()
+            keys = [row[0] for row in rows]
+            log_debug("[MemoryTool] 📋 %d keys for paper_id='%s'", len(keys), paper_id)
             return {"status": "success", "keys": keys}
 
-        
+        # 📝📝 Batch write: {"items": [{"paper_id", "key", "data"}, ...]} in one transaction
+        elif action == "write_many":
+            items = input.get("items")
+            if not isinstance(items, list):
+                return {"status": "error", "message": "'items' must be a list"}
+            rows = []
+            for item in items:
+                if not _is_item(item):
+                    return {"status": "error", "message": "Each item needs string 'paper_id' and 'key'"}
+                rows.append((item["paper_id"], item["key"], json.dumps(item.get("data"))))
+            self._write_rows(rows)
+            log_debug("[MemoryTool] ✅ Stored %d entries", len(rows))
+            return {"status": "success", "count": len(rows)}
 
+        # 📖📖 Batch read: {"items": [{"paper_id", "key"}, ...]} -> results in the same order
+        elif action == "read_many":
+            items = input.get("items")
+            if not isinstance(items, list):
+                return {"status": "error", "message": "'items' must be a list"}
+            results = []
+            for item in items:
+                if not _is_item(item):
+                    return {"status": "error", "message": "Each item needs string 'paper_id' and 'key'"}
+                results.append(self._read_value(item["paper_id"], item["key"]))
+            found = sum(value is not None for value in results)
+            log_debug("[MemoryTool] ✅ Loaded %d/%d entries", found, len(results))
+            return {"status": "success", "results": results}
@@ -1,20 +1,70 @@
 from .base import BaseTool
+from utils.artifact_store import ArtifactStore, get_store, hash_file
+from utils.vector_index import VectorIndex, get_vector_index
+from utils import pdf_text
 from utils.logger import log_error ,log_info , log_warn
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import glob
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 import os
+import time
 
-try:
-    import fitz #PyMuPDF
-    _HAVE_FITZ = True
-except ImportError:
-    fitz = None
-    _HAVE_FITZ = False
+DEFAULT_TIMEOUT = 60.0  # seconds per file in batch mode
+
+
+def _parse_worker(pdf_path: str) -> Tuple[Dict[int, str], int]:
+    """Runs in a pool process: parse every page."""
+    return pdf_text.parse_pages(pdf_path)
+
+
+def _terminate(pool: ProcessPoolExecutor) -> None:
+    """Stop a pool without waiting for its tasks (a timed-out parse may never finish)."""
+    terminate_workers = getattr(pool, "terminate_workers", None)  # Python 3.14+
+    if terminate_workers is not None:
+        terminate_workers()
+        return
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for proc in processes:
+        proc.terminate()
+        proc.join()
+
+
+def _optional_int(input: dict, key: str) -> Optional[int]:
+    """A non-negative integer input, or None when it is absent or null."""
+    value = input.get(key)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{key}' must be an integer")
+    if number < 0:
+        raise ValueError(f"'{key}' must not be negative")
+    return number
 
 
 class PDFParserTool(BaseTool):
-    def __init__(self, name: str = "pdf_parser"):
+    def __init__(
+        self,
+        name: str = "pdf_parser",
+        store: Optional[ArtifactStore] = None,
+        max_workers: Optional[int] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        index: Optional[VectorIndex] = None,
+    ):
         super().__init__(name)
+        self.store = store
+        self.index = index
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
 
     def run(self, input: dict) -> dict:
+        if input.get("pdf_paths") is not None or input.get("pdf_glob"):
+            return self._run_batch(input)
+
         pdf_path = input.get("pdf_path")
         if not pdf_path:
             return {"status":"error", "message":"Missing 'pdf_path' in input"}
@@ -22,27 +72,220 @@ class PDFParserTool(BaseTool):
         if not os.path.exists(pdf_path):
             return {"status":"error", "message": f"PDF file not found at: {pdf_path}"}
 
-        if not _HAVE_FITZ:
-            log_error("[PDFParserTool] ❌ PyMuPDF (fitz) not installed. Cannot parse PDFs.")
-            return {"status": "error", "message": "PyMuPDF not installed"}
-        
+        if not pdf_text.engine_available():
+            log_error("[PDFParserTool] ❌ Neither PyMuPDF nor PyPDF2 installed. Cannot parse PDFs.")
+            return {"status": "error", "message": "No PDF engine installed"}
+
+        # 🔹 Optional page range (0-based, end exclusive) and character budget
         try:
-            text = self.extract_text(pdf_path)
-            log_info(f"[PDFParserTool] ✅ Extracted {len(text)} characters from {pdf_path}")
+            first_page = _optional_int(input, "first_page") or 0
+            last_page = _optional_int(input, "last_page")
+            max_chars = _optional_int(input, "max_chars")
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+
+        try:
+            whole = not (first_page or last_page is not None or max_chars is not None)
+            pdf_hash = hash_file(pdf_path)
+            result = pdf_text.extract(
+                pdf_path,
+                first_page=first_page,
+                last_page=last_page,
+                max_chars=max_chars,
+                store=self.store if self.store is not None else get_store(),
+                pdf_hash=pdf_hash,
+                producer="PDFParserTool",
+            )
+            text = result["text"]
+            if whole:
+                self._index_text(pdf_path, pdf_hash, text)
+            cached = result["pages_parsed"] == 0
+            if cached:
+                log_info(f"[PDFParserTool] ⚡ Using cached pages for {pdf_path}")
+            else:
+                log_info(f"[PDFParserTool] ✅ Extracted {len(text)} characters from {pdf_path}")
             return {
                 "text": text,
                 "length": len(text),
-                "status": "success"
+                "page_count": result["page_count"],
+                "status": "success",
+                "cached": cached
             }
         except Exception as e:
             log_error(f"[PDFParserTool] ❌ Failed to parse {pdf_path}: {e}")
             return {"status": "error", "message": str(e)}
 
     def extract_text(self, pdf_path: str) -> str:
-        text_chunks = []
-        with fitz.open(pdf_path) as doc:
-            for page in doc:
-                page_text = page.get_text("text") 
-                if page_text:
-                    text_chunks.append(page_text.strip())
-        return "\n\n".join(text_chunks)
+        return pdf_text.extract_text(pdf_path, store=self.store or get_store(), producer="PDFParserTool")
+
+    # ---- batch mode ----------------------------------------------------------
+
+    def _run_batch(self, input: dict) -> dict:
+        """
+        Batch input: {"pdf_paths": [...]} or {"pdf_glob": "data/papers/*.pdf"}
+        (a directory means every PDF below it). Optional "timeout" per file
+        and "max_workers". Results come back in input order, one per path.
+        """
+        pdf_paths = input.get("pdf_paths")
+        if pdf_paths is None:
+            pattern = input["pdf_glob"]
+            if os.path.isdir(pattern):
+                pattern = os.path.join(pattern, "**", "*.pdf")
+            pdf_paths = sorted(glob.glob(pattern, recursive=True))
+        if not isinstance(pdf_paths, list):
+            return {"status": "error", "message": "'pdf_paths' must be a list"}
+        try:
+            max_workers = _optional_int(input, "max_workers")
+            timeout = float(input["timeout"]) if input.get("timeout") is not None else None
+        except (TypeError, ValueError) as e:
+            return {"status": "error", "message": str(e)}
+
+        if not pdf_text.engine_available():
+            log_error("[PDFParserTool] ❌ Neither PyMuPDF nor PyPDF2 installed. Cannot parse PDFs.")
+            return {"status": "error", "message": "No PDF engine installed"}
+
+        results: List[Dict[str, Any]] = [{}] * len(pdf_paths)
+        for i, result in self._iter_indexed(pdf_paths, timeout, max_workers):
+            results[i] = result
+        ok = sum(r["status"] == "success" for r in results)
+        log_info(f"[PDFParserTool] ✅ Parsed {ok}/{len(results)} PDFs")
+        return {"status": "success", "results": results, "count": len(results), "succeeded": ok}
+
+    def iter_batch(
+        self,
+        pdf_paths: List[str],
+        timeout: Optional[float] = None,
+        max_workers: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Parse many PDFs on a pool of at most `max_workers` processes, yielding
+        each result as soon as its file finishes. A file still running after
+        `timeout` seconds fails and the pool is replaced (its other files are
+        re-run), so one pathological PDF cannot stall the batch.
+        """
+        for _, result in self._iter_indexed(pdf_paths, timeout, max_workers):
+            yield result
+
+    def _iter_indexed(
+        self,
+        pdf_paths: List[str],
+        timeout: Optional[float] = None,
+        max_workers: Optional[int] = None,
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """iter_batch as (input index, result) pairs; a file listed twice is parsed once."""
+        store = self.store if self.store is not None else get_store()
+        timeout = self.timeout if timeout is None else timeout
+        max_workers = max(1, max_workers or self.max_workers)
+        waiting: Dict[str, List[Tuple[int, str]]] = {}  # content hash -> (index, path) of each copy
+        queue: deque = deque()  # (content hash, attempt)
+
+        for i, pdf_path in enumerate(pdf_paths):
+            if not os.path.exists(pdf_path):
+                yield i, {"pdf_path": pdf_path, "status": "error", "message": f"PDF file not found at: {pdf_path}"}
+                continue
+            pdf_hash = hash_file(pdf_path)
+            if pdf_hash in waiting:
+                waiting[pdf_hash].append((i, pdf_path))
+                continue
+            pages, page_count = pdf_text.load_cached_pages(store, pdf_hash)
+            if page_count is not None and len(pages) >= page_count:
+                text = pdf_text.join_pages(pages)
+                self._index_text(pdf_path, pdf_hash, text)
+                yield i, self._batch_result(pdf_path, text, page_count, cached=True)
+            else:
+                waiting[pdf_hash] = [(i, pdf_path)]
+                queue.append((pdf_hash, 1))
+
+        pool: Optional[ProcessPoolExecutor] = None
+        running: Dict[Future, Tuple[str, int, float]] = {}  # future -> (content hash, attempt, deadline)
+
+        try:
+            while queue or running:
+                if pool is None:
+                    pool = ProcessPoolExecutor(max_workers=max_workers)
+                while queue and len(running) < max_workers:
+                    if queue[0][1] > 1 and running:
+                        break  # a retry after a worker crash runs alone
+                    pdf_hash, attempt = queue.popleft()
+                    future = pool.submit(_parse_worker, waiting[pdf_hash][0][1])
+                    running[future] = (pdf_hash, attempt, time.monotonic() + timeout)
+                    if attempt > 1:
+                        break
+
+                next_deadline = min(entry[2] for entry in running.values())
+                done, _ = wait(list(running), timeout=max(0.0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+
+                broken = False
+                for future in done:
+                    pdf_hash, attempt, _ = running.pop(future)
+                    copies = waiting[pdf_hash]
+                    try:
+                        pages, page_count = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        if attempt == 1:
+                            queue.appendleft((pdf_hash, attempt + 1))
+                            continue
+                        yield from self._batch_errors(waiting.pop(pdf_hash), "worker exited without a result")
+                        continue
+                    except Exception as e:
+                        yield from self._batch_errors(waiting.pop(pdf_hash), str(e))
+                        continue
+                    del waiting[pdf_hash]
+                    try:
+                        pdf_text.save_pages(store, pdf_hash, pages, page_count, producer="PDFParserTool")
+                    except Exception as e:
+                        log_warn(f"[PDFParserTool] ⚠️ Could not cache pages for {copies[0][1]}: {e}")
+                    text = pdf_text.join_pages(pages)
+                    self._index_text(copies[0][1], pdf_hash, text)
+                    for i, pdf_path in copies:
+                        yield i, self._batch_result(pdf_path, text, page_count, cached=False)
+
+                now = time.monotonic()
+                expired = [future for future, (_, _, deadline) in running.items() if now >= deadline]
+                for future in expired:
+                    pdf_hash, _, _ = running.pop(future)
+                    yield from self._batch_errors(waiting.pop(pdf_hash), f"Timed out after {timeout}s")
+
+                if expired or broken:
+                    # a pool can't stop a single task: replace it and re-run what was still in flight
+                    for pdf_hash, attempt, _ in reversed(list(running.values())):
+                        queue.appendleft((pdf_hash, attempt))
+                    running.clear()
+                    _terminate(pool)
+                    pool = None
+        finally:
+            if pool is not None:
+                if running:
+                    _terminate(pool)  # generator closed early: don't leave workers behind
+                else:
+                    pool.shutdown(wait=True)
+
+    @staticmethod
+    def _batch_errors(copies: List[Tuple[int, str]], message: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        if message.startswith("Timed out"):
+            log_warn(f"[PDFParserTool] ⏱️ {message}: {copies[0][1]}")
+        else:
+            log_error(f"[PDFParserTool] ❌ Failed to parse {copies[0][1]}: {message}")
+        for i, pdf_path in copies:
+            yield i, {"pdf_path": pdf_path, "status": "error", "message": message}
+
+    def _index_text(self, pdf_path: str, pdf_hash: str, text: str) -> None:
+        """Add a whole document's text to the local vector index (no-op when unchanged)."""
+        if not text:
+            return
+        try:
+            (self.index if self.index is not None else get_vector_index()).add_text(pdf_hash, text, title=os.path.basename(pdf_path))
+        except Exception as e:
+            log_warn(f"[PDFParserTool] ⚠️ Could not index {pdf_path}: {e}")
+
+    @staticmethod
+    def _batch_result(pdf_path: str, text: str, page_count: int, cached: bool) -> Dict[str, Any]:
+        return {
+            "pdf_path": pdf_path,
+            "text": text,
+            "length": len(text),
+            "page_count": page_count,
+            "status": "success",
+            "cached": cached,
+        }
@@ -0,0 +1,62 @@
+from typing import Dict, Any, Optional
+from tools.base import BaseTool
+from utils.logger import log_info, log_warn
+from utils.vector_index import VectorIndex, get_vector_index
+
+ACTIONS = ["search", "missing", "add"]
+
+
+class VectorSearchTool(BaseTool):
+    """
+    Query the local vector index of summaries and extracted paper text,
+    so already-read papers are answered without touching the network.
+
+    Actions:
+      - search:  {"query", "k"=5, "kind"=None ("summary" | "text")} -> results
+      - missing: {"arxiv_ids": [...]} -> the IDs not indexed yet
+      - add:     {"doc_id", "text", "kind", optional "arxiv_id", "title", "url"}
+    """
+
+    def __init__(self, name: str = "vector_search", index: Optional[VectorIndex] = None):
+        super().__init__(name)
+        self.index = index if index is not None else get_vector_index()
+
+    def run(self, input: Dict[str, Any]) -> Dict[str, Any]:
+        action = input.get("action", "search")
+        if action not in ACTIONS:
+            return {"status": "error", "message": f"Unknown action '{action}'"}
+
+        # 🔎 Search
+        if action == "search":
+            query = input.get("query")
+            if not isinstance(query, str) or not query.strip():
+                return {"status": "error", "message": "Missing 'query' in input"}
+            results = self.index.search(query, k=int(input.get("k", 5)), kind=input.get("kind"))
+            if not results:
+                log_warn(f"[VectorSearchTool] ⚠️ No local matches for query='{query}'")
+            else:
+                log_info(f"[VectorSearchTool] ✅ {len(results)} local matches for query='{query}'")
+            return {"status": "success", "results": results}
+
+        # 🧾 Which papers still need fetching
+        elif action == "missing":
+            arxiv_ids = input.get("arxiv_ids")
+            if not isinstance(arxiv_ids, list):
+                return {"status": "error", "message": "'arxiv_ids' must be a list"}
+            missing = self.index.missing(arxiv_ids)
+            log_info(f"[VectorSearchTool] {len(arxiv_ids) - len(missing)}/{len(arxiv_ids)} papers already indexed")
+            return {"status": "success", "missing": missing}
+
+        # 📝 Add
+        elif action == "add":
+            if not isinstance(input.get("doc_id"), str) or not isinstance(input.get("text"), str):
+                return {"status": "error", "message": "'doc_id' and 'text' must be strings"}
+            added = self.index.add(
+                input["doc_id"],
+                input["text"],
+                kind=input.get("kind", "note"),
+                arxiv_id=input.get("arxiv_id"),
+                title=input.get("title"),
+                url=input.get("url"),
+            )
+            return {"status": "success", "added": added}
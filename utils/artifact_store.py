@@ -0,0 +1,359 @@
+# utils/artifact_store.py
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from utils.logger import log_info, log_warn
+
+ARTIFACT_ROOT = "data/artifacts"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GiB
+EVICTION_GRACE = 300.0  # seconds a blob just returned by get()/put_*() is safe from eviction
+
+# blob file extension per artifact kind (PyMuPDF sniffs type from the suffix)
+KIND_EXTENSIONS = {"pdf": ".pdf", "summary": ".txt", "pages": ".json"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    kind         TEXT NOT NULL,
+    ref          TEXT NOT NULL,
+    arxiv_id     TEXT,
+    content_hash TEXT NOT NULL,
+    input_hash   TEXT,
+    size         INTEGER NOT NULL,
+    producer     TEXT,
+    created_at   REAL NOT NULL,
+    last_access  REAL NOT NULL,
+    PRIMARY KEY (kind, ref)
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_hash ON artifacts (content_hash);
+CREATE INDEX IF NOT EXISTS idx_artifacts_access ON artifacts (last_access);
+"""
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in chunks so memory stays flat."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for papers, extracted text and summaries.
+
+    Blobs live once under `<root>/blobs/<hash[:2]>/<hash><ext>`; a small
+    SQLite index maps (kind, ref) to a blob plus its metadata. `ref` is the
+    arXiv ID (with version) for PDFs and the source PDF's content hash for
+    derived artifacts. The total blob size is kept under `max_bytes` by
+    evicting the least recently used entries on put; entries accessed in
+    the last `eviction_grace` seconds are skipped, so a path a caller has
+    just been handed isn't deleted under it.
+    """
+
+    def __init__(
+        self,
+        root: str = ARTIFACT_ROOT,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        eviction_grace: float = EVICTION_GRACE,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.eviction_grace = eviction_grace
+        self.blob_dir = os.path.join(root, "blobs")
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(root, "index.sqlite3"), check_same_thread=False, timeout=30
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def blob_path(self, content_hash: str, kind: str) -> str:
+        ext = KIND_EXTENSIONS.get(kind, "")
+        return os.path.join(self.blob_dir, content_hash[:2], content_hash + ext)
+
+    # ---- reads -------------------------------------------------------------
+
+    def get(self, kind: str, ref: str, input_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return artifact metadata (including `path`) or None.
+        A stale entry (different `input_hash`) or a missing blob is a miss.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM artifacts WHERE kind = ? AND ref = ?", (kind, ref)
+            ).fetchone()
+            if row is None:
+                return None
+            meta = dict(row)
+            if input_hash is not None and meta["input_hash"] != input_hash:
+                return None
+            meta["path"] = self.blob_path(meta["content_hash"], kind)
+            if not os.path.exists(meta["path"]):
+                self._conn.execute("DELETE FROM artifacts WHERE kind = ? AND ref = ?", (kind, ref))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE artifacts SET last_access = ? WHERE kind = ? AND ref = ?",
+                (time.time(), kind, ref),
+            )
+            self._conn.commit()
+        return meta
+
+    def read_text(self, kind: str, ref: str, input_hash: Optional[str] = None) -> Optional[str]:
+        meta = self.get(kind, ref, input_hash=input_hash)
+        if meta is None:
+            return None
+        with open(meta["path"], "r", encoding="utf-8") as f:
+            return f.read()
+
+    # ---- writes ------------------------------------------------------------
+
+    def put_bytes(
+        self,
+        kind: str,
+        ref: str,
+        data: bytes,
+        producer: str,
+        input_hash: Optional[str] = None,
+        arxiv_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        content_hash = self._write_blob(kind, data)
+        return self._index(kind, ref, content_hash, len(data), producer, input_hash, arxiv_id)
+
+    def put_text(self, kind: str, ref: str, text: str, producer: str, **kwargs: Any) -> Dict[str, Any]:
+        return self.put_bytes(kind, ref, text.encode("utf-8"), producer, **kwargs)
+
+    def update_text(
+        self,
+        kind: str,
+        ref: str,
+        update: Callable[[Optional[str]], str],
+        producer: str,
+        input_hash: Optional[str] = None,
+        arxiv_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Read-modify-write: store `update(current text or None)` under (kind, ref).
+        The read and the write share one write transaction, so concurrent
+        updates from other threads or processes are merged, not lost.
+        """
+        with self._lock:
+            with self._write_transaction():
+                row = self._conn.execute(
+                    "SELECT content_hash FROM artifacts WHERE kind = ? AND ref = ?", (kind, ref)
+                ).fetchone()
+                current = None
+                if row is not None:
+                    try:
+                        with open(self.blob_path(row["content_hash"], kind), "r", encoding="utf-8") as f:
+                            current = f.read()
+                    except FileNotFoundError:
+                        pass
+                data = update(current).encode("utf-8")
+                content_hash = self._write_blob(kind, data)
+                meta = self._upsert_locked(kind, ref, content_hash, len(data), producer, input_hash, arxiv_id)
+            self._after_write_locked(kind, ref, content_hash, row)
+        meta["path"] = self.blob_path(content_hash, kind)
+        return meta
+
+    def put_file(
+        self,
+        kind: str,
+        ref: str,
+        src_path: str,
+        producer: str,
+        input_hash: Optional[str] = None,
+        arxiv_id: Optional[str] = None,
+        move: bool = False,
+    ) -> Dict[str, Any]:
+        """Add a file by path; `move=True` consumes `src_path` instead of copying it."""
+        content_hash = hash_file(src_path)
+        size = os.path.getsize(src_path)
+        path = self.blob_path(content_hash, kind)
+        if os.path.exists(path):
+            if move:
+                os.remove(src_path)
+        else:
+            # a private temp name, so concurrent puts of the same content don't collide
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            os.close(fd)
+            try:
+                if move:
+                    shutil.move(src_path, tmp_path)
+                else:
+                    shutil.copyfile(src_path, tmp_path)
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+                raise
+        return self._index(kind, ref, content_hash, size, producer, input_hash, arxiv_id)
+
+    def _write_blob(self, kind: str, data: bytes) -> str:
+        """Write `data` to its content-addressed path (via a private temp file); returns the hash."""
+        content_hash = hash_bytes(data)
+        path = self.blob_path(content_hash, kind)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+                raise
+        return content_hash
+
+    def _index(
+        self,
+        kind: str,
+        ref: str,
+        content_hash: str,
+        size: int,
+        producer: str,
+        input_hash: Optional[str],
+        arxiv_id: Optional[str],
+    ) -> Dict[str, Any]:
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT content_hash FROM artifacts WHERE kind = ? AND ref = ?", (kind, ref)
+            ).fetchone()
+            meta = self._upsert_locked(kind, ref, content_hash, size, producer, input_hash, arxiv_id)
+            self._conn.commit()
+            self._after_write_locked(kind, ref, content_hash, previous)
+        meta["path"] = self.blob_path(content_hash, kind)
+        return meta
+
+    def _upsert_locked(
+        self,
+        kind: str,
+        ref: str,
+        content_hash: str,
+        size: int,
+        producer: str,
+        input_hash: Optional[str],
+        arxiv_id: Optional[str],
+    ) -> Dict[str, Any]:
+        now = time.time()
+        meta = {
+            "kind": kind,
+            "ref": ref,
+            "arxiv_id": arxiv_id,
+            "content_hash": content_hash,
+            "input_hash": input_hash,
+            "size": size,
+            "producer": producer,
+            "created_at": now,
+            "last_access": now,
+        }
+        self._conn.execute(
+            "INSERT OR REPLACE INTO artifacts "
+            "(kind, ref, arxiv_id, content_hash, input_hash, size, producer, created_at, last_access) "
+            "VALUES (:kind, :ref, :arxiv_id, :content_hash, :input_hash, :size, :producer, :created_at, :last_access)",
+            meta,
+        )
+        return meta
+
+    def _after_write_locked(self, kind: str, ref: str, content_hash: str, previous: Optional[sqlite3.Row]) -> None:
+        """Once the new row is committed: drop the blob it replaced, then evict if over budget."""
+        if previous and previous["content_hash"] != content_hash:
+            self._drop_blob_if_unused(previous["content_hash"], kind)
+        self._evict_locked(keep=(kind, ref))
+
+    @contextmanager
+    def _write_transaction(self) -> Iterator[None]:
+        """BEGIN IMMEDIATE: one writer across processes until commit (callers hold self._lock)."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.rollback()
+            raise
+        self._conn.commit()
+
+    # ---- eviction ----------------------------------------------------------
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total_bytes_locked()
+
+    def _total_bytes_locked(self) -> int:
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT content_hash, kind, size FROM artifacts)"
+        ).fetchone()
+        return int(row[0])
+
+    def _drop_blob_if_unused(self, content_hash: str, kind: str) -> bool:
+        """Delete a blob once no index row points at it; True if it was removed."""
+        still_used = self._conn.execute(
+            "SELECT 1 FROM artifacts WHERE content_hash = ? AND kind = ? LIMIT 1",
+            (content_hash, kind),
+        ).fetchone()
+        if still_used:
+            return False
+        try:
+            os.remove(self.blob_path(content_hash, kind))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _evict_locked(self, keep: Optional[Tuple[str, str]] = None) -> None:
+        total = self._total_bytes_locked()
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT kind, ref, content_hash, size FROM artifacts WHERE last_access < ? "
+            "ORDER BY last_access ASC",
+            (time.time() - self.eviction_grace,),
+        ).fetchall()
+        for row in rows:
+            if total <= self.max_bytes:
+                break
+            if keep and (row["kind"], row["ref"]) == keep:
+                continue
+            self._conn.execute(
+                "DELETE FROM artifacts WHERE kind = ? AND ref = ?", (row["kind"], row["ref"])
+            )
+            if self._drop_blob_if_unused(row["content_hash"], row["kind"]):
+                total -= row["size"]
+            log_info(f"[ArtifactStore] 🗑️ Evicted {row['kind']} '{row['ref']}'")
+        self._conn.commit()
+
+        if total > self.max_bytes:
+            log_warn(f"[ArtifactStore] ⚠️ Still over budget after eviction ({total} bytes)")
+
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ArtifactStore:
+    """Return the process-wide artifact store (created on first use)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore()
+        return _store
@@ -0,0 +1,210 @@
+# utils/arxiv.py
+import re
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+from utils import tracing
+from utils.http import HostLimiter, get_host_limiter, get_session
+from utils.logger import log_error, log_info, log_warn
+from utils.search_cache import SearchCache, get_search_cache
+from utils.upstream import get_upstream
+
+ARXIV_API_URL = "http://export.arxiv.org/api/query"
+PAGE_SIZE = 100          # results per API request
+MAX_PER_HOST = 1         # arXiv asks for a single connection at a time ...
+MIN_INTERVAL = 3.0       # ... and no more than one request every three seconds
+MAX_WORKERS = 4
+FEED_FORMAT = 2          # bump when the paper dict changes, to bypass stale cached pages
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+OPENSEARCH = "{http://a9.com/-/spec/opensearch/1.1/}"
+
+
+def base_arxiv_id(arxiv_id: str) -> str:
+    """Strip the version suffix, e.g. '2307.00865v2' -> '2307.00865'."""
+    return re.sub(r"v\d+$", "", arxiv_id)
+
+
+def _text(entry: ET.Element, tag: str) -> str:
+    return " ".join((entry.findtext(ATOM + tag) or "").split())
+
+
+def _entry_to_paper(entry: ET.Element) -> Optional[Dict]:
+    paper_id = (entry.findtext(ATOM + "id") or "").strip()
+    if not paper_id or "/api/errors" in paper_id:
+        log_warn(f"[arXiv] API error entry: {_text(entry, 'summary') or paper_id}")
+        return None
+
+    # keeps old-style IDs such as hep-th/9901001v1 intact
+    arxiv_id = paper_id.split("/abs/", 1)[-1]
+    pdf_url = next(
+        (link.get("href") for link in entry.findall(ATOM + "link") if link.get("title") == "pdf"),
+        f"https://arxiv.org/pdf/{arxiv_id}.pdf",
+    )
+    return {
+        "arxiv_id": arxiv_id,
+        "title": _text(entry, "title"),
+        "summary": _text(entry, "summary"),
+        "url": paper_id,         # abstract page
+        "pdf_url": pdf_url,      # direct PDF
+        "authors": [_text(a, "name") for a in entry.findall(ATOM + "author")],
+        "categories": [c.get("term") for c in entry.findall(ATOM + "category") if c.get("term")],
+        "published": _text(entry, "published") or None,
+    }
+
+
+def iter_feed(source: IO[bytes], info: Optional[Dict] = None) -> Iterator[Dict]:
+    """
+    Incrementally parse an Atom feed from a file-like object, yielding one
+    paper per <entry> as soon as it is decoded. Parsed entries are cleared
+    from the tree, so memory stays flat however large the page is.
+    `info["total"]` is set from opensearch:totalResults when present.
+    """
+    context = ET.iterparse(source, events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event != "end":
+            continue
+        if elem.tag == OPENSEARCH + "totalResults" and info is not None:
+            info["total"] = int(elem.text or 0)
+        elif elem.tag == ATOM + "entry":
+            paper = _entry_to_paper(elem)
+            root.clear()
+            if paper:
+                yield paper
+
+
+def fetch_page(
+    query: str,
+    start: int,
+    page_size: int,
+    limiter: Optional[HostLimiter] = None,
+    cache: Optional[SearchCache] = None,
+) -> Optional[Tuple[List[Dict], int]]:
+    """One API page -> (papers, total results), or None on failure. Cached pages skip the limiter."""
+    params = {"search_query": query, "start": start, "max_results": page_size}
+    cache_params = {"url": ARXIV_API_URL, "format": FEED_FORMAT, **params}
+    if cache is not None:
+        cached = cache.get(cache_params)
+        if cached is not None:
+            return cached["papers"], cached["total"]
+
+    limiter = limiter or get_host_limiter(MAX_PER_HOST, MIN_INTERVAL)
+    info: Dict = {}
+
+    def _fetch() -> List[Dict]:
+        # the slot covers the body too: the connection is busy until it is read
+        with limiter.slot(ARXIV_API_URL):
+            with get_session().get(ARXIV_API_URL, params=params, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                papers = list(iter_feed(response.raw, info))
+                tracing.add(bytes=response.raw.tell())
+                return papers
+
+    try:
+        # 429/5xx and dropped connections are retried with backoff
+        papers = get_upstream(ARXIV_API_URL).call(_fetch)
+    except requests.HTTPError as e:
+        log_warn(f"[arXiv] API request failed with {e.response.status_code} (query='{query}', start={start})")
+        return None
+    except Exception as e:
+        log_error(f"[arXiv] Error while searching (query='{query}', start={start}): {e}")
+        return None
+
+    total = info.get("total", len(papers))
+    if cache is not None:
+        cache.put(cache_params, {"papers": papers, "total": total})
+    return papers, total
+
+
+def iter_search(
+    queries: Iterable[str],
+    max_results: int = 5,
+    page_size: int = PAGE_SIZE,
+    max_workers: int = MAX_WORKERS,
+    max_per_host: int = MAX_PER_HOST,
+    min_interval: float = MIN_INTERVAL,
+    cache: Optional[SearchCache] = None,
+    use_cache: bool = True,
+) -> Iterator[Dict]:
+    """
+    Search arXiv for several queries at once, yielding unique papers.
+
+    Up to `max_results` papers are fetched per query, paging through the API
+    `page_size` at a time. First pages of every query are fetched together,
+    then the remaining pages (sized from each query's total result count);
+    the process-wide HostLimiter keeps requests from every concurrent search
+    within arXiv's rate limits.
+    Pages are cached on disk, so a repeated sweep makes no network calls.
+
+    Papers are de-duplicated by arXiv ID (ignoring version) and yielded in
+    query order; each carries `queries`, the queries that matched it so far.
+    """
+    queries = list(dict.fromkeys(q for q in queries if q))
+    if not queries or max_results <= 0:
+        return
+    if use_cache and cache is None:
+        cache = get_search_cache()
+    if not use_cache:
+        cache = None
+
+    page_size = max(1, min(page_size, max_results))
+    limiter = get_host_limiter(max_per_host, min_interval)
+    seen: Dict[str, Dict] = {}
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="arxiv-search")
+    try:
+        fetch = tracing.propagate(fetch_page)
+        first = {q: pool.submit(fetch, q, 0, page_size, limiter, cache) for q in queries}
+        pages: Dict[str, list] = {}
+        for query, future in first.items():
+            result = future.result()
+            if result is None:
+                pages[query] = []
+                continue
+            papers, total = result
+            pages[query] = [papers]
+            for start in range(page_size, min(total, max_results), page_size):
+                size = min(page_size, max_results - start)
+                pages[query].append(pool.submit(fetch, query, start, size, limiter, cache))
+
+        for query in queries:
+            found = 0
+            for page in pages[query]:
+                if not isinstance(page, list):
+                    result = page.result()
+                    page = result[0] if result is not None else []
+                for paper in page:
+                    if found >= max_results:
+                        break
+                    found += 1
+                    key = base_arxiv_id(paper["arxiv_id"])
+                    if key in seen:
+                        if query not in seen[key]["queries"]:
+                            seen[key]["queries"].append(query)
+                        continue
+                    seen[key] = {**paper, "queries": [query]}
+                    yield seen[key]
+            log_info(f"[arXiv] Found {found} papers for query='{query}'")
+    finally:
+        # a consumer that stops early (e.g. islice) should not wait for unread pages
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if len(queries) > 1:
+        log_info(f"[arXiv] {len(seen)} unique papers across {len(queries)} queries")
+
+
+def search_many(queries: Iterable[str], max_results: int = 5, **kwargs) -> List[Dict]:
+    """List form of iter_search."""
+    return list(iter_search(queries, max_results=max_results, **kwargs))
+
+
+def search_papers(query: str, max_results: int = 5, **kwargs) -> List[Dict]:
+    """
+    Search arXiv using their API (single query; see iter_search).
+    """
+    return search_many([query], max_results=max_results, **kwargs)
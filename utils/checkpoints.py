@@ -0,0 +1,150 @@
+# utils/checkpoints.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.logger import log_info
+
+CHECKPOINT_DB = "data/checkpoints.sqlite3"
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # seconds; older runs are pruned on open
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    task_id    TEXT PRIMARY KEY,
+    config     TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS steps (
+    task_id    TEXT NOT NULL,
+    step_id    TEXT NOT NULL,
+    item       TEXT NOT NULL,
+    step_hash  TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    output     TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (task_id, step_id, item)
+);
+"""
+
+
+def step_hash(step: Dict[str, Any]) -> str:
+    """Fingerprint of a step's definition; checkpoints of an edited step are ignored."""
+    payload = {k: step.get(k) for k in ("agent", "params", "depends_on", "inputs", "foreach")}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _item_key(index: Optional[Tuple[int, ...]]) -> str:
+    # "" is the whole step; foreach items use their index path, e.g. "0.2"
+    return "" if index is None else ".".join(str(i) for i in index)
+
+
+class CheckpointStore:
+    """
+    Per-step and per-item results of workflow runs, keyed by task_id, so an
+    interrupted run can resume: finished steps/items are restored and only
+    failed or missing ones run again. SQLite in WAL mode; outputs are JSON.
+    """
+
+    def __init__(self, db_path: str = CHECKPOINT_DB, max_age: float = DEFAULT_MAX_AGE):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.prune(max_age)
+
+    # ---- runs ----------------------------------------------------------------
+
+    def start_run(self, task_id: str, workflow_config: dict) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO runs (task_id, config, status, created_at, updated_at) VALUES (?, ?, 'running', ?, ?) "
+                "ON CONFLICT(task_id) DO UPDATE SET config = excluded.config, status = 'running', updated_at = ?",
+                (task_id, json.dumps(workflow_config, default=str), now, now, now),
+            )
+
+    def finish_run(self, task_id: str, status: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, updated_at = ? WHERE task_id = ?", (status, time.time(), task_id)
+            )
+
+    def load_config(self, task_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT config FROM runs WHERE task_id = ?", (task_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # ---- steps ---------------------------------------------------------------
+
+    def get(self, task_id: str, step: Dict[str, Any], index: Optional[Tuple[int, ...]] = None) -> Optional[Any]:
+        """The recorded output of a finished step/item, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output FROM steps WHERE task_id = ? AND step_id = ? AND item = ? "
+                "AND step_hash = ? AND status = 'done'",
+                (task_id, step["id"], _item_key(index), step_hash(step)),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def record(
+        self,
+        task_id: str,
+        step: Dict[str, Any],
+        index: Optional[Tuple[int, ...]],
+        status: str,
+        output: Any,
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO steps (task_id, step_id, item, step_hash, status, output, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (task_id, step["id"], _item_key(index), step_hash(step), status,
+                 json.dumps(output, default=str), time.time()),
+            )
+
+    def discard(self, task_id: str, step_ids: List[str]) -> None:
+        """Forget the recorded steps/items of `step_ids` so they run again."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM steps WHERE task_id = ? AND step_id = ?", [(task_id, s) for s in step_ids]
+            )
+
+    def summary(self, task_id: str) -> Dict[str, int]:
+        """Count of recorded steps/items by status."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM steps WHERE task_id = ? GROUP BY status", (task_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def prune(self, max_age: float = DEFAULT_MAX_AGE) -> int:
+        cutoff = time.time() - max_age
+        with self._lock, self._conn:
+            old = [r[0] for r in self._conn.execute("SELECT task_id FROM runs WHERE updated_at < ?", (cutoff,))]
+            for task_id in old:
+                self._conn.execute("DELETE FROM steps WHERE task_id = ?", (task_id,))
+                self._conn.execute("DELETE FROM runs WHERE task_id = ?", (task_id,))
+        if old:
+            log_info(f"[Checkpoints] 🗑️ Pruned {len(old)} old runs")
+        return len(old)
+
+
+_store: Optional[CheckpointStore] = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Return the process-wide checkpoint store (created on first use)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CheckpointStore()
+        return _store
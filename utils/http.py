@@ -0,0 +1,99 @@
+# utils/http.py
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 16
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    Return the process-wide keep-alive session.
+    Created on first use; all agents share its connection pool.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def close_session() -> None:
+    """Close the shared session's pooled connections; the next get_session() opens a new one."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+class HostLimiter:
+    """
+    Per-host concurrency cap plus a minimum interval between request starts.
+
+    Usage:
+        limiter = HostLimiter(max_per_host=4, min_interval=0.25)
+        with limiter.slot(url):
+            session.get(url)
+    """
+
+    def __init__(self, max_per_host: int = 4, min_interval: float = 0.0):
+        self.max_per_host = max(1, int(max_per_host))
+        self.min_interval = max(0.0, float(min_interval))
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._semaphores[host]
+
+    def _wait_turn(self, host: str) -> None:
+        # reserve the next start time under the lock, sleep outside it
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.min_interval
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        host = urlparse(url).netloc
+        semaphore = self._semaphore(host)
+        with semaphore:
+            if self.min_interval:
+                self._wait_turn(host)
+            yield
+
+
+_limiters: Dict[tuple, HostLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_host_limiter(max_per_host: int = 4, min_interval: float = 0.0) -> HostLimiter:
+    """
+    Return the process-wide HostLimiter for this budget, so concurrent
+    callers (DAG branches, worker jobs) share one per-host cap instead of
+    each getting their own.
+    """
+    key = (max(1, int(max_per_host)), max(0.0, float(min_interval)))
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = HostLimiter(*key)
+        return _limiters[key]
@@ -0,0 +1,94 @@
+# utils/llm.py
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from utils import tracing
+from utils.llm_cache import get_llm_cache
+from utils.logger import log_info
+from utils.upstream import get_upstream
+
+DEFAULT_MODEL = "llama3-70b-8192"
+GROQ_URL = "https://api.groq.com"
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the shared Groq client (created on first use)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from groq import Groq
+            from config.config import get_groq_api_key
+
+            # retries are left to the shared Upstream (see utils.upstream); set
+            # GROQ_BASE_URL to point the client at a local stand-in server
+            _client = Groq(api_key=get_groq_api_key(), max_retries=0)
+        return _client
+
+
+def _transient_errors() -> tuple:
+    from groq import APIConnectionError  # includes timeouts
+
+    return (APIConnectionError,)
+
+
+def chat(
+    messages: List[Dict[str, str]],
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.2,
+    max_tokens: int = 1024,
+    client: Any = None,
+    use_cache: bool = True,
+    near_text: Optional[str] = None,
+    scope: Optional[str] = None,
+    validate: Optional[Callable[[str], bool]] = None,
+) -> str:
+    """
+    Chat completion through the shared LLM cache.
+
+    Responses are cached by (model, messages, temperature, max_tokens);
+    `near_text`/`scope` enable near-duplicate lookups (see LLMCache). With
+    `validate`, only responses that pass it are cached or served from cache.
+    """
+    with tracing.span(model, "llm", max_tokens=max_tokens):
+        cache = get_llm_cache() if use_cache else None
+        if cache is not None:
+            cached = cache.get(model, messages, temperature, max_tokens, near_text=near_text, scope=scope)
+            if cached is not None and (validate is None or validate(cached)):
+                log_info("[LLM] ⚡ Cache hit")
+                tracing.annotate(cache="hit")
+                return cached
+
+        client = client or get_client()
+        upstream = get_upstream(str(getattr(client, "base_url", None) or GROQ_URL))
+        completions = client.chat.completions
+        # the raw response carries the rate-limit headers the upstream's bucket is tuned from
+        create = getattr(completions, "with_raw_response", completions).create
+        response = upstream.call(
+            create,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            retry_on=_transient_errors(),
+        )
+        if hasattr(response, "parse"):
+            response = response.parse()
+        content = (response.choices[0].message.content or "").strip()
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            tracing.annotate(
+                prompt_tokens=getattr(usage, "prompt_tokens", None),
+                completion_tokens=getattr(usage, "completion_tokens", None),
+            )
+
+        if cache is not None and content and (validate is None or validate(content)):
+            cache.put(model, messages, temperature, max_tokens, content, near_text=near_text, scope=scope)
+        return content
+
+
+def call_llm(prompt: str, **kwargs: Any) -> str:
+    """Single-prompt shorthand for `chat`."""
+    return chat([{"role": "user", "content": prompt}], **kwargs)
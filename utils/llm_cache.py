@@ -0,0 +1,194 @@
+# utils/llm_cache.py
+import difflib
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from utils.logger import log_info
+
+CACHE_DB = "data/cache/llm_cache.sqlite3"
+DEFAULT_TTL = 30 * 24 * 3600       # seconds
+DEFAULT_MAX_ENTRIES = 10_000
+NEAR_MATCH_THRESHOLD = 0.92
+NEAR_MATCH_CANDIDATES = 200        # most recent entries compared per near lookup
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key         TEXT PRIMARY KEY,
+    params_hash TEXT NOT NULL,
+    scope       TEXT,
+    near_text   TEXT,
+    response    TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits        INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_scope ON llm_cache (params_hash, scope, last_access);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache (last_access);
+"""
+
+
+def _hash(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def normalise(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace for near-duplicate matching."""
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+class LLMCache:
+    """
+    Persistent cache of LLM responses.
+
+    The exact key is a hash of (model, messages, temperature, max_tokens).
+    Callers may also pass `near_text` (e.g. a planner instruction) and a
+    `scope`; a miss then falls back to the closest earlier `near_text` with
+    the same parameters and scope. Entries expire after `ttl` seconds and
+    the table is capped at `max_entries` by least-recent use.
+    """
+
+    def __init__(
+        self,
+        db_path: str = CACHE_DB,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        near_threshold: float = NEAR_MATCH_THRESHOLD,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.near_threshold = near_threshold
+        self.stats: Dict[str, int] = {"hits": 0, "near_hits": 0, "misses": 0}
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        return _hash({"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens})
+
+    @staticmethod
+    def params_hash(model: str, temperature: float, max_tokens: int) -> str:
+        return _hash({"model": model, "temperature": temperature, "max_tokens": max_tokens})
+
+    def get(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        near_text: Optional[str] = None,
+        scope: Optional[str] = None,
+    ) -> Optional[str]:
+        key = self.make_key(model, messages, temperature, max_tokens)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, response FROM llm_cache WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl),
+            ).fetchone()
+            kind = "hits"
+            if row is None and near_text:
+                row = self._near_match_locked(
+                    self.params_hash(model, temperature, max_tokens), scope, near_text, now
+                )
+                kind = "near_hits"
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute(
+                "UPDATE llm_cache SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, row["key"])
+            )
+            self._conn.commit()
+            self.stats[kind] += 1
+        return row["response"]
+
+    def _near_match_locked(self, params_hash: str, scope: Optional[str], near_text: str, now: float):
+        target = normalise(near_text)
+        candidates = self._conn.execute(
+            "SELECT key, response, near_text FROM llm_cache "
+            "WHERE params_hash = ? AND scope IS ? AND near_text IS NOT NULL AND created_at >= ? "
+            "ORDER BY last_access DESC LIMIT ?",
+            (params_hash, scope, now - self.ttl, NEAR_MATCH_CANDIDATES),
+        ).fetchall()
+        best, best_ratio = None, self.near_threshold
+        for row in candidates:
+            ratio = difflib.SequenceMatcher(None, target, row["near_text"]).ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = row, ratio
+        if best is not None:
+            log_info(f"[LLMCache] ≈ Near-duplicate match ({best_ratio:.2f}) for '{near_text}'")
+        return best
+
+    def put(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        response: str,
+        near_text: Optional[str] = None,
+        scope: Optional[str] = None,
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache "
+                "(key, params_hash, scope, near_text, response, created_at, last_access, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (
+                    self.make_key(model, messages, temperature, max_tokens),
+                    self.params_hash(model, temperature, max_tokens),
+                    scope,
+                    normalise(near_text) if near_text else None,
+                    response,
+                    now,
+                    now,
+                ),
+            )
+            self._evict_locked(now)
+            self._conn.commit()
+
+    def _evict_locked(self, now: float) -> None:
+        self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def clear(self, scope_prefix: Optional[str] = None) -> int:
+        """Drop every entry, or only those whose scope starts with `scope_prefix`."""
+        with self._lock:
+            if scope_prefix is None:
+                deleted = self._conn.execute("DELETE FROM llm_cache").rowcount
+            else:
+                deleted = self._conn.execute(
+                    "DELETE FROM llm_cache WHERE scope LIKE ?", (scope_prefix + "%",)
+                ).rowcount
+            self._conn.commit()
+        return deleted
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Return the process-wide LLM cache (created on first use)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
@@ -1,13 +1,268 @@
 # utils/logger.py
-from rich.console import Console
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Union
 
-console = Console()
+from utils.tracing import current_context
 
-def log_info(message: str):
-    console.print(f"[bold cyan][INFO][/bold cyan] {message}")
+DEBUG, INFO, WARN, ERROR = 10, 20, 30, 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARN: "WARN", ERROR: "ERROR"}
+LEVELS = {"debug": DEBUG, "info": INFO, "warn": WARN, "warning": WARN, "error": ERROR}
+STYLES = {DEBUG: "dim", INFO: "bold cyan", WARN: "bold yellow", ERROR: "bold red"}
+MAX_OPEN_FILES = 32  # per-task JSONL files kept open at once
 
-def log_warn(message: str):
-    console.print(f"[bold yellow][WARN][/bold yellow] {message}")
+_console = None
+_console_lock = threading.Lock()
 
-def log_error(message: str):
-    console.print(f"[bold red][ERROR][/bold red] {message}")
+
+def get_console():
+    """Return the shared rich Console (rich is imported on the first log line)."""
+    global _console
+    with _console_lock:
+        if _console is None:
+            from rich.console import Console
+
+            _console = Console()
+        return _console
+
+
+# ---- sinks -------------------------------------------------------------------
+
+class ConsoleSink:
+    """Rich console output, as `[LEVEL] message` with markup."""
+
+    def write(self, record: Dict[str, Any]) -> None:
+        style = STYLES[record["levelno"]]
+        get_console().print(f"[{style}][{record['level']}][/{style}] {record['message']}")
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlSink:
+    """
+    One JSON object per line in `<directory>/<task_id>.jsonl`; records
+    logged outside a task go to `process.jsonl`. At most MAX_OPEN_FILES
+    files are kept open (least recently used are closed first).
+    """
+
+    def __init__(self, directory: str = "data/logs"):
+        self.directory = directory
+        self._files: "OrderedDict[str, Any]" = OrderedDict()
+
+    def _file(self, task_id: str) -> Any:
+        f = self._files.pop(task_id, None)
+        if f is None:
+            os.makedirs(self.directory, exist_ok=True)
+            f = open(os.path.join(self.directory, f"{task_id}.jsonl"), "a", encoding="utf-8")
+            while len(self._files) >= MAX_OPEN_FILES:
+                self._files.popitem(last=False)[1].close()
+        self._files[task_id] = f
+        return f
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = {k: v for k, v in record.items() if k != "levelno" and v is not None}
+        self._file(str(record.get("task_id") or "process")).write(json.dumps(line, default=str) + "\n")
+
+    def flush(self) -> None:
+        for f in self._files.values():
+            f.flush()
+
+    def close(self) -> None:
+        while self._files:
+            self._files.popitem()[1].close()
+
+
+# ---- queue and writer thread -------------------------------------------------
+
+_level = INFO
+_sinks: List[Any] = [ConsoleSink()]
+_configured = False  # level and sinks settled: LOG_LEVEL / LOG_DIR read, or configure() called
+_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+_writer: Optional[threading.Thread] = None
+_writer_pid: Optional[int] = None
+_writer_lock = threading.Lock()
+
+
+def _from_settings() -> None:
+    """LOG_LEVEL / LOG_DIR from the environment (or .env), unless configure() was called."""
+    global _level
+    from config.config import get_setting
+
+    _level = _parse_level(get_setting("LOG_LEVEL", "info"))
+    log_dir = get_setting("LOG_DIR")
+    if log_dir:
+        _sinks.append(JsonlSink(log_dir))
+
+
+def _ensure_settings() -> None:
+    """Read the settings before the first level check, so early debug lines honour LOG_LEVEL."""
+    global _configured
+    if _configured:
+        return
+    with _writer_lock:
+        if not _configured:
+            _from_settings()
+            _configured = True
+
+
+def _ensure_writer() -> None:
+    global _writer, _writer_pid, _queue
+    if _writer_pid == os.getpid():
+        return
+    with _writer_lock:
+        if _writer_pid == os.getpid():
+            return
+        if _writer_pid is not None:
+            # forked child (e.g. a parse worker): the parent's writer thread isn't here
+            _queue = queue.SimpleQueue()
+        _writer = threading.Thread(target=_drain, name="log-writer", daemon=True)
+        _writer.start()
+        _writer_pid = os.getpid()
+
+
+def _format(message: Union[str, Callable[[], str]], args: tuple) -> str:
+    if callable(message):
+        return str(message())
+    if not args:
+        return message
+    try:
+        return message % args
+    except (TypeError, ValueError):
+        return " ".join([message, *map(str, args)])
+
+
+def _drain() -> None:
+    while True:
+        entry = _queue.get()
+        if isinstance(entry, threading.Event):  # flush marker
+            for sink in list(_sinks):
+                try:
+                    sink.flush()
+                except Exception:
+                    pass
+            entry.set()
+            continue
+        levelno, created, thread, context, message, args = entry
+        record = {
+            "ts": created,
+            "level": LEVEL_NAMES[levelno],
+            "levelno": levelno,
+            "message": _format(message, args),
+            "thread": thread,
+            **context,
+        }
+        for sink in list(_sinks):
+            try:
+                sink.write(record)
+            except Exception:
+                pass  # a broken sink must not take the writer down
+
+
+# ---- public API --------------------------------------------------------------
+
+def _parse_level(level: Union[int, str]) -> int:
+    if isinstance(level, int):
+        return level
+    try:
+        return LEVELS[level.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown log level '{level}' (expected one of {sorted(LEVELS)})")
+
+
+def configure(
+    level: Union[int, str, None] = None,
+    console: bool = True,
+    jsonl_dir: Optional[str] = None,
+) -> None:
+    """
+    Set the level (default: the LOG_LEVEL setting) and sinks: the rich
+    console (optional) and, with `jsonl_dir`, a JSON-lines file per
+    task_id. Replaces the LOG_LEVEL / LOG_DIR settings otherwise read on
+    the first log call.
+    """
+    global _level, _configured
+    flush()
+    for sink in _sinks:
+        sink.close()
+    _sinks[:] = ([ConsoleSink()] if console else []) + ([JsonlSink(jsonl_dir)] if jsonl_dir else [])
+    if level is None:
+        from config.config import get_setting
+
+        level = get_setting("LOG_LEVEL", "info")
+    _level = _parse_level(level)
+    _configured = True
+
+
+def set_level(level: Union[int, str]) -> None:
+    global _level
+    _ensure_settings()  # so LOG_LEVEL read later can't override this
+    _level = _parse_level(level)
+
+
+def is_enabled(level: int) -> bool:
+    if not _configured:
+        _ensure_settings()
+    return level >= _level
+
+
+def log(level: int, message: Union[str, Callable[[], str]], *args: Any) -> None:
+    """
+    Queue a message for the writer thread. Formatting (`message % args`, or
+    calling `message` if it is a function) happens there, and only for
+    enabled levels, so pass values that won't change after the call.
+    """
+    if not _configured:
+        _ensure_settings()
+    if level < _level:
+        return
+    _ensure_writer()
+    _queue.put((level, time.time(), threading.current_thread().name, current_context(), message, args))
+
+
+def log_debug(message: Union[str, Callable[[], str]], *args: Any) -> None:
+    if not _configured:
+        _ensure_settings()
+    if DEBUG >= _level:
+        log(DEBUG, message, *args)
+
+
+def log_info(message: Union[str, Callable[[], str]], *args: Any) -> None:
+    log(INFO, message, *args)
+
+
+def log_warn(message: Union[str, Callable[[], str]], *args: Any) -> None:
+    log(WARN, message, *args)
+
+
+def log_error(message: Union[str, Callable[[], str]], *args: Any) -> None:
+    log(ERROR, message, *args)
+
+
+def flush(timeout: Optional[float] = 5.0) -> bool:
+    """Wait until everything logged so far has reached the sinks."""
+    if _writer_pid != os.getpid() or _writer is None or not _writer.is_alive():
+        return True
+    done = threading.Event()
+    _queue.put(done)
+    return done.wait(timeout)
+
+
+def shutdown() -> None:
+    flush()
+    for sink in _sinks:
+        try:
+            sink.close()
+        except Exception:
+            pass
+
+
+atexit.register(shutdown)
@@ -0,0 +1,189 @@
+# utils/pdf_text.py
+"""
+Single PDF text-extraction engine.
+
+PyMuPDF is preferred, PyPDF2 is the fallback. Page text is cached in the
+artifact store as one "pages" artifact per PDF, keyed by the file's content
+hash, so a page that was parsed once is never parsed again. Callers can ask
+for a page range or a character budget and only the pages needed are read.
+"""
+import json
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from utils.artifact_store import ArtifactStore, hash_file
+from utils.logger import log_warn
+
+PAGE_SEPARATOR = "\n\n"
+
+_engine: Optional[Tuple[Optional[str], Any]] = None
+
+
+def _backend() -> Tuple[Optional[str], Any]:
+    """
+    ("fitz", module), ("pypdf2", PdfReader) or (None, None). The engine is
+    imported on first use, so importing this module doesn't pay for it.
+    """
+    global _engine
+    if _engine is None:
+        try:
+            import fitz  # PyMuPDF
+
+            _engine = ("fitz", fitz)
+        except ImportError:
+            try:
+                from PyPDF2 import PdfReader
+
+                _engine = ("pypdf2", PdfReader)
+            except ImportError:
+                _engine = (None, None)
+    return _engine
+
+
+def engine_available() -> bool:
+    return _backend()[0] is not None
+
+
+def _open(pdf_path: str) -> Tuple[Any, int]:
+    """Open with PyMuPDF if possible, else PyPDF2; returns (document, page_count)."""
+    name, engine = _backend()
+    if name == "fitz":
+        doc = engine.open(pdf_path)
+        return doc, doc.page_count
+    if name == "pypdf2":
+        reader = engine(pdf_path)
+        return reader, len(reader.pages)
+    raise RuntimeError("No PDF engine installed (need PyMuPDF or PyPDF2)")
+
+
+def _close(doc: Any) -> None:
+    if _backend()[0] == "fitz":
+        doc.close()
+
+
+def _page_text(doc: Any, page_no: int) -> str:
+    if _backend()[0] == "fitz":
+        text = doc.load_page(page_no).get_text("text")
+    else:
+        text = doc.pages[page_no].extract_text()
+    return (text or "").strip()
+
+
+def parse_pages(
+    pdf_path: str, page_numbers: Optional[Iterable[int]] = None
+) -> Tuple[Dict[int, str], int]:
+    """
+    Parse the given pages (all if None) without touching any cache.
+    Safe to run in a worker process. Returns ({page_no: text}, page_count).
+    """
+    doc, page_count = _open(pdf_path)
+    try:
+        wanted = range(page_count) if page_numbers is None else page_numbers
+        return {n: _page_text(doc, n) for n in wanted if 0 <= n < page_count}, page_count
+    finally:
+        _close(doc)
+
+
+def load_cached_pages(
+    store: Optional[ArtifactStore], pdf_hash: str
+) -> Tuple[Dict[int, str], Optional[int]]:
+    if store is None:
+        return {}, None
+    raw = store.read_text("pages", pdf_hash)
+    if raw is None:
+        return {}, None
+    cached = json.loads(raw)
+    return {int(n): t for n, t in cached["pages"].items()}, cached["page_count"]
+
+
+def save_pages(
+    store: Optional[ArtifactStore],
+    pdf_hash: str,
+    pages: Dict[int, str],
+    page_count: int,
+    producer: str = "pdf_text",
+) -> None:
+    """
+    Merge freshly parsed pages into the cached page set for this PDF. The
+    merge runs inside the store's update, so pages saved concurrently by
+    another thread or process are kept.
+    """
+    if store is None or not pages:
+        return
+
+    def _merge(raw: Optional[str]) -> str:
+        cached = {int(n): t for n, t in json.loads(raw)["pages"].items()} if raw else {}
+        cached.update(pages)
+        return json.dumps({"page_count": page_count, "pages": {str(n): t for n, t in sorted(cached.items())}})
+
+    store.update_text("pages", pdf_hash, _merge, producer=producer, input_hash=pdf_hash)
+
+
+def join_pages(pages: Dict[int, str]) -> str:
+    return PAGE_SEPARATOR.join(pages[n] for n in sorted(pages) if pages[n])
+
+
+def cached_full_text(store: Optional[ArtifactStore], pdf_hash: str) -> Optional[str]:
+    """Full text if every page of this PDF is already cached, else None."""
+    pages, page_count = load_cached_pages(store, pdf_hash)
+    if page_count is None or len(pages) < page_count:
+        return None
+    return join_pages(pages)
+
+
+def extract(
+    pdf_path: str,
+    first_page: int = 0,
+    last_page: Optional[int] = None,
+    max_chars: Optional[int] = None,
+    store: Optional[ArtifactStore] = None,
+    pdf_hash: Optional[str] = None,
+    producer: str = "pdf_text",
+) -> Dict[str, Any]:
+    """
+    Extract text for pages [first_page, last_page) (0-based, end exclusive).
+
+    With `max_chars`, pages are read one at a time and reading stops once the
+    budget is met. Cached pages come from `store`; new ones are written back.
+    Returns {"text", "page_count", "pages_parsed"}.
+    """
+    pdf_hash = pdf_hash or (hash_file(pdf_path) if store is not None else "")
+    pages, page_count = load_cached_pages(store, pdf_hash)
+    parsed: Dict[int, str] = {}
+    doc = None
+
+    try:
+        if page_count is None:
+            doc, page_count = _open(pdf_path)
+        end = page_count if last_page is None else min(last_page, page_count)
+
+        chunks = []
+        size = 0
+        for n in range(max(0, first_page), end):
+            if n not in pages:
+                if doc is None:
+                    doc, _ = _open(pdf_path)
+                parsed[n] = pages[n] = _page_text(doc, n)
+            if pages[n]:
+                chunks.append(pages[n])
+                size += len(pages[n]) + len(PAGE_SEPARATOR)
+            if max_chars is not None and size >= max_chars:
+                break
+    finally:
+        if doc is not None:
+            _close(doc)
+
+    if parsed:
+        try:
+            save_pages(store, pdf_hash, parsed, page_count, producer=producer)
+        except Exception as e:
+            log_warn(f"[PDFText] ⚠️ Could not cache pages for {pdf_path}: {e}")
+
+    text = PAGE_SEPARATOR.join(chunks)
+    if max_chars is not None:
+        text = text[:max_chars]
+    return {"text": text, "page_count": page_count, "pages_parsed": len(parsed)}
+
+
+def extract_text(pdf_path: str, **kwargs: Any) -> str:
+    """Text-only shorthand for `extract`."""
+    return extract(pdf_path, **kwargs)["text"]
@@ -0,0 +1,271 @@
+# utils/profiling.py
+import contextvars
+import cProfile
+import itertools
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils import tracing
+from utils.logger import log_info, log_warn
+
+PROFILES_DIR = "data/profiles"
+TOP_N = 15
+MODES = ("cpu", "memory", "all")
+
+_active: contextvars.ContextVar[Optional["_StepProfile"]] = contextvars.ContextVar("profile_step", default=None)
+_local = threading.local()  # per thread: is a cProfile already running here?
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^\w\-.]", "_", name)
+
+
+class _StepProfile:
+    """cProfile runs of one step, one per thread that worked on it."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.profiles: List[cProfile.Profile] = []
+
+    @contextmanager
+    def thread(self) -> Iterator[None]:
+        """Profile the current thread for the duration of the block (once per thread)."""
+        if getattr(_local, "busy", False):
+            yield
+            return
+        # per-thread CPU time, so pool threads waiting on I/O don't count
+        profile = cProfile.Profile(time.thread_time)
+        try:
+            profile.enable()
+        except ValueError:  # Python 3.12+: another profiler is active in this process
+            yield
+            return
+        _local.busy = True
+        try:
+            yield
+        finally:
+            profile.disable()
+            _local.busy = False
+            with self.lock:
+                self.profiles.append(profile)
+
+
+@contextmanager
+def _pool_thread_hook() -> Iterator[None]:
+    """Registered with tracing: work a profiled step hands to a pool is profiled too."""
+    step = _active.get()
+    if step is None:
+        yield
+        return
+    with step.thread():
+        yield
+
+
+class _PeakTracker:
+    """
+    tracemalloc has one process-wide peak. Each open step keeps the highest
+    peak seen while it was open: on every step start/end the current peak is
+    folded into all open steps and then reset.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open: Dict[int, int] = {}
+        self._ids = itertools.count(1)
+
+    def _fold(self) -> None:
+        _, peak = tracemalloc.get_traced_memory()
+        for key in self._open:
+            self._open[key] = max(self._open[key], peak)
+        tracemalloc.reset_peak()
+
+    def start(self) -> int:
+        with self._lock:
+            self._fold()
+            key = next(self._ids)
+            self._open[key] = tracemalloc.get_traced_memory()[0]
+            return key
+
+    def stop(self, key: int) -> int:
+        with self._lock:
+            self._fold()
+            return self._open.pop(key)
+
+
+class Profiler:
+    """
+    Opt-in CPU (cProfile) and memory (tracemalloc) profiling of workflow
+    steps, written under `<root>/<task_id>/`:
+      - <step>[.<item>].prof       pstats file (snakeviz, `python -m pstats`)
+      - <step>.alloc.txt           top `top_n` allocation sites by net growth
+                                   while the step (all its items) ran
+      - summary.json               per-run rows, also printed by print_summary()
+
+    CPU profiles cover the step's thread and any pool thread it hands work
+    to through utils.tracing.propagate (ordered_map, summariser pools).
+    Memory peaks are process-wide while the step ran, so steps running at
+    the same time share them; use --workers 1 to attribute peaks exactly.
+    """
+
+    def __init__(self, task_id: str, mode: str = "all", root: str = PROFILES_DIR, top_n: int = TOP_N):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode '{mode}' (expected one of {MODES})")
+        self.task_id = task_id
+        self.cpu = mode in ("cpu", "all")
+        self.memory = mode in ("memory", "all")
+        self.top_n = top_n
+        self.directory = os.path.join(root, _safe(task_id))
+        self.rows: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._names: Dict[str, int] = {}
+        self._open_steps: Dict[str, List[Any]] = {}  # step -> [runs in progress, snapshot at first start]
+        self._peaks = _PeakTracker()
+        self._started_tracemalloc = False
+        os.makedirs(self.directory, exist_ok=True)
+        if self.cpu:
+            tracing.add_thread_hook(_pool_thread_hook)
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def _file_stem(self, step: str, item: Optional[str]) -> str:
+        stem = _safe(step if item is None else f"{step}.{item}")
+        with self._lock:
+            # the same step can run twice (e.g. resumed); don't overwrite
+            n = self._names.get(stem, 0)
+            self._names[stem] = n + 1
+        return stem if n == 0 else f"{stem}.{n}"
+
+    @contextmanager
+    def step(self, step: str, item: Optional[str] = None) -> Iterator[None]:
+        stem = self._file_stem(step, item)
+        row: Dict[str, Any] = {"step": step, "item": item}
+        cpu_step = _StepProfile() if self.cpu else None
+        token = _active.set(cpu_step)
+        if self.memory:
+            self._enter_memory(step)
+        peak_key = self._peaks.start() if self.memory else None
+        current_before = tracemalloc.get_traced_memory()[0] if self.memory else 0
+        started = time.perf_counter()
+        try:
+            if cpu_step is not None:
+                with cpu_step.thread():
+                    yield
+            else:
+                yield
+        finally:
+            row["seconds"] = round(time.perf_counter() - started, 4)
+            _active.reset(token)
+            try:
+                if cpu_step is not None:
+                    row.update(self._write_cpu(cpu_step, stem))
+                if self.memory:
+                    peak = self._peaks.stop(peak_key)
+                    row["peak_mb"] = round(peak / 2**20, 2)
+                    row["net_mb"] = round((tracemalloc.get_traced_memory()[0] - current_before) / 2**20, 2)
+                    report = self._exit_memory(step)
+                    if report:
+                        row["alloc_report"] = report
+            except Exception as e:
+                log_warn(f"[Profiler] ⚠️ Could not write profile for {stem}: {e}")
+            with self._lock:
+                self.rows.append(row)
+
+    def _write_cpu(self, cpu_step: _StepProfile, stem: str) -> Dict[str, Any]:
+        with cpu_step.lock:
+            profiles = list(cpu_step.profiles)
+        if not profiles:
+            return {}
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        path = os.path.join(self.directory, f"{stem}.prof")
+        stats.dump_stats(path)
+        return {"cpu_s": round(stats.total_tt, 4), "threads": len(profiles), "prof": path}
+
+    def _enter_memory(self, step: str) -> None:
+        with self._lock:
+            entry = self._open_steps.setdefault(step, [0, None])
+            if entry[0] == 0:
+                entry[1] = tracemalloc.take_snapshot()
+            entry[0] += 1
+
+    def _exit_memory(self, step: str) -> Optional[str]:
+        """Allocation report once the step's last running item ends (snapshots are costly per item)."""
+        with self._lock:
+            entry = self._open_steps[step]
+            entry[0] -= 1
+            if entry[0]:
+                return None
+            before = self._open_steps.pop(step)[1]
+        return self._write_allocations(before, self._file_stem(f"{step}.alloc", None))
+
+    def _write_allocations(self, before: tracemalloc.Snapshot, stem: str) -> str:
+        after = tracemalloc.take_snapshot()
+        diff = after.compare_to(before, "lineno")
+        # the profilers' own bookkeeping is not interesting
+        ignore = (tracemalloc.__file__, cProfile.__file__, __file__)
+        top = [stat for stat in diff if stat.traceback[0].filename not in ignore][: self.top_n]
+        path = os.path.join(self.directory, f"{stem}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"Top {self.top_n} allocation sites by net growth during {stem}\n\n")
+            for stat in top:
+                f.write(f"{stat}\n")
+        return path
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """One row per step: runs, wall and CPU time, max peak and total net memory."""
+        stages: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            rows = list(self.rows)
+        for row in rows:
+            stage = stages.setdefault(row["step"], {"step": row["step"], "runs": 0, "seconds": 0.0})
+            stage["runs"] += 1
+            stage["seconds"] = round(stage["seconds"] + row["seconds"], 4)
+            if "cpu_s" in row:
+                stage["cpu_s"] = round(stage.get("cpu_s", 0.0) + row["cpu_s"], 4)
+            if "peak_mb" in row:
+                stage["peak_mb"] = max(stage.get("peak_mb", 0.0), row["peak_mb"])
+                stage["net_mb"] = round(stage.get("net_mb", 0.0) + row["net_mb"], 2)
+        return sorted(stages.values(), key=lambda s: s.get("peak_mb", s["seconds"]), reverse=True)
+
+    def close(self) -> str:
+        """Write summary.json, stop tracemalloc if we started it; returns the profile directory."""
+        with open(os.path.join(self.directory, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump({"task_id": self.task_id, "stages": self.summary(), "runs": self.rows}, f, indent=2)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        log_info(f"[Profiler] 📊 Profiles written to {self.directory}")
+        return self.directory
+
+    def print_summary(self) -> None:
+        from rich import box
+        from rich.table import Table
+
+        from utils.logger import flush, get_console
+
+        stages = self.summary()
+        if not stages:
+            return
+        flush()
+        table = Table(title=f"Profile (task_id={self.task_id})", box=box.SIMPLE, pad_edge=False,
+                      caption="memory peaks are process-wide while the step ran" if self.memory else None)
+        table.add_column("step", no_wrap=True)
+        for column in ("runs", "wall s", "cpu s", "peak MB", "net MB"):
+            table.add_column(column, justify="right", no_wrap=True)
+        for s in stages:
+            table.add_row(
+                s["step"], str(s["runs"]), f"{s['seconds']:.3f}",
+                f"{s['cpu_s']:.3f}" if "cpu_s" in s else "",
+                f"{s['peak_mb']:.1f}" if "peak_mb" in s else "",
+                f"{s['net_mb']:.1f}" if "net_mb" in s else "",
+            )
+        get_console().print(table)
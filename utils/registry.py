@@ -0,0 +1,58 @@
+# utils/registry.py
+import importlib
+import threading
+from typing import Any, Dict, List, Union
+
+TOOL_GROUP = "agentflow.tools"
+AGENT_GROUP = "agentflow.agents"
+
+
+class Registry:
+    """
+    Maps plugin names to "module:attr" targets that are imported on first
+    use, so listing or registering plugins costs no imports.
+
+    Besides the built-in targets, installed packages can contribute plugins
+    through the `group` entry-point group; those are only scanned when a
+    name is not found among the known ones.
+    """
+
+    def __init__(self, group: str, targets: Dict[str, str]):
+        self.group = group
+        self._targets: Dict[str, Union[str, Any]] = dict(targets)
+        self._scanned = False
+        self._lock = threading.Lock()
+
+    def register(self, name: str, target: Union[str, Any]) -> None:
+        """Register a "module:attr" string or an already-imported object."""
+        with self._lock:
+            self._targets[name] = target
+
+    def names(self) -> List[str]:
+        self._scan_entry_points()
+        with self._lock:
+            return sorted(self._targets)
+
+    def load(self, name: str) -> Any:
+        """Import and return the object registered as `name`; KeyError if unknown."""
+        if name not in self._targets:
+            self._scan_entry_points()
+        with self._lock:
+            if name not in self._targets:
+                raise KeyError(f"Unknown {self.group} plugin '{name}'")
+            target = self._targets[name]
+            if isinstance(target, str):
+                module_name, _, attr = target.partition(":")
+                target = getattr(importlib.import_module(module_name), attr)
+                self._targets[name] = target
+            return target
+
+    def _scan_entry_points(self) -> None:
+        with self._lock:
+            if self._scanned:
+                return
+            self._scanned = True
+            from importlib.metadata import entry_points
+
+            for ep in entry_points(group=self.group):
+                self._targets.setdefault(ep.name, ep.value)
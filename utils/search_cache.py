@@ -0,0 +1,79 @@
+# utils/search_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+CACHE_DB = "data/cache/search_cache.sqlite3"
+DEFAULT_TTL = 24 * 3600            # seconds; arXiv listings change daily
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    key        TEXT PRIMARY KEY,
+    value      TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_search_cache_created ON search_cache (created_at);
+"""
+
+
+class SearchCache:
+    """
+    On-disk cache of search result pages, keyed by the request parameters.
+    Entries expire after `ttl` seconds; expired rows are pruned on write.
+    """
+
+    def __init__(self, db_path: str = CACHE_DB, ttl: float = DEFAULT_TTL):
+        self.ttl = ttl
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def make_key(params: Dict[str, Any]) -> str:
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, params: Dict[str, Any]) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM search_cache WHERE key = ? AND created_at >= ?",
+                (self.make_key(params), time.time() - self.ttl),
+            ).fetchone()
+            self.stats["hits" if row else "misses"] += 1
+        return json.loads(row[0]) if row else None
+
+    def put(self, params: Dict[str, Any], value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (self.make_key(params), json.dumps(value), now),
+            )
+            self._conn.execute("DELETE FROM search_cache WHERE created_at < ?", (now - self.ttl,))
+            self._conn.commit()
+
+    def clear(self) -> int:
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM search_cache").rowcount
+            self._conn.commit()
+        return deleted
+
+
+_cache: Optional[SearchCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Return the process-wide search cache (created on first use)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SearchCache()
+        return _cache
@@ -0,0 +1,28 @@
+# utils/streaming.py
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Callable, Deque, Iterable, Iterator, TypeVar
+
+from utils.tracing import propagate
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def ordered_map(fn: Callable[[T], R], items: Iterable[T], pool: Executor, window: int) -> Iterator[R]:
+    """
+    Lazily map `fn` over `items` on `pool`, yielding results in input order.
+
+    At most `window` items are in flight, and `items` is only pulled when
+    there is room, which gives backpressure to a lazy upstream. Completed
+    results at the head are yielded without waiting for the rest.
+    """
+    window = max(1, window)
+    fn = propagate(fn)
+    pending: Deque[Future] = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        while pending and (len(pending) >= window or pending[0].done()):
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
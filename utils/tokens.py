@@ -0,0 +1,114 @@
+# utils/tokens.py
+import re
+from typing import List, Sequence
+
+
+CONTEXT_WINDOWS = {
+    "llama3-70b-8192": 8192,
+    "llama3-8b-8192": 8192,
+    "llama-3.1-8b-instant": 131072,
+    "llama-3.3-70b-versatile": 131072,
+}
+DEFAULT_CONTEXT = 8192
+SAFETY_MARGIN = 256  # tokens kept free for chat formatting and estimate error
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+_UNSET = object()
+_encoding_obj = _UNSET
+
+
+def _encoding():
+    """tiktoken's cl100k encoding if available (loaded on first use), else None."""
+    global _encoding_obj
+    if _encoding_obj is _UNSET:
+        try:
+            import tiktoken
+
+            # Llama 3's tokenizer extends cl100k's vocabulary, so counts are close
+            _encoding_obj = tiktoken.get_encoding("cl100k_base")
+        except Exception:  # not installed, or no cached encoding offline
+            _encoding_obj = None
+    return _encoding_obj
+
+
+def count_tokens(text: str) -> int:
+    """
+    Tokens in `text`: exact with tiktoken installed, otherwise estimated
+    from words and punctuation (a word of up to 5 characters is one token,
+    longer words one more per 5 characters; each symbol is one token).
+    """
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(1 if not p[0].isalnum() and p[0] != "_" else (len(p) + 4) // 5 for p in _PIECE.findall(text))
+
+
+def context_window(model: str) -> int:
+    return CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of `text` (cut at a word boundary) within `max_tokens`."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    # binary search over word boundaries
+    cuts = [m.start() for m in re.finditer(r"\s+", text)] + [len(text)]
+    lo, hi = 0, len(cuts) - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:cuts[mid]]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:cuts[lo]] if count_tokens(text[:cuts[lo]]) <= max_tokens else ""
+
+
+def output_budget(
+    input_tokens: int,
+    model: str,
+    ratio: float = 0.25,
+    floor: int = 128,
+    ceiling: int = 1024,
+) -> int:
+    """
+    `max_tokens` for a request: `ratio` of the input, clamped to
+    [floor, ceiling] and to what is left of the model's context window.
+    """
+    room = context_window(model) - input_tokens - SAFETY_MARGIN
+    wanted = min(ceiling, max(floor, int(input_tokens * ratio)))
+    return max(1, min(wanted, room))
+
+
+def pack(
+    token_counts: Sequence[int],
+    budget: int,
+    per_item_overhead: int = 0,
+    per_item_output: int = 0,
+    max_items: int = 0,
+) -> List[List[int]]:
+    """
+    Greedily group item indices, in order, so each group's input plus
+    expected output fits in `budget` tokens:
+        sum(count + per_item_overhead + per_item_output) <= budget
+    An item too big on its own still gets a group of its own.
+    `max_items` (0 = no limit) caps the group size.
+    """
+    groups: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for i, count in enumerate(token_counts):
+        cost = count + per_item_overhead + per_item_output
+        full = max_items and len(current) >= max_items
+        if current and (used + cost > budget or full):
+            groups.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        groups.append(current)
+    return groups
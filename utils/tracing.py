@@ -0,0 +1,320 @@
+# utils/tracing.py
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, ContextManager, Deque, Dict, Iterable, Iterator, List, Optional
+
+MAX_SPANS = 100_000  # oldest spans are dropped past this (long-running workers)
+CONTEXT_FIELDS = ("task_id", "step", "item")
+
+_current_span: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("span", default=None)
+_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("trace_context", default={})
+_thread_hooks: List[Callable[[], ContextManager[Any]]] = []
+
+
+class Tracer:
+    """
+    Collects finished spans in memory. A span is a dict:
+        {"id", "parent", "name", "kind", "task_id", "step", "item",
+         "thread", "start" (epoch s), "duration" (s), "error", "attrs"}
+    `kind` groups spans into stages ("agent", "tool", "http", "llm", ...);
+    `attrs` holds counters such as bytes and tokens.
+
+    task_id/step/item come from the enclosing `context()` unless given
+    explicitly; spans opened inside a span become its children.
+    """
+
+    def __init__(self, max_spans: int = MAX_SPANS):
+        self._spans: Deque[Dict[str, Any]] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _new(self, name: str, kind: str, fields: Dict[str, Any], attrs: Dict[str, Any]) -> Dict[str, Any]:
+        parent = _current_span.get()
+        ctx = _context.get()
+        span = {
+            "id": next(self._ids),
+            "parent": parent["id"] if parent else None,
+            "name": name,
+            "kind": kind,
+            "thread": threading.current_thread().name,
+            "start": time.time(),
+            "duration": 0.0,
+            "error": None,
+            "attrs": attrs,
+        }
+        for field in CONTEXT_FIELDS:
+            span[field] = fields.get(field, ctx.get(field))
+        return span
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attrs: Any) -> Iterator[Dict[str, Any]]:
+        fields = {f: attrs.pop(f) for f in CONTEXT_FIELDS if f in attrs}
+        span = self._new(name, kind, fields, attrs)
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span["duration"] = time.perf_counter() - started
+            _current_span.reset(token)
+            with self._lock:
+                self._spans.append(span)
+
+    def record(self, name: str, kind: str, start: float, duration: float, **attrs: Any) -> Dict[str, Any]:
+        """Add a span timed elsewhere (e.g. work done in another process)."""
+        fields = {f: attrs.pop(f) for f in CONTEXT_FIELDS if f in attrs}
+        span = self._new(name, kind, fields, attrs)
+        span["start"], span["duration"] = start, duration
+        with self._lock:
+            self._spans.append(span)
+        return span
+
+    def spans(self, task_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [s for s in self._spans if task_id is None or s["task_id"] == task_id]
+
+    def clear(self, task_id: Optional[str] = None) -> None:
+        with self._lock:
+            if task_id is None:
+                self._spans.clear()
+            else:
+                kept = [s for s in self._spans if s["task_id"] != task_id]
+                self._spans.clear()
+                self._spans.extend(kept)
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer (created on first use)."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+
+def span(name: str, kind: str = "internal", **attrs: Any):
+    """`with span("arxiv.org", "http") as s:` on the shared tracer."""
+    return get_tracer().span(name, kind, **attrs)
+
+
+def current_span() -> Optional[Dict[str, Any]]:
+    return _current_span.get()
+
+
+def annotate(**attrs: Any) -> None:
+    """Set attributes on the innermost open span (no-op outside one)."""
+    current = _current_span.get()
+    if current is not None:
+        current["attrs"].update(attrs)
+
+
+def add(**counters: float) -> None:
+    """Increment counters (bytes, tokens, ...) on the innermost open span."""
+    current = _current_span.get()
+    if current is not None:
+        attrs = current["attrs"]
+        for key, value in counters.items():
+            attrs[key] = attrs.get(key, 0) + value
+
+
+@contextmanager
+def context(**fields: Any) -> Iterator[None]:
+    """Attribute spans opened inside the block to task_id / step / item."""
+    token = _context.set({**_context.get(), **{k: v for k, v in fields.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_context() -> Dict[str, Any]:
+    return dict(_context.get())
+
+
+def add_thread_hook(hook: Callable[[], ContextManager[Any]]) -> None:
+    """
+    Run every propagated call inside `hook()`, a context manager entered on
+    the pool thread (e.g. to profile work a step hands to its own pools).
+    """
+    if hook not in _thread_hooks:
+        _thread_hooks.append(hook)
+
+
+def _call_with_hooks(fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+    with ExitStack() as stack:
+        for hook in list(_thread_hooks):
+            stack.enter_context(hook())
+        return fn(*args, **kwargs)
+
+
+def propagate(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Bind `fn` to the caller's trace context, for work handed to a thread
+    pool (pool threads don't inherit context variables by themselves).
+    """
+    ctx = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def _run(*args: Any, **kwargs: Any) -> Any:
+        # a Context can only be entered by one thread at a time
+        if _thread_hooks:
+            return ctx.copy().run(_call_with_hooks, fn, args, kwargs)
+        return ctx.copy().run(fn, *args, **kwargs)
+
+    return _run
+
+
+def submit(pool: Any, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """`pool.submit(fn, ...)` with `fn` running in the caller's trace context."""
+    return pool.submit(propagate(fn), *args, **kwargs)
+
+
+def traced_run(kind: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorator for `run(self, input)` methods: one span per call, named after
+    the instance (`self.name`). A subclass run() calling super().run() is
+    not counted twice.
+    """
+
+    def decorator(run: Callable[..., Any]) -> Callable[..., Any]:
+        if getattr(run, "_traced", False):
+            return run
+
+        @functools.wraps(run)
+        def _run(self: Any, *args: Any, **kwargs: Any) -> Any:
+            name = getattr(self, "name", None) or type(self).__name__
+            parent = _current_span.get()
+            if parent is not None and parent["kind"] == kind and parent["name"] == name:
+                return run(self, *args, **kwargs)
+            # outside a workflow, attribute the call (and what it calls) to the object's own task_id
+            task_id = _context.get().get("task_id") or getattr(self, "task_id", None)
+            with context(task_id=task_id), span(name, kind) as s:
+                output = run(self, *args, **kwargs)
+                if isinstance(output, dict) and output.get("status") == "error":
+                    s["error"] = str(output.get("message") or output.get("error") or "error")
+                return output
+
+        _run._traced = True  # type: ignore[attr-defined]
+        return _run
+
+    return decorator
+
+
+# ---- export ------------------------------------------------------------------
+
+def export_jsonl(spans: Iterable[Dict[str, Any]], path: str) -> str:
+    """One span per line."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for s in spans:
+            f.write(json.dumps(s, default=str) + "\n")
+    return path
+
+
+def to_chrome_trace(spans: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Chrome trace-event JSON (chrome://tracing, Perfetto): one complete event per span."""
+    pid = os.getpid()
+    tids: Dict[str, int] = {}
+    events: List[Dict[str, Any]] = []
+    for s in spans:
+        tid = tids.setdefault(s["thread"], len(tids) + 1)
+        args = {k: s[k] for k in CONTEXT_FIELDS + ("error",) if s.get(k) is not None}
+        args.update(s["attrs"])
+        events.append({
+            "name": s["name"],
+            "cat": s["kind"],
+            "ph": "X",
+            "ts": round(s["start"] * 1e6),
+            "dur": round(s["duration"] * 1e6),
+            "pid": pid,
+            "tid": tid,
+            "args": args,
+        })
+    for thread, tid in tids.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread}})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome(spans: Iterable[Dict[str, Any]], path: str) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(to_chrome_trace(spans), f, default=str)
+    return path
+
+
+def export(spans: Iterable[Dict[str, Any]], path: str) -> str:
+    """`.jsonl` -> JSON lines, anything else -> Chrome trace."""
+    if path.endswith(".jsonl"):
+        return export_jsonl(spans, path)
+    return export_chrome(spans, path)
+
+
+# ---- reporting ---------------------------------------------------------------
+
+def _number(value: Any) -> float:
+    return value if isinstance(value, (int, float)) else 0
+
+
+def stage_breakdown(spans: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Per-stage totals, slowest first. A stage is "kind:name", e.g.
+    "agent:SearchAgent", "http:export.arxiv.org", "llm:llama3-70b-8192".
+    Times are summed over spans, so concurrent or nested spans overlap.
+    """
+    stages: Dict[str, Dict[str, Any]] = {}
+    for s in spans:
+        key = f"{s['kind']}:{s['name']}"
+        row = stages.setdefault(key, {"stage": key, "count": 0, "errors": 0, "durations": [], "bytes": 0, "tokens": 0})
+        row["count"] += 1
+        row["errors"] += 1 if s.get("error") else 0
+        row["durations"].append(s["duration"])
+        attrs = s["attrs"]
+        row["bytes"] += _number(attrs.get("bytes"))
+        row["tokens"] += _number(attrs.get("prompt_tokens")) + _number(attrs.get("completion_tokens"))
+
+    rows = []
+    for row in stages.values():
+        durations = sorted(row.pop("durations"))
+        row["total_s"] = sum(durations)
+        row["mean_s"] = row["total_s"] / len(durations)
+        row["p95_s"] = durations[min(len(durations) - 1, int(0.95 * len(durations)))]
+        row["max_s"] = durations[-1]
+        rows.append(row)
+    return sorted(rows, key=lambda r: r["total_s"], reverse=True)
+
+
+def print_breakdown(spans: Iterable[Dict[str, Any]], title: str = "Per-stage latency") -> None:
+    from rich import box
+    from rich.table import Table
+
+    from utils.logger import flush, get_console
+
+    rows = stage_breakdown(spans)
+    if not rows:
+        return
+    flush()  # queued log lines first
+    table = Table(title=title, caption="seconds summed over spans; concurrent and nested spans overlap", box=box.SIMPLE, pad_edge=False)
+    table.add_column("stage", no_wrap=True)
+    for column in ("calls", "err", "total", "p95", "max", "bytes", "tokens"):
+        table.add_column(column, justify="right", no_wrap=True)
+    for r in rows:
+        table.add_row(
+            r["stage"], str(r["count"]), str(r["errors"] or ""),
+            f"{r['total_s']:.3f}", f"{r['p95_s']:.3f}", f"{r['max_s']:.3f}",
+            str(r["bytes"] or ""), str(r["tokens"] or ""),
+        )
+    get_console().print(table)
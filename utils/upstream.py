@@ -0,0 +1,284 @@
+# utils/upstream.py
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from utils.logger import log_warn
+from utils.tracing import annotate, span
+
+# Requests per second (rate) and burst size per upstream host; unknown hosts
+# (including local stand-in servers) get DEFAULT_LIMITS.
+UPSTREAM_LIMITS: Dict[str, Dict[str, float]] = {
+    "export.arxiv.org": {"rate": 1 / 3, "burst": 1},  # arXiv API terms: one request every 3 s
+    "arxiv.org": {"rate": 4.0, "burst": 4},
+    "api.groq.com": {"rate": 0.5, "burst": 5},  # 30 requests/minute
+}
+DEFAULT_LIMITS = {"rate": 10.0, "burst": 10}
+
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 1.0  # seconds; attempt n waits up to BACKOFF_BASE * 2**(n-1)
+BACKOFF_CAP = 30.0
+FAILURE_THRESHOLD = 5  # consecutive failures that open the circuit
+RESET_TIMEOUT = 30.0  # seconds an open circuit sheds load before a probe
+MIN_RATE_FACTOR = 0.05  # 429s never slow a bucket below this share of its rate
+RECOVERY = 1.1  # rate growth per success after being throttled
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+TRANSIENT_ERRORS: Tuple[type, ...] = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the upstream while its circuit is open."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"circuit open for {host}; retry in {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**(attempt-1))]."""
+    return random.uniform(0, min(cap, base * 2 ** max(0, attempt - 1)))
+
+
+def parse_duration(value: Any) -> Optional[float]:
+    """Seconds from "12", "1.5", "2m59.56s" or "120ms" (Retry-After / x-ratelimit-reset-*)."""
+    if value is None:
+        return None
+    text = str(value).strip()
+    try:
+        return max(0.0, float(text))
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", text)
+    if not parts or "".join(n + u for n, u in parts) != text:
+        return None
+    scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(n) * scale[u] for n, u in parts)
+
+
+def _header(headers: Optional[Mapping[str, str]], *names: str) -> Optional[str]:
+    if not headers:
+        return None
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+class TokenBucket:
+    """
+    Client-side rate limit for one upstream: `rate` requests per second with
+    bursts of up to `burst`. acquire() reserves a token and sleeps outside
+    the lock until it is due, so waiting callers are served in order.
+
+    The rate adapts: a 429 halves it and pauses the bucket for Retry-After;
+    rate-limit headers (remaining / reset) pace it to what the upstream says
+    is left; successes let it grow back towards the configured rate.
+    """
+
+    def __init__(self, rate: float, burst: float = 1):
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.min_rate = self.base_rate * MIN_RATE_FACTOR
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is available; returns the time waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            delay = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            delay = max(delay, self._paused_until - now)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def throttle(self, retry_after: Optional[float] = None) -> None:
+        """The upstream answered 429: slow down, and pause for `retry_after` if given."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+    def observe(self, headers: Optional[Mapping[str, str]]) -> None:
+        """Tune the rate from a successful response's rate-limit headers."""
+        remaining = _header(headers, "x-ratelimit-remaining-requests", "x-ratelimit-remaining")
+        reset = parse_duration(_header(headers, "x-ratelimit-reset-requests", "x-ratelimit-reset"))
+        with self._lock:
+            if remaining is None or not reset:
+                self.rate = min(self.base_rate, self.rate * RECOVERY)
+                return
+            try:
+                left = float(remaining)
+            except ValueError:
+                return
+            now = time.monotonic()
+            if left < 1:
+                self._paused_until = max(self._paused_until, now + reset)
+            else:
+                self.rate = min(self.base_rate, max(self.min_rate, left / reset))
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures; while open,
+    calls fail fast with CircuitOpenError. After `reset_timeout` one probe is
+    let through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, host: str, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT):
+        self.host = host
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == "closed":
+                return
+            now = time.monotonic()
+            retry_in = self._opened_at + self.reset_timeout - now
+            if self.state == "open" and retry_in <= 0:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return
+            raise CircuitOpenError(self.host, max(0.0, retry_in))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self.state = "closed"
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    log_warn(f"[Upstream] 🔌 Circuit open for {self.host} after {self._failures} failures")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+def _status_of(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    return parse_duration(_header(getattr(getattr(error, "response", None), "headers", None), "retry-after"))
+
+
+class Upstream:
+    """
+    Every outbound call to one host goes through `call()`: circuit check,
+    token bucket, then the call itself with retries. 429s and 5xx responses
+    (raised as exceptions carrying a status code, like requests.HTTPError
+    or groq.APIStatusError), connection errors, timeouts and `retry_on`
+    exceptions are retried with exponential backoff and jitter; other
+    errors are raised straight away. `retry_on` is for a client's own
+    transport errors: like 5xx they count toward the circuit breaker, so
+    don't pass errors about a single response's content.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        rate: float = DEFAULT_LIMITS["rate"],
+        burst: float = DEFAULT_LIMITS["burst"],
+        max_attempts: int = MAX_ATTEMPTS,
+        backoff_base: float = BACKOFF_BASE,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT,
+    ):
+        self.host = host
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(host, failure_threshold, reset_timeout)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+
+    def call(self, fn: Callable[..., Any], *args: Any, retry_on: Tuple[type, ...] = (), **kwargs: Any) -> Any:
+        # one "http" span per call, retries and waits included; `fn` can add bytes to it
+        with span(self.host, "http"):
+            return self._call(fn, args, kwargs, retry_on)
+
+    def _call(self, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any], retry_on: Tuple[type, ...]) -> Any:
+        for attempt in range(1, self.max_attempts + 1):
+            annotate(attempts=attempt)
+            self.breaker.before_call()
+            self.bucket.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                status = _status_of(e)
+                annotate(status=status)
+                if status == 429:
+                    # throttled, not down: slow the bucket, leave the circuit alone
+                    self.breaker.record_success()
+                    retry_after = _retry_after(e)
+                    self.bucket.throttle(retry_after)
+                    delay = 0.0 if retry_after else backoff_delay(attempt, self.backoff_base)
+                elif status in RETRY_STATUSES or (status is None and isinstance(e, TRANSIENT_ERRORS + retry_on)):
+                    self.breaker.record_failure()
+                    delay = max(backoff_delay(attempt, self.backoff_base), _retry_after(e) or 0.0)
+                else:
+                    # the upstream answered (e.g. 404) or the error is ours: not an outage
+                    self.breaker.record_success()
+                    raise
+                if attempt == self.max_attempts:
+                    raise
+                log_warn(f"[Upstream] 🔁 {self.host} attempt {attempt} failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            self.bucket.observe(getattr(result, "headers", None))
+            if hasattr(result, "status_code"):
+                annotate(status=result.status_code)
+            return result
+
+
+_upstreams: Dict[str, Upstream] = {}
+_upstreams_lock = threading.Lock()
+
+
+def get_upstream(url_or_host: str) -> Upstream:
+    """Return the process-wide Upstream for a host (a full URL works too)."""
+    host = urlparse(url_or_host).netloc if "://" in url_or_host else url_or_host
+    with _upstreams_lock:
+        if host not in _upstreams:
+            limits = UPSTREAM_LIMITS.get(host.split(":")[0], DEFAULT_LIMITS)
+            _upstreams[host] = Upstream(host, **limits)
+        return _upstreams[host]
@@ -0,0 +1,274 @@
+# utils/vector_index.py
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import re
+import sqlite3
+import threading
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from utils.arxiv import base_arxiv_id
+from utils.logger import log_info
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python scoring fallback
+    np = None
+
+INDEX_ROOT = "data/index"
+DIM = 512
+CHUNK_WORDS = 200
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was we were with".split()
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vectors (
+    row       INTEGER PRIMARY KEY,
+    doc_id    TEXT NOT NULL UNIQUE,
+    kind      TEXT NOT NULL,
+    ref       TEXT,
+    arxiv_id  TEXT,
+    title     TEXT,
+    url       TEXT,
+    text_hash TEXT NOT NULL,
+    text      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_vectors_kind ON vectors (kind);
+CREATE INDEX IF NOT EXISTS idx_vectors_arxiv ON vectors (arxiv_id);
+"""
+
+
+def embed(text: str, dim: int = DIM) -> Dict[int, float]:
+    """
+    Hashing-trick embedding: unigrams and bigrams hashed into `dim` signed
+    buckets with log term frequency, L2-normalised. Returned sparse
+    ({bucket: weight}); lexical rather than semantic, but needs no model.
+    """
+    words = [w for w in _TOKEN.findall(text.lower()) if w not in _STOPWORDS]
+    terms = Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+    vec: Dict[int, float] = {}
+    for term, count in terms.items():
+        h = int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+        bucket = h % dim
+        vec[bucket] = vec.get(bucket, 0.0) + (1.0 + math.log(count)) * (1.0 if h >> 63 else -1.0)
+    norm = math.sqrt(sum(v * v for v in vec.values()))
+    return {k: v / norm for k, v in vec.items() if v} if norm else {}
+
+
+def chunk_text(text: str, words: int = CHUNK_WORDS) -> List[str]:
+    """Split text into passages of about `words` words."""
+    tokens = text.split()
+    return [" ".join(tokens[i:i + words]) for i in range(0, len(tokens), words)]
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class VectorIndex:
+    """
+    Local embedding index over summaries and extracted paper text.
+
+    Vectors are fixed-size float32 rows in `<root>/vectors.f32`, read through
+    a memory map at query time; `<root>/index.sqlite3` maps each row to its
+    document (kind, arXiv ID, title, text). Search is brute-force cosine
+    similarity: with NumPy over the whole matrix, otherwise in pure Python
+    over just the query's non-zero buckets.
+
+    Adding a document whose text has not changed is a no-op, so callers can
+    feed it on every run; changed documents are rewritten in place. Rows are
+    allocated and their vectors written inside one `BEGIN IMMEDIATE`
+    transaction, so processes sharing an index (worker, CLI) never take the
+    same row.
+    """
+
+    def __init__(self, root: str = INDEX_ROOT, dim: int = DIM, embed_fn: Callable[..., Dict[int, float]] = embed):
+        self.root = root
+        self.dim = dim
+        self.embed_fn = embed_fn
+        self.vectors_path = os.path.join(root, "vectors.f32")
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite3"), check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        open(self.vectors_path, "ab").close()
+
+    # ---- writes --------------------------------------------------------------
+
+    def add(
+        self,
+        doc_id: str,
+        text: str,
+        kind: str,
+        ref: Optional[str] = None,
+        arxiv_id: Optional[str] = None,
+        title: Optional[str] = None,
+        url: Optional[str] = None,
+    ) -> bool:
+        """Index one document; returns False if it was already indexed with the same text."""
+        text_hash = _text_hash(text)
+        with self._lock:
+            existing = self._conn.execute(
+                "SELECT text_hash FROM vectors WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+        if existing and existing["text_hash"] == text_hash:
+            return False
+
+        dense = array("f", bytes(4 * self.dim))
+        for bucket, weight in self.embed_fn(text, self.dim).items():
+            dense[bucket] = weight
+
+        with self._lock, self._write_transaction():
+            existing = self._conn.execute(
+                "SELECT row, text_hash FROM vectors WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+            if existing and existing["text_hash"] == text_hash:
+                return False  # another process indexed it meanwhile
+            if existing:
+                row = existing["row"]
+            else:
+                (row,) = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM vectors").fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO vectors (row, doc_id, kind, ref, arxiv_id, title, url, text_hash, text) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (row, doc_id, kind, ref, base_arxiv_id(arxiv_id) if arxiv_id else None,
+                 title, url, text_hash, text),
+            )
+            # written before commit: readers never see a row without its vector
+            self._write_vector(row, dense)
+        return True
+
+    def add_text(self, ref: str, text: str, kind: str = "text", **meta: Any) -> int:
+        """
+        Index a long text as `chunk_text` passages; returns how many were
+        (re)indexed. Passages left over from a longer earlier text are removed.
+        """
+        chunks = chunk_text(text)
+        added = sum(
+            self.add(f"{kind}:{ref}:{i}", chunk, kind=kind, ref=ref, **meta)
+            for i, chunk in enumerate(chunks)
+        )
+        prefix = f"{kind}:{ref}:"
+        with self._lock, self._write_transaction():
+            stale = [
+                r for r in self._conn.execute("SELECT row, doc_id FROM vectors WHERE kind = ? AND ref = ?", (kind, ref))
+                if r["doc_id"].startswith(prefix) and int(r["doc_id"][len(prefix):]) >= len(chunks)
+            ]
+            for r in stale:
+                self._conn.execute("DELETE FROM vectors WHERE row = ?", (r["row"],))
+                self._write_vector(r["row"], array("f", bytes(4 * self.dim)))  # a zero vector never scores
+        return added
+
+    @contextmanager
+    def _write_transaction(self) -> Iterator[None]:
+        """BEGIN IMMEDIATE: one writer across processes until commit (callers hold self._lock)."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.rollback()
+            raise
+        self._conn.commit()
+
+    def _write_vector(self, row: int, dense: array) -> None:
+        with open(self.vectors_path, "r+b") as f:
+            f.seek(row * 4 * self.dim)
+            f.write(dense.tobytes())
+
+    # ---- reads ---------------------------------------------------------------
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()
+        return count
+
+    def missing(self, arxiv_ids: Iterable[str]) -> List[str]:
+        """The subset of `arxiv_ids` (any version) with nothing indexed yet, in input order."""
+        arxiv_ids = list(arxiv_ids)
+        with self._lock:
+            known = {
+                r[0] for r in self._conn.execute("SELECT DISTINCT arxiv_id FROM vectors WHERE arxiv_id IS NOT NULL")
+            }
+        return [a for a in arxiv_ids if base_arxiv_id(a) not in known]
+
+    def search(self, query: str, k: int = 5, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top-`k` documents by cosine similarity, best first, each with a `score`."""
+        q = self.embed_fn(query, self.dim)
+        if not q or k <= 0:
+            return []
+
+        with self._lock:
+            # rows freed by add_text stay as zero vectors, so scan up to the highest row
+            (rows,) = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM vectors").fetchone()
+            allowed = None
+            if kind is not None:
+                allowed = {r[0] for r in self._conn.execute("SELECT row FROM vectors WHERE kind = ?", (kind,))}
+        if rows == 0:
+            return []
+
+        scores = self._scores(q, rows)
+        candidates = range(rows) if allowed is None else allowed
+        best = heapq.nlargest(k, ((scores[r], r) for r in candidates if scores[r] > 0))
+        if not best:
+            return []
+
+        with self._lock:
+            meta = {
+                r["row"]: dict(r)
+                for r in self._conn.execute(
+                    f"SELECT * FROM vectors WHERE row IN ({','.join('?' * len(best))})", [r for _, r in best]
+                )
+            }
+        results = []
+        for score, row in best:
+            doc = meta.get(row)
+            if doc is None:  # removed since the scan
+                continue
+            doc.pop("text_hash", None)
+            doc["score"] = round(float(score), 4)
+            results.append(doc)
+        return results
+
+    def _scores(self, q: Dict[int, float], rows: int) -> List[float]:
+        if np is not None:
+            matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+            buckets = np.fromiter(q.keys(), dtype=np.int64)
+            weights = np.fromiter(q.values(), dtype=np.float32)
+            return (matrix[:, buckets] @ weights).tolist()
+
+        with open(self.vectors_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm).cast("f")
+            try:
+                terms = list(q.items())
+                dim = self.dim
+                return [
+                    sum(view[base + b] * w for b, w in terms)
+                    for base in range(0, rows * dim, dim)
+                ]
+            finally:
+                view.release()
+
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_vector_index() -> VectorIndex:
+    """Return the process-wide vector index (created on first use)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = VectorIndex()
+            log_info(f"[VectorIndex] Opened {_index.root} ({len(_index)} documents)")
+        return _index
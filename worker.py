@@ -0,0 +1,310 @@
+import argparse
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+
+from utils import tracing
+from utils.logger import log_error, log_info, log_warn
+from workflow_executor import AgentPool, get_agent_pool
+from workflow_runner import run_workflow
+
+RESULTS_PATH = "data/worker/results.jsonl"
+POLL_INTERVAL = 2.0  # seconds between queue-directory scans in --watch mode
+
+
+def job_id_for(job: Dict[str, Any]) -> str:
+    """Explicit `job_id` / `id` / `request_id`, else a hash of the job itself (stable across restarts)."""
+    for key in ("job_id", "id", "request_id"):
+        if job.get(key):
+            return str(job[key])
+    payload = json.dumps(job, sort_keys=True).encode("utf-8")
+    return "job-" + hashlib.sha256(payload).hexdigest()[:12]
+
+
+def read_jsonl_jobs(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield one job per non-empty line; malformed lines are logged and skipped."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                log_warn(f"[Worker] ⚠️ Skipping malformed line {line_no} in {path}: {e}")
+                continue
+            if isinstance(job, dict):
+                yield job
+
+
+def _step_status(output: Any) -> str:
+    status = output.get("status") if isinstance(output, dict) else "error"
+    # foreach steps aggregate per-item statuses into a list
+    return status if isinstance(status, str) else "success"
+
+
+class QueueDir:
+    """
+    A directory of `*.json` job files (one job each) shared by any number of
+    workers. A worker claims a job by renaming it into `processing/`; the
+    rename is atomic, so each file goes to exactly one worker. Finished
+    jobs move to `done/` or `failed/`.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        for sub in ("processing", "done", "failed"):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+
+    def requeue_stale(self) -> int:
+        """
+        Put jobs left in processing/ by a crashed worker back in the queue.
+        Only safe when no other worker is using the directory.
+        """
+        moved = 0
+        processing = os.path.join(self.root, "processing")
+        for name in sorted(os.listdir(processing)):
+            os.replace(os.path.join(processing, name), os.path.join(self.root, name))
+            moved += 1
+        if moved:
+            log_info(f"[Worker] ♻️ Requeued {moved} unfinished jobs from {processing}")
+        return moved
+
+    def claim(self) -> Iterator[Dict[str, Any]]:
+        """Claim and yield every job currently waiting, oldest name first."""
+        for name in sorted(os.listdir(self.root)):
+            if not name.endswith(".json"):
+                continue
+            src = os.path.join(self.root, name)
+            dst = os.path.join(self.root, "processing", name)
+            try:
+                os.rename(src, dst)
+            except OSError:
+                continue  # another worker got it first
+            try:
+                with open(dst, "r", encoding="utf-8") as f:
+                    job = json.load(f)
+            except (OSError, ValueError) as e:  # ValueError: bad JSON or bad encoding
+                log_warn(f"[Worker] ⚠️ Unreadable job file {name}: {e}")
+                os.replace(dst, os.path.join(self.root, "failed", name))
+                continue
+            if not isinstance(job, dict):
+                log_warn(f"[Worker] ⚠️ Job file {name} is not a JSON object")
+                os.replace(dst, os.path.join(self.root, "failed", name))
+                continue
+            if not job.get("job_id"):
+                job["job_id"] = os.path.splitext(name)[0]
+            job["_queue_file"] = name
+            yield job
+
+    def iter_jobs(self, watch: bool = False, poll_interval: float = POLL_INTERVAL) -> Iterator[Dict[str, Any]]:
+        while True:
+            found = False
+            for job in self.claim():
+                found = True
+                yield job
+            if not watch:
+                return
+            if not found:
+                time.sleep(poll_interval)
+
+    def ack(self, job: Dict[str, Any], ok: bool) -> None:
+        name = job.get("_queue_file")
+        if name:
+            os.replace(
+                os.path.join(self.root, "processing", name),
+                os.path.join(self.root, "done" if ok else "failed", name),
+            )
+
+
+class Worker:
+    """
+    Runs many research jobs at once in one long-lived process, so every job
+    shares the same agent pool, tools, HTTP session and caches.
+
+    A job is a dict with one of:
+      - "workflow": a workflow config (dict with "workflow", or the step list)
+      - "config":   path to a workflow YAML file
+      - "query":    an instruction for PlannerAgent (+ optional "num_papers")
+
+    Each finished job appends one record to `results_path`. That file is the
+    checkpoint: on restart, jobs that already succeeded are skipped and the
+    rest (failed or interrupted) run again. Retried jobs keep their task_id,
+    so run_workflow resumes them from their step checkpoints.
+    """
+
+    def __init__(
+        self,
+        results_path: str = RESULTS_PATH,
+        concurrency: int = 4,
+        workflow_workers: int = 8,
+        pool: Optional[AgentPool] = None,
+    ):
+        self.results_path = results_path
+        self.concurrency = max(1, concurrency)
+        self.workflow_workers = workflow_workers
+        self.pool = pool or get_agent_pool()
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(results_path) or ".", exist_ok=True)
+
+    def completed_ids(self) -> Set[str]:
+        if not os.path.exists(self.results_path):
+            return set()
+        return {
+            record["job_id"]
+            for record in read_jsonl_jobs(self.results_path)
+            if record.get("status") == "success" and "job_id" in record
+        }
+
+    def drain(self, jobs: Iterable[Dict[str, Any]], queue: Optional[QueueDir] = None) -> Dict[str, int]:
+        """Run every job not yet completed, `concurrency` at a time; returns counts by outcome."""
+        done = self.completed_ids()
+        counts = {"success": 0, "error": 0, "skipped": 0}
+        counts_lock = threading.Lock()
+        slots = threading.BoundedSemaphore(self.concurrency)
+
+        def _one(job: Dict[str, Any]) -> None:
+            try:
+                record = self.run_job(job)
+                with counts_lock:
+                    counts[record["status"]] += 1
+                if queue is not None:
+                    queue.ack(job, record["status"] == "success")
+            finally:
+                slots.release()
+
+        jobs = iter(jobs)
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="worker") as executor:
+            while True:
+                # pull the next job only when a slot is free (queue dirs may be shared)
+                slots.acquire()
+                job = next(jobs, None)
+                if job is None:
+                    slots.release()
+                    break
+                job_id = job_id_for(job)
+                if job_id in done:
+                    slots.release()
+                    log_info(f"[Worker] ⏭️ {job_id} already done")
+                    with counts_lock:
+                        counts["skipped"] += 1
+                    if queue is not None:
+                        queue.ack(job, True)
+                    continue
+                done.add(job_id)  # the same ID twice in one feed runs once
+                executor.submit(_one, job)
+
+        log_info(
+            f"[Worker] ✅ Drained jobs: {counts['success']} succeeded, "
+            f"{counts['error']} failed, {counts['skipped']} already done"
+        )
+        return counts
+
+    def run_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        job_id = job_id_for(job)
+        task_id = str(job.get("task_id") or f"job-{job_id}")
+        record: Dict[str, Any] = {"job_id": job_id, "task_id": task_id, "started_at": datetime.now().isoformat()}
+        started = time.monotonic()
+        log_info(f"[Worker] ▶️ {job_id} (task_id={task_id})")
+
+        try:
+            with tracing.context(task_id=task_id):  # the planner serves this job
+                workflow_config = self._workflow_for(job, job_id)
+            results = run_workflow(
+                workflow_config, max_workers=self.workflow_workers, task_id=task_id, pool=self.pool
+            )
+            steps = {step_id: _step_status(out) for step_id, out in results.items()}
+            record["steps"] = steps
+            record["report_path"] = next(
+                (out["report_path"] for out in results.values() if isinstance(out, dict) and out.get("report_path")),
+                None,
+            )
+            failed = [step_id for step_id, status in steps.items() if status in ("error", "skipped")]
+            record["status"] = "error" if failed else "success"
+            if failed:
+                record["error"] = f"steps did not succeed: {failed}"
+        except Exception as e:
+            log_error(f"[Worker] ❌ {job_id} failed: {e}")
+            record["status"] = "error"
+            record["error"] = str(e)
+
+        record["duration_s"] = round(time.monotonic() - started, 3)
+        record["finished_at"] = datetime.now().isoformat()
+        self._write(record)
+        icon = "✅" if record["status"] == "success" else "❌"
+        log_info(f"[Worker] {icon} {job_id} {record['status']} in {record['duration_s']}s")
+        return record
+
+    def _workflow_for(self, job: Dict[str, Any], job_id: str) -> Dict[str, Any]:
+        if job.get("workflow") is not None:
+            workflow = job["workflow"]
+            config = copy.deepcopy(workflow if isinstance(workflow, dict) else {"workflow": workflow})
+        elif job.get("config"):
+            import yaml
+
+            with open(job["config"], "r") as f:
+                config = yaml.safe_load(f)
+        elif job.get("query") or job.get("instruction"):
+            planner = self.pool.get("PlannerAgent")
+            config = planner.run({
+                "instruction": job.get("query") or job.get("instruction"),
+                "num_papers": int(job.get("num_papers", 3)),
+            })
+            if config.get("status") == "error":
+                raise ValueError(config.get("message", "planning failed"))
+        else:
+            raise ValueError("job needs 'workflow', 'config' or 'query'")
+
+        # one report file per job, even when jobs finish on the same day
+        for step in config.get("workflow", []):
+            if step.get("agent") == "WriterAgent":
+                step["params"] = {"report_name": f"{datetime.now():%Y-%m-%d}_{job_id}", **(step.get("params") or {})}
+        return config
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._write_lock:
+            with open(self.results_path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run AgentFlow as a worker draining a job queue")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--jobs", type=str, help="JSONL file with one job per line")
+    source.add_argument("--queue-dir", type=str, help="Directory of *.json job files")
+    parser.add_argument("--out", type=str, default=RESULTS_PATH, help="JSONL file for result records")
+    parser.add_argument("--concurrency", type=int, default=4, help="Jobs running at once")
+    parser.add_argument("--workers", type=int, default=8, help="Max steps/items running at once per job")
+    parser.add_argument("--watch", action="store_true", help="Keep polling --queue-dir for new jobs")
+    parser.add_argument(
+        "--no-requeue", action="store_true",
+        help="Leave jobs in <queue-dir>/processing alone (other workers share the directory)",
+    )
+    args = parser.parse_args()
+
+    worker = Worker(args.out, concurrency=args.concurrency, workflow_workers=args.workers)
+    try:
+        if args.jobs:
+            worker.drain(read_jsonl_jobs(args.jobs))
+        else:
+            queue = QueueDir(args.queue_dir)
+            if not args.no_requeue:
+                queue.requeue_stale()
+            worker.drain(queue.iter_jobs(watch=args.watch), queue=queue)
+    except KeyboardInterrupt:
+        log_warn("[Worker] ⏹️ Interrupted; unfinished jobs will run again on restart")
+    finally:
+        worker.pool.close()
+
+
+if __name__ == "__main__":
+    main()
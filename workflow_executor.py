@@ -0,0 +1,432 @@
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils import tracing
+from utils.checkpoints import CheckpointStore
+from utils.logger import log_error, log_info, log_warn
+from utils.profiling import Profiler
+from utils.registry import AGENT_GROUP, Registry
+
+# agent name (as used in workflow configs) -> "module:Class", imported on first use
+AGENT_CLASSES = {
+    "SearchAgent": "agents.search_agent.search_agent:SearchAgent",
+    "PDFDownloaderAgent": "agents.pdf_downloader_agent.pdf_downloader_agent:PDFDownloaderAgent",
+    "SummariserAgent": "agents.summariser_agent.summariser_agent:SummariserAgent",
+    "WriterAgent": "agents.writer_agent.writer_agent:WriterAgent",
+    "PlannerAgent": "agents.planner_agent.planner_agent:PlannerAgent",
+    "ToolAgent": "agents.tool_agent.tool_agent:ToolAgent",
+}
+AGENTS = Registry(AGENT_GROUP, AGENT_CLASSES)
+
+
+def create_agent(agent_name: str, task_id: Optional[str] = None) -> Any:
+    """Instantiate a registered agent; unknown names fall back to a ToolAgent."""
+    try:
+        cls = AGENTS.load(agent_name)
+    except KeyError:
+        return AGENTS.load("ToolAgent")(name=agent_name, task_id=task_id)
+    return cls(task_id=task_id)
+
+
+class AgentPool:
+    """
+    Agent instances keyed by agent name, reused across steps and workflows
+    so warm clients, worker pools and caches survive between runs. Agents
+    are shared by concurrent steps and runs, so `run` must not keep
+    per-call state on the instance; they are created without a task_id and
+    read the current run's from the tracing context (see BaseAgent).
+
+    close() closes every pooled agent, the shared tools and the shared HTTP
+    session; the pool can be used again afterwards.
+    """
+
+    def __init__(self):
+        self._agents: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, agent_name: str) -> Any:
+        with self._lock:
+            if agent_name not in self._agents:
+                self._agents[agent_name] = create_agent(agent_name)
+            return self._agents[agent_name]
+
+    def close(self, shared: bool = True) -> None:
+        """Close pooled agents; with `shared`, also the process-wide tools and HTTP session."""
+        with self._lock:
+            agents = list(self._agents.values())
+            self._agents.clear()
+        for agent in agents:
+            try:
+                agent.close()
+            except Exception as e:
+                log_warn(f"[AgentPool] ⚠️ Failed to close {type(agent).__name__}: {e}")
+        if shared:
+            from tools.load_tools import close_tools
+            from utils.http import close_session
+
+            close_tools()
+            close_session()
+
+
+_pool: Optional[AgentPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_agent_pool() -> AgentPool:
+    """Return the process-wide agent pool (created on first use)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = AgentPool()
+        return _pool
+
+
+def normalise_workflow(workflow_config: dict) -> List[Dict[str, Any]]:
+    """
+    Turn a workflow config into a list of step dicts with explicit wiring.
+
+    Step keys:
+      - id:         unique step ID (default "step<N>")
+      - agent:      agent name
+      - params:     static input for the agent
+      - depends_on: step IDs that must finish first
+      - inputs:     {input_name: "step_id.key" | "step_id"}; without it the
+                    outputs of all dependencies are merged into the input
+      - foreach:    "step_id.key" or {"from": "step_id.key", "as": name};
+                    runs the agent once per item of that list, starting each
+                    item as soon as the upstream produces it
+
+    Legacy configs (no `id` / `depends_on` anywhere) become a linear chain in
+    which each step receives the previous step's output.
+    """
+    raw_steps = workflow_config.get("workflow", [])
+    legacy = not any("id" in s or "depends_on" in s for s in raw_steps)
+
+    steps: List[Dict[str, Any]] = []
+    for i, raw in enumerate(raw_steps, 1):
+        step_id = str(raw.get("id") or f"step{i}")
+        depends_on = list(raw.get("depends_on") or [])
+        if legacy and steps:
+            depends_on = [steps[-1]["id"]]
+
+        foreach = raw.get("foreach")
+        if isinstance(foreach, str):
+            foreach = {"from": foreach}
+        if foreach:
+            src_step, _, src_key = foreach["from"].partition(".")
+            foreach = (src_step, src_key, foreach.get("as") or src_key)
+            if src_step not in depends_on:
+                depends_on.append(src_step)
+
+        steps.append({
+            "id": step_id,
+            "agent": raw["agent"],
+            "params": raw.get("params") or {},
+            "depends_on": depends_on,
+            "inputs": raw.get("inputs") or {},
+            "foreach": foreach,
+        })
+
+    ids = [s["id"] for s in steps]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Duplicate step IDs in workflow: {ids}")
+    for step in steps:
+        for dep in step["depends_on"]:
+            if dep not in ids:
+                raise ValueError(f"Step '{step['id']}' depends on unknown step '{dep}'")
+    _check_acyclic(steps)
+    return steps
+
+
+def _check_acyclic(steps: List[Dict[str, Any]]) -> None:
+    deps = {s["id"]: set(s["depends_on"]) for s in steps}
+    done: set = set()
+    while deps:
+        ready = [sid for sid, d in deps.items() if d <= done]
+        if not ready:
+            raise ValueError(f"Workflow has a dependency cycle among: {sorted(deps)}")
+        for sid in ready:
+            done.add(sid)
+            del deps[sid]
+
+
+def _merge(into: Dict[str, Any], output: Dict[str, Any]) -> None:
+    """Merge one output into an input dict; lists under the same key are concatenated."""
+    for key, value in output.items():
+        if isinstance(value, list) and isinstance(into.get(key), list):
+            into[key] = into[key] + value
+        else:
+            into[key] = value
+
+
+def _is_error(output: Any) -> bool:
+    return not isinstance(output, dict) or "error" in output or output.get("status") == "error"
+
+
+class WorkflowExecutor:
+    """
+    Runs a workflow as a DAG: independent steps run concurrently on a thread
+    pool and each step's input is wired from its dependencies' outputs.
+    `foreach` steps stream items between steps, e.g. summarising paper 1
+    while paper 2 is still downloading.
+
+    `run()` returns {step_id: output}; failed steps map to
+    {"status": "error", ...} and their dependents to {"status": "skipped", ...}.
+
+    With `checkpoints`, every finished step and foreach item is recorded
+    under `task_id`; running again with the same task_id restores those
+    outputs and only runs steps/items that failed or never finished.
+
+    With a `profiler` (utils.profiling), every step and item runs under it.
+
+    cancel() (from any thread) stops the run early: queued steps/items are
+    dropped, running ones finish but are no longer checkpointed, and the
+    run's status is left alone.
+    """
+
+    def __init__(
+        self,
+        workflow_config: dict,
+        max_workers: int = 8,
+        task_id: Optional[str] = None,
+        pool: Optional[AgentPool] = None,
+        checkpoints: Optional[CheckpointStore] = None,
+        profiler: Optional[Profiler] = None,
+    ):
+        self.workflow_config = workflow_config
+        self.steps = normalise_workflow(workflow_config)
+        self.checkpoints = checkpoints
+        self.profiler = profiler
+        self.max_workers = max_workers
+        self.task_id = task_id or str(uuid.uuid4())
+        # without a shared pool, agents live for this run only
+        self.pool = pool or AgentPool()
+        self._own_pool = pool is None
+
+        self.status: Dict[str, str] = {s["id"]: "pending" for s in self.steps}
+        self.outputs: Dict[str, Any] = {}
+        self.agents: Dict[str, Any] = {}
+        # foreach bookkeeping
+        self.buffer: Dict[str, List[Tuple[tuple, Any]]] = {s["id"]: [] for s in self.steps}
+        self.item_outputs: Dict[str, Dict[tuple, Dict[str, Any]]] = {s["id"]: {} for s in self.steps}
+        self.in_flight: Dict[str, int] = {s["id"]: 0 for s in self.steps}
+        self.futures: Dict[Future, Tuple[str, Optional[tuple]]] = {}
+        self.restored: set = set()  # futures answered from a checkpoint
+        self.failed_items = 0
+        self._cancelled = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # ---- public --------------------------------------------------------------
+
+    def run(self) -> Dict[str, Any]:
+        if self.checkpoints is not None and not self._cancelled.is_set():
+            self.checkpoints.start_run(self.task_id, self.workflow_config)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="workflow") as pool:
+                self._executor = pool
+                if self._cancelled.is_set():  # cancelled before the pool existed
+                    pool.shutdown(wait=False, cancel_futures=True)
+                self._schedule_all(pool)
+                while self.futures:
+                    done, _ = wait(list(self.futures), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._on_done(future)
+                    self._schedule_all(pool)
+        finally:
+            self._executor = None
+            if self._own_pool:
+                self.pool.close(shared=False)
+
+        reason = "cancelled" if self._cancelled.is_set() else "never became ready"
+        for step_id, status in self.status.items():
+            if status in ("pending", "running"):
+                self._skip(step_id, reason)
+        # a cancelled run leaves the run record to whoever cancelled it
+        if self.checkpoints is not None and not self._cancelled.is_set():
+            ok = not self.failed_items and all(status == "done" for status in self.status.values())
+            self.checkpoints.finish_run(self.task_id, "done" if ok else "incomplete")
+            if self.restored:
+                log_info(f"[Workflow] ⚡ Restored {len(self.restored)} steps/items from checkpoints")
+        return {s["id"]: self.outputs.get(s["id"]) for s in self.steps}
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        pool = self._executor
+        if pool is not None:
+            # cancelled futures complete at once, which wakes run()'s wait
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    # ---- scheduling ----------------------------------------------------------
+
+    def _agent(self, step: Dict[str, Any]) -> Any:
+        if step["id"] not in self.agents:
+            self.agents[step["id"]] = self.pool.get(step["agent"])
+        return self.agents[step["id"]]
+
+    def _resolve(self, ref: str) -> Any:
+        step_id, _, key = ref.partition(".")
+        output = self.outputs[step_id]
+        return output.get(key) if key else output
+
+    def _base_input(self, step: Dict[str, Any]) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        source = step["foreach"][0] if step["foreach"] else None
+        if step["inputs"]:
+            for name, ref in step["inputs"].items():
+                data[name] = self._resolve(ref)
+        else:
+            for dep in step["depends_on"]:
+                if dep != source:
+                    _merge(data, self.outputs[dep])
+        data.update(step["params"])
+        return data
+
+    def _submit(self, pool: ThreadPoolExecutor, step: Dict[str, Any], data: Dict[str, Any], index: Optional[tuple]) -> None:
+        saved = self.checkpoints.get(self.task_id, step, index) if self.checkpoints is not None else None
+        if saved is not None:
+            # finished in an earlier attempt: hand back the recorded output
+            future: Future = Future()
+            future.set_result(saved)
+            self.restored.add(future)
+        else:
+            future = pool.submit(self._run_agent, self._agent(step), data, step["id"], index)
+        self.futures[future] = (step["id"], index)
+        if index is not None:
+            self.in_flight[step["id"]] += 1
+
+    def _run_agent(self, agent: Any, data: Dict[str, Any], step_id: str, index: Optional[tuple]) -> Any:
+        # spans opened by the agent (and its tools and HTTP calls) are attributed to this step/item
+        item = None if index is None else ".".join(str(i) for i in index)
+        with tracing.context(task_id=self.task_id, step=step_id, item=item):
+            if self.profiler is None:
+                return agent.run(data)
+            with self.profiler.step(step_id, item):
+                return agent.run(data)
+
+    def _schedule_all(self, pool: ThreadPoolExecutor) -> None:
+        # finishing one step can unblock another listed before it
+        while not self._cancelled.is_set() and self._schedule(pool):
+            pass
+
+    def _schedule(self, pool: ThreadPoolExecutor) -> bool:
+        """One pass over the steps; returns True if any step changed state."""
+        before = dict(self.status)
+        for step in self.steps:
+            step_id = step["id"]
+            status = self.status[step_id]
+            if status in ("done", "failed", "skipped"):
+                continue
+
+            source = step["foreach"][0] if step["foreach"] else None
+            others = [d for d in step["depends_on"] if d != source]
+            blocked = [d for d in step["depends_on"] if self.status[d] in ("failed", "skipped")]
+            if blocked:
+                self._skip(step_id, f"dependency '{blocked[0]}' did not succeed")
+                continue
+            if any(self.status[d] != "done" for d in others):
+                continue
+
+            try:
+                if source is None:
+                    if status == "pending":
+                        log_info(f"[Workflow] ▶️ {step_id}: {step['agent']}")
+                        self.status[step_id] = "running"
+                        self._submit(pool, step, self._base_input(step), None)
+                    continue
+
+                # foreach: start buffered items as soon as the other inputs are ready
+                if status == "pending":
+                    log_info(f"[Workflow] ▶️ {step_id}: {step['agent']} (per item of {source})")
+                    self.status[step_id] = "running"
+                base = self._base_input(step)
+                _, _, as_key = step["foreach"]
+                while self.buffer[step_id]:
+                    index, item = self.buffer[step_id].pop(0)
+                    self._submit(pool, step, {**base, as_key: [item]}, index)
+
+                if self.status[source] == "done" and self.in_flight[step_id] == 0:
+                    self._finish_foreach(step_id)
+            except Exception as e:
+                if self._cancelled.is_set():  # the pool shut down under us
+                    self._skip(step_id, "cancelled")
+                    continue
+                log_error(f"[Workflow] ❌ {step_id} failed to start: {e}")
+                self.status[step_id] = "failed"
+                self.outputs[step_id] = {"status": "error", "message": str(e)}
+        return self.status != before
+
+    def _on_done(self, future: Future) -> None:
+        step_id, index = self.futures.pop(future)
+        if future.cancelled():
+            if index is not None:
+                self.in_flight[step_id] -= 1
+            return
+        try:
+            output = future.result()
+            error = None
+            if not isinstance(output, dict):
+                error = f"agent returned {type(output).__name__}, expected dict"
+            elif _is_error(output):
+                error = output.get("error") or output.get("message") or "agent reported an error"
+        except Exception as e:
+            output, error = None, str(e)
+
+        if self.checkpoints is not None and future not in self.restored and not self._cancelled.is_set():
+            step = next(s for s in self.steps if s["id"] == step_id)
+            try:
+                if error is None:
+                    self.checkpoints.record(self.task_id, step, index, "done", output)
+                else:
+                    self.checkpoints.record(self.task_id, step, index, "failed", {"message": str(error)})
+            except Exception as e:
+                log_warn(f"[Workflow] ⚠️ Could not checkpoint {step_id}: {e}")
+
+        if index is None:
+            if error is not None:
+                log_error(f"[Workflow] ❌ {step_id} failed: {error}")
+                self.status[step_id] = "failed"
+                self.outputs[step_id] = {"status": "error", "message": str(error)}
+                return
+            self.status[step_id] = "done"
+            self.outputs[step_id] = output
+            log_info(f"[Workflow] ✅ {step_id} done")
+            self._feed_dependents(step_id, (), output)
+            return
+
+        self.in_flight[step_id] -= 1
+        if error is not None:
+            log_warn(f"[Workflow] ⚠️ {step_id} item {index} failed: {error}")
+            self.failed_items += 1
+            return
+        self.item_outputs[step_id][index] = output
+        self._feed_dependents(step_id, index, output)
+
+    def _feed_dependents(self, step_id: str, index: tuple, output: Dict[str, Any]) -> None:
+        """Push newly produced items to every foreach step reading from `step_id`."""
+        for step in self.steps:
+            if step["foreach"] and step["foreach"][0] == step_id:
+                for j, item in enumerate(output.get(step["foreach"][1]) or []):
+                    self.buffer[step["id"]].append((index + (j,), item))
+
+    def _finish_foreach(self, step_id: str) -> None:
+        aggregated: Dict[str, Any] = {}
+        for index in sorted(self.item_outputs[step_id]):
+            for key, value in self.item_outputs[step_id][index].items():
+                if isinstance(value, list):
+                    aggregated.setdefault(key, []).extend(value)
+                else:
+                    aggregated.setdefault(key, []).append(value)
+        self.outputs[step_id] = aggregated
+        self.status[step_id] = "done"
+        log_info(f"[Workflow] ✅ {step_id} done ({len(self.item_outputs[step_id])} items)")
+
+    def _skip(self, step_id: str, reason: str) -> None:
+        log_warn(f"[Workflow] ⏭️ Skipping {step_id}: {reason}")
+        self.status[step_id] = "skipped"
+        self.outputs[step_id] = {"status": "skipped", "message": reason}
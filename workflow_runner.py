@@ -1,34 +1,158 @@
 import argparse
-import yaml
-from utils.logger import log_info, log_error
-from agents.planner_agent.planner_agent import PlannerAgent
-from agents.tool_agent.tool_agent import ToolAgent
+import sys
+import threading
+import uuid
+from typing import Any, Dict, List
 
+from utils import tracing
+from utils.checkpoints import CheckpointStore, get_checkpoint_store, step_hash
+from utils.logger import configure, log_error, log_info, log_warn
+from utils.profiling import MODES, TOP_N, Profiler
+from workflow_executor import AgentPool, WorkflowExecutor, get_agent_pool, normalise_workflow
 
-def run_workflow(workflow_config: dict):
-    """Executes a workflow step by step."""
-    results = {}
-    for i, step in enumerate(workflow_config.get("workflow", []), 1):
-        agent_name = step["agent"]
-        params = step.get("params", {})
+# fallback-plan steps started while the planner's LLM call is in flight (search)
+SPECULATIVE_STEPS = 1
+# search results whose PDFs are prefetched once the speculative search is done
+SPECULATIVE_DOWNLOADS = 2
 
-        log_info(f"[Runner] Step {i}: {agent_name} with params {params}")
 
+def run_workflow(
+    workflow_config: dict,
+    max_workers: int = 8,
+    task_id: str | None = None,
+    pool: AgentPool | None = None,
+    checkpoints: CheckpointStore | None = None,
+    profiler: Profiler | None = None,
+):
+    """
+    Executes a workflow as a DAG of steps (see workflow_executor.normalise_workflow).
+    Independent steps run concurrently; results are keyed by step ID.
+    Agents come from `pool` (default: the process-wide pool), so repeated
+    workflows reuse warm agents and tools.
+    Finished steps/items are checkpointed under `task_id` (default store:
+    data/checkpoints.sqlite3); calling again with the same task_id resumes.
+    With a `profiler`, each step/item is profiled (see utils.profiling).
+    """
+    steps = workflow_config.get("workflow", [])
+    log_info(f"[Runner] Running {len(steps)} steps (max_workers={max_workers})")
+    executor = WorkflowExecutor(
+        workflow_config,
+        max_workers=max_workers,
+        task_id=task_id,
+        pool=pool or get_agent_pool(),
+        checkpoints=checkpoints or get_checkpoint_store(),
+        profiler=profiler,
+    )
+    with tracing.span("run_workflow", "workflow", task_id=executor.task_id, steps=len(steps)):
+        return executor.run()
+
+
+def plan_and_run(
+    instruction: str,
+    num_papers: int = 3,
+    max_workers: int = 8,
+    task_id: str | None = None,
+    pool: AgentPool | None = None,
+    checkpoints: CheckpointStore | None = None,
+    profiler: Profiler | None = None,
+    reset_cache: bool = False,
+    speculate: bool = False,
+):
+    """
+    Plan `instruction` with PlannerAgent and run the plan (see run_workflow).
+
+    With `speculate`, the first SPECULATIVE_STEPS steps of the fallback plan
+    (the search) run under the same task_id while the planner waits on the
+    LLM, and the first SPECULATIVE_DOWNLOADS papers found are prefetched into
+    the download cache. The LLM plan nearly always matches the fallback; when
+    it arrives the speculative steps are reconciled with it through their
+    checkpoints: steps the plan shares (same step_hash, same upstream) are
+    waited for and restored instead of re-run, the rest are cancelled and
+    their checkpoints discarded. The prefetch is never waited for: the real
+    download step picks the PDFs up from the cache (or waits on the ones
+    still in flight), so summarising starts as soon as each paper is in.
+    """
+    from agents.planner_agent.planner_agent import PlannerAgent, fallback_plan
+
+    task_id = task_id or str(uuid.uuid4())
+    pool = pool or get_agent_pool()
+    checkpoints = checkpoints or get_checkpoint_store()
+    planner = PlannerAgent(reset_cache=reset_cache)
+    request = {"instruction": instruction, "num_papers": num_papers}
+    if not speculate:
+        workflow_config = planner.run(request)
+        return run_workflow(workflow_config, max_workers, task_id, pool, checkpoints, profiler)
+
+    speculative = {"workflow": fallback_plan(instruction, num_papers)["workflow"][:SPECULATIVE_STEPS]}
+    executor = WorkflowExecutor(
+        speculative, max_workers=max_workers, task_id=task_id, pool=pool, checkpoints=checkpoints, profiler=profiler,
+    )
+
+    searched = threading.Event()
+
+    def _speculate() -> None:
+        try:
+            with tracing.span("speculative_run", "workflow", task_id=task_id, steps=SPECULATIVE_STEPS):
+                results = executor.run()
+        except Exception as e:
+            log_warn(f"[Runner] ⚠️ Speculative run failed: {e}")
+            return
+        finally:
+            searched.set()
+        papers = ((results.get("step1") or {}).get("papers") or [])[:SPECULATIVE_DOWNLOADS]
+        if executor.cancelled or not papers:
+            return
+        # fills the download cache only; nothing is checkpointed, so a
+        # different plan has nothing to undo
         try:
-            # create agent dynamically
-            agent = globals().get(agent_name)
-            if agent is None:
-                # fallback → use ToolAgent for tool execution
-                agent = ToolAgent(name=agent_name)
-
-            agent_instance = agent() if callable(agent) else agent
-            result = agent_instance.run(params)
-            results[agent_name] = result
+            with tracing.span("speculative_prefetch", "workflow", task_id=task_id, papers=len(papers)):
+                pool.get("PDFDownloaderAgent").run({"papers": papers})
         except Exception as e:
-            log_error(f"[Runner] Step {i} failed: {e}")
-            results[agent_name] = {"status": "error", "message": str(e)}
+            log_warn(f"[Runner] ⚠️ Speculative prefetch failed: {e}")
 
-    return results
+    log_info(
+        f"[Runner] 🔮 Speculatively searching and prefetching {SPECULATIVE_DOWNLOADS} PDFs while planning"
+    )
+    thread = threading.Thread(target=tracing.propagate(_speculate), name="speculative", daemon=True)
+    thread.start()
+    try:
+        workflow_config = planner.run(request)
+        _reconcile(executor, searched, workflow_config, checkpoints)
+        return run_workflow(workflow_config, max_workers, task_id, pool, checkpoints, profiler)
+    finally:
+        executor.cancel()
+        thread.join()
+
+
+def _reconcile(
+    executor: WorkflowExecutor,
+    searched: threading.Event,
+    workflow_config: Dict[str, Any],
+    checkpoints: CheckpointStore,
+) -> List[str]:
+    """Keep the speculative steps `workflow_config` shares, cancel the others; returns the kept step IDs."""
+    try:
+        planned = {s["id"]: step_hash(s) for s in normalise_workflow(workflow_config)}
+    except Exception:
+        planned = {}  # an invalid plan fails in run_workflow; nothing speculative is kept
+    kept: List[str] = []
+    for step in executor.steps:  # in dependency order
+        if planned.get(step["id"]) == step_hash(step) and all(d in kept for d in step["depends_on"]):
+            kept.append(step["id"])
+
+    if len(kept) == len(executor.steps):
+        log_info(f"[Runner] 🔮 Plan matches the speculative steps; keeping {kept}")
+        searched.wait()
+        return kept
+    # already-finished kept steps stay checkpointed. cancel() doesn't stop steps already
+    # running, and one may be mid-record: wait for the speculative run to quiesce so
+    # nothing is recorded after the discard
+    executor.cancel()
+    searched.wait()
+    dropped = [s["id"] for s in executor.steps if s["id"] not in kept]
+    checkpoints.discard(executor.task_id, dropped)
+    log_info(f"[Runner] 🔮 Plan differs from the speculative steps; kept {kept}, cancelled {dropped}")
+    return kept
 
 
 def main():
@@ -37,20 +161,88 @@ def main():
     parser.add_argument("--query", type=str, help="Natural language instruction")
     parser.add_argument("--num", type=int, default=3, help="Number of papers")
     parser.add_argument("--reset-cache", action="store_true", help="Reset PlannerAgent cache")
+    parser.add_argument(
+        "--speculate", action="store_true",
+        help="With --query: start the fallback plan's search and first downloads while the LLM plan is generated",
+    )
+    parser.add_argument("--workers", type=int, default=8, help="Max steps/items running at once")
+    parser.add_argument("--resume", type=str, metavar="TASK_ID", help="Resume an earlier run, re-running only unfinished steps")
+    parser.add_argument(
+        "--trace", type=str, metavar="PATH",
+        help="Write the run's spans to PATH: .jsonl for JSON lines, otherwise a Chrome trace (chrome://tracing, Perfetto)",
+    )
+    parser.add_argument(
+        "--profile", nargs="?", const="all", choices=list(MODES),
+        help="Profile each step with cProfile (cpu), tracemalloc (memory) or both (all, the default) into data/profiles/<task_id>/",
+    )
+    parser.add_argument("--profile-top", type=int, default=TOP_N, metavar="N", help="Allocation sites per memory report")
+    parser.add_argument("--log-level", type=str, choices=["debug", "info", "warn", "error"], help="Default: LOG_LEVEL or info")
+    parser.add_argument("--log-dir", type=str, metavar="DIR", help="Also write log records as JSON lines to DIR/<task_id>.jsonl")
+    parser.add_argument("--no-console", action="store_true", help="Don't print log lines to the console")
     args = parser.parse_args()
 
-    if args.query:
+    if args.log_level or args.log_dir or args.no_console:
+        configure(level=args.log_level, console=not args.no_console, jsonl_dir=args.log_dir)
+
+    task_id = args.resume or str(uuid.uuid4())
+    with tracing.context(task_id=task_id):
+        try:
+            results = _run(args, task_id)
+        finally:
+            spans = tracing.get_tracer().spans(task_id)
+            tracing.get_tracer().clear(task_id)
+            tracing.print_breakdown(spans, title=f"Per-stage latency (task_id={task_id})")
+            if args.trace:
+                log_info(f"[Runner] 🧭 Trace written to {tracing.export(spans, args.trace)}")
+    return results
+
+
+def _run(args: argparse.Namespace, task_id: str):
+    if args.resume:
+        # 🔹 Reuse the stored workflow so step fingerprints match the checkpoints
+        workflow_config = get_checkpoint_store().load_config(task_id)
+        if workflow_config is None:
+            log_error(f"[Runner] ❌ No checkpointed run with task_id={task_id}")
+            sys.exit(1)
+        log_info(f"Resuming workflow {task_id}: {get_checkpoint_store().summary(task_id)}")
+    elif args.query:
         # 🔹 Use PlannerAgent (LLM or fallback)
         log_info(f"Running workflow from PlannerAgent: {args.query}")
+        if args.speculate:
+            log_info(f"[Runner] task_id={task_id} (resume with --resume {task_id})")
+            return _with_profiler(args, task_id, lambda profiler: plan_and_run(
+                args.query, args.num, max_workers=args.workers, task_id=task_id,
+                profiler=profiler, reset_cache=args.reset_cache, speculate=True,
+            ))
+        from agents.planner_agent.planner_agent import PlannerAgent
+
         planner = PlannerAgent(reset_cache=args.reset_cache)
         workflow_config = planner.run({"instruction": args.query, "num_papers": args.num})
     else:
         # 🔹 Load rule-based workflow from YAML
         log_info(f"Running workflow from YAML: {args.config}")
+        import yaml
+
         with open(args.config, "r") as f:
             workflow_config = yaml.safe_load(f)
 
-    results = run_workflow(workflow_config)
+    if not args.resume:
+        log_info(f"[Runner] task_id={task_id} (resume with --resume {task_id})")
+
+    return _with_profiler(args, task_id, lambda profiler: run_workflow(
+        workflow_config, max_workers=args.workers, task_id=task_id, profiler=profiler,
+    ))
+
+
+def _with_profiler(args: argparse.Namespace, task_id: str, run):
+    profiler = Profiler(task_id, mode=args.profile, top_n=args.profile_top) if args.profile else None
+    try:
+        results = run(profiler)
+    finally:
+        get_agent_pool().close()
+        if profiler is not None:
+            profiler.print_summary()
+            profiler.close()
     log_info("✅ Workflow completed")
     return results
 